@@ -247,7 +247,8 @@ export const sendUserQuery = async (
   RAG: RAGConfig | null,
   labels: string[],
   documentFilter: DocumentFilter[],
-  credentials: Credentials
+  credentials: Credentials,
+  conversation: { type: string; content: string }[] = []
 ): Promise<QueryPayload | null> => {
   try {
     const host = await detectHost();
@@ -262,6 +263,7 @@ export const sendUserQuery = async (
         labels: labels,
         documentFilter: documentFilter,
         credentials: credentials,
+        conversation: conversation,
       }),
     });
 
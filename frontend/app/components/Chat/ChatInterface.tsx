@@ -247,7 +247,8 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
         RAGConfig,
         filterLabels,
         documentFilter,
-        credentials
+        credentials,
+        getConversation()
       );
 
       if (!data || data.error) {
@@ -296,20 +297,22 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
     }
   };
 
+  // Earlier turns sent to the generator, also counted against the context budget
+  const getConversation = () =>
+    messages
+      .slice(1) // Skip the first message
+      .filter((msg) => msg.type === "user" || msg.type === "system")
+      .map((msg) => ({
+        type: msg.type,
+        content: msg.content as string,
+      }));
+
   const streamResponses = (query?: string, context?: string) => {
     if (socket?.readyState === WebSocket.OPEN) {
-      const filteredMessages = messages
-        .slice(1) // Skip the first message
-        .filter((msg) => msg.type === "user" || msg.type === "system")
-        .map((msg) => ({
-          type: msg.type,
-          content: msg.content,
-        }));
-
       const data = JSON.stringify({
         query: query,
         context: context,
-        conversation: filteredMessages,
+        conversation: getConversation(),
         rag_config: RAGConfig,
       });
       socket.send(data);
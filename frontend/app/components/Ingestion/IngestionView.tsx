@@ -181,10 +181,7 @@ const IngestionView: React.FC<IngestionViewProps> = ({
       ["READY", "DONE", "ERROR"].includes(fileMap[selectedFileData].status) &&
       !fileMap[selectedFileData].block
     ) {
-      sendDataBatches(
-        JSON.stringify(fileMap[selectedFileData]),
-        selectedFileData
-      );
+      sendFile(fileMap[selectedFileData], selectedFileData);
     }
   };
 
@@ -195,8 +192,52 @@ const IngestionView: React.FC<IngestionViewProps> = ({
         ["READY", "DONE", "ERROR"].includes(fileMap[fileID].status) &&
         !fileMap[fileID].block
       ) {
-        sendDataBatches(JSON.stringify(fileMap[fileID]), fileID);
+        sendFile(fileMap[fileID], fileID);
+      }
+    }
+  };
+
+  const sendFile = (fileData: FileData, fileID: string) => {
+    if (fileData.isURL || fileData.extension === "") {
+      sendDataBatches(JSON.stringify(fileData), fileID);
+    } else {
+      sendBinaryUpload(fileData, fileID);
+    }
+  };
+
+  // Uploads file bytes as binary frames which the server spools to disk
+  const sendBinaryUpload = (fileData: FileData, fileID: string) => {
+    if (socket?.readyState === WebSocket.OPEN) {
+      setInitialStatus(fileID);
+      const binary = atob(fileData.content);
+      const bytes = new Uint8Array(binary.length);
+      for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
       }
+
+      socket.send(
+        JSON.stringify({
+          fileID: fileID,
+          size: bytes.length,
+          fileConfig: { ...fileData, content: "" },
+          credentials: credentials,
+        })
+      );
+
+      // Every frame starts with the length of the fileID and the fileID
+      const id = new TextEncoder().encode(fileID);
+      const frameSize = 1024 * 1024;
+      for (let offset = 0; offset < bytes.length; offset += frameSize) {
+        const data = bytes.subarray(offset, offset + frameSize);
+        const frame = new Uint8Array(2 + id.length + data.length);
+        new DataView(frame.buffer).setUint16(0, id.length);
+        frame.set(id, 2);
+        frame.set(data, 2 + id.length);
+        socket.send(frame);
+      }
+    } else {
+      console.error("WebSocket is not open. ReadyState:", socket?.readyState);
+      setReconnect((prevState) => !prevState);
     }
   };
 
@@ -0,0 +1,203 @@
+import asyncio
+
+from wasabi import msg
+from weaviate.collections.classes.data import DataObject
+
+from goldenverba.components.document import Document
+from goldenverba.components.util import get_int_setting
+from goldenverba.components.util import get_chunk_uuid, get_document_uuid
+
+
+class BatchGroup:
+    """Objects added together, resolved once all of them were sent"""
+
+    def __init__(self, size: int):
+        self.future = asyncio.get_running_loop().create_future()
+        self.pending = size
+        self.errors: list[str] = []
+        if size == 0:
+            self.future.set_result([])
+
+    def resolve(self, error: str | None):
+        if error is not None:
+            self.errors.append(error)
+        self.pending -= 1
+        if self.pending == 0 and not self.future.done():
+            self.future.set_result(self.errors)
+
+
+class AdaptiveBatcher:
+    """
+    Accumulates objects of many documents into shared insert_many batches (gRPC).
+    The batch size grows while batches finish below the target latency and shrinks when they take longer,
+    batches are also cut by payload size, and at most max_in_flight batches are sent at the same time.
+    """
+
+    def __init__(
+        self,
+        collection,
+        batch_size: int | None = None,
+        max_in_flight: int | None = None,
+        target_latency: float = 2.0,
+        flush_interval: float = 1.0,
+        max_bytes: int = 16 * 1024 * 1024,
+        max_retries: int = 3,
+    ):
+        self.collection = collection
+        self.batch_size = batch_size or get_int_setting("VERBA_INSERT_BATCH_SIZE", 100)
+        self.min_batch_size = 10
+        self.max_batch_size = 2000
+        self.target_latency = target_latency
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_retries = max_retries
+        self.semaphore = asyncio.Semaphore(
+            max_in_flight or get_int_setting("VERBA_INSERT_MAX_IN_FLIGHT", 2)
+        )
+        self.buffer: list[tuple[DataObject, BatchGroup]] = []
+        self.buffer_bytes = 0
+        self.in_flight: set[asyncio.Task] = set()
+        self.timer: asyncio.TimerHandle | None = None
+
+    async def add(self, objects: list[DataObject]) -> asyncio.Future:
+        """Queue objects, returns a future with the error messages of failed objects"""
+        group = BatchGroup(len(objects))
+        for obj in objects:
+            self.buffer.append((obj, group))
+            self.buffer_bytes += get_object_size(obj)
+            if (
+                len(self.buffer) >= self.batch_size
+                or self.buffer_bytes >= self.max_bytes
+            ):
+                await self.dispatch()
+        if self.buffer and self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(
+                self.flush_interval, self.on_timer
+            )
+        return group.future
+
+    def on_timer(self):
+        self.timer = None
+        if self.buffer:
+            task = asyncio.create_task(self.dispatch())
+            self.in_flight.add(task)
+            task.add_done_callback(self.in_flight.discard)
+
+    async def dispatch(self):
+        """Send the buffered objects, waits only for a free in-flight slot"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        entries, self.buffer, self.buffer_bytes = self.buffer, [], 0
+        if not entries:
+            return
+        await self.semaphore.acquire()
+        task = asyncio.create_task(self.send(entries))
+        self.in_flight.add(task)
+        task.add_done_callback(self.in_flight.discard)
+
+    async def send(self, entries: list[tuple[DataObject, BatchGroup]]):
+        loop = asyncio.get_running_loop()
+        try:
+            errors = {}
+            for attempt in range(self.max_retries + 1):
+                start_time = loop.time()
+                try:
+                    response = await self.collection.data.insert_many(
+                        [obj for obj, _ in entries]
+                    )
+                    errors = {i: error.message for i, error in response.errors.items()}
+                    self.adapt(loop.time() - start_time)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        errors = {i: str(e) for i in range(len(entries))}
+                        break
+                    self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+                    msg.warn(
+                        f"Batch of {len(entries)} objects failed, retrying: {str(e)}"
+                    )
+                    await asyncio.sleep(2**attempt)
+            for i, (_, group) in enumerate(entries):
+                group.resolve(errors.get(i))
+        except BaseException as e:
+            for _, group in entries:
+                if not group.future.done():
+                    group.future.set_exception(
+                        e if isinstance(e, Exception) else Exception("Batch cancelled")
+                    )
+            raise
+        finally:
+            self.semaphore.release()
+
+    def adapt(self, latency: float):
+        if latency < self.target_latency / 2:
+            self.batch_size = min(self.max_batch_size, int(self.batch_size * 1.5))
+        elif latency > self.target_latency:
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+
+    async def flush(self):
+        """Send everything that is buffered and wait for all batches"""
+        await self.dispatch()
+        while self.in_flight:
+            await asyncio.gather(*list(self.in_flight), return_exceptions=True)
+
+
+def get_object_size(obj: DataObject) -> int:
+    """Approximate payload size of an object"""
+    size = sum(len(str(value)) for value in obj.properties.values())
+    if obj.vector is not None:
+        size += len(obj.vector) * 4
+    return size
+
+
+class BulkImporter:
+    """
+    Imports documents and their chunks through shared adaptive batches instead of
+    one document insert, one insert_many and one verification per document.
+    """
+
+    def __init__(self, document_collection, embedder_collection, on_write=None):
+        self.documents = AdaptiveBatcher(document_collection)
+        self.chunks = AdaptiveBatcher(embedder_collection)
+        # Called once the objects of a document were written
+        self.on_write = on_write
+
+    async def add(self, document: Document) -> tuple[str, asyncio.Future]:
+        """Queue a document with its vectorized chunks
+        @returns tuple[str, Future] - Document UUID and a future with the error messages of failed objects
+        """
+        doc_uuid = get_document_uuid(document)
+        for chunk in document.chunks:
+            chunk.doc_uuid = doc_uuid
+            chunk.labels = document.labels
+            chunk.title = document.title
+
+        document_future = await self.documents.add(
+            [DataObject(properties=Document.to_json(document), uuid=doc_uuid)]
+        )
+        chunk_future = await self.chunks.add(
+            [
+                DataObject(
+                    properties=chunk.to_json(),
+                    vector=chunk.vector,
+                    uuid=get_chunk_uuid(doc_uuid, chunk),
+                )
+                for chunk in document.chunks
+            ]
+        )
+        return doc_uuid, asyncio.ensure_future(
+            self.wait([document_future, chunk_future])
+        )
+
+    async def wait(self, futures: list[asyncio.Future]) -> list[str]:
+        errors = [
+            error for errors in await asyncio.gather(*futures) for error in errors
+        ]
+        if self.on_write is not None:
+            self.on_write()
+        return errors
+
+    async def flush(self):
+        await self.documents.flush()
+        await self.chunks.flush()
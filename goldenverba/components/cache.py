@@ -0,0 +1,631 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import weakref
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+from wasabi import msg
+
+from goldenverba.components.util import get_data_dir, get_int_setting
+
+
+def get_cache_key(embedder: str, model: str, text: str) -> str:
+    """Cache key of an embedding: embedder, model and the sha256 of the exact text sent"""
+    return f"{embedder}:{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+def get_cache_size() -> int:
+    return get_int_setting("VERBA_EMBEDDING_CACHE_SIZE", 100000, minimum=0)
+
+
+class EmbeddingCache:
+    """
+    Interface for embedding cache backends.
+    """
+
+    async def get_many(
+        self, client, model: str, keys: list[str]
+    ) -> dict[str, list[float]]:
+        """Look up embeddings in bulk
+        @parameter: client : WeaviateAsyncClient - Connected client (used by the Weaviate backend)
+        @parameter: model : str - Embedding model
+        @parameter: keys : list[str] - Keys from get_cache_key
+        @returns dict[str, list[float]] - Cached embeddings by key, missing keys are left out
+        """
+        raise NotImplementedError("get_many method must be implemented by a subclass.")
+
+    async def set_many(self, client, model: str, embeddings: dict[str, list[float]]):
+        """Store embeddings by key"""
+        raise NotImplementedError("set_many method must be implemented by a subclass.")
+
+
+class LocalEmbeddingCache(EmbeddingCache):
+    """
+    SQLite backed embedding cache, least recently used entries are evicted above max_entries.
+    Vectors are stored as float32 like Weaviate stores them, 4 bytes per dimension.
+    """
+
+    def __init__(self, path: str | None = None, max_entries: int | None = None):
+        self.path = path or os.path.join(get_data_dir(), "embedding_cache.sqlite")
+        self.max_entries = max_entries or get_cache_size()
+        self.connection: sqlite3.Connection | None = None
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            # Earlier versions stored float64 vectors
+            self.connection.execute("DROP TABLE IF EXISTS embeddings")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS vectors_last_used ON vectors (last_used)"
+            )
+            self.count = self.connection.execute(
+                "SELECT COUNT(*) FROM vectors"
+            ).fetchone()[0]
+        return self.connection
+
+    def read(self, keys: list[str]) -> dict[str, list[float]]:
+        with self.lock:
+            connection = self.connect()
+            cached = {}
+            # Stay below SQLite's limit of host parameters per statement
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                rows = connection.execute(
+                    f"SELECT key, vector FROM vectors WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, vector in rows:
+                    values = array("f")
+                    values.frombytes(vector)
+                    cached[key] = values.tolist()
+            if cached:
+                now = time.time()
+                connection.executemany(
+                    "UPDATE vectors SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in cached],
+                )
+                connection.commit()
+            return cached
+
+    def write(self, embeddings: dict[str, list[float]]):
+        with self.lock:
+            connection = self.connect()
+            now = time.time()
+            connection.executemany(
+                "INSERT OR REPLACE INTO vectors (key, vector, last_used) VALUES (?, ?, ?)",
+                [
+                    (key, array("f", vector).tobytes(), now)
+                    for key, vector in embeddings.items()
+                ],
+            )
+            self.count += len(embeddings)
+            if self.count > self.max_entries:
+                self.count = connection.execute(
+                    "SELECT COUNT(*) FROM vectors"
+                ).fetchone()[0]
+            if self.count > self.max_entries:
+                # Evict down to 90% so eviction doesn't run on every write
+                evict = self.count - int(self.max_entries * 0.9)
+                connection.execute(
+                    "DELETE FROM vectors WHERE key IN (SELECT key FROM vectors ORDER BY last_used ASC LIMIT ?)",
+                    (evict,),
+                )
+                self.count -= evict
+                msg.info(f"Evicted {evict} entries from the embedding cache")
+            connection.commit()
+
+    async def get_many(
+        self, client, model: str, keys: list[str]
+    ) -> dict[str, list[float]]:
+        if not keys:
+            return {}
+        return await asyncio.to_thread(self.read, keys)
+
+    async def set_many(self, client, model: str, embeddings: dict[str, list[float]]):
+        if embeddings:
+            await asyncio.to_thread(self.write, embeddings)
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+class WeaviateEmbeddingCache(EmbeddingCache):
+    """
+    Embedding cache stored in VERBA_Cache_ collections next to the data, oldest entries are evicted above max_entries.
+    """
+
+    def __init__(self, weaviate_manager, max_entries: int | None = None):
+        self.weaviate_manager = weaviate_manager
+        self.max_entries = max_entries or get_cache_size()
+
+    async def get_many(
+        self, client, model: str, keys: list[str]
+    ) -> dict[str, list[float]]:
+        if not keys or client is None:
+            return {}
+        return await self.weaviate_manager.get_cached_embeddings(client, model, keys)
+
+    async def set_many(self, client, model: str, embeddings: dict[str, list[float]]):
+        if embeddings and client is not None:
+            await self.weaviate_manager.add_cached_embeddings(
+                client, model, embeddings, self.max_entries
+            )
+
+
+def create_embedding_cache(weaviate_manager) -> EmbeddingCache | None:
+    """Create the cache backend selected with VERBA_EMBEDDING_CACHE (local, weaviate or none)"""
+    backend = os.getenv("VERBA_EMBEDDING_CACHE", "local").lower()
+    if backend == "local":
+        return LocalEmbeddingCache()
+    elif backend == "weaviate":
+        return WeaviateEmbeddingCache(weaviate_manager)
+    elif backend in ["none", "off", "false", ""]:
+        return None
+    msg.warn(f"Unknown embedding cache backend {backend}, caching is disabled")
+    return None
+
+
+def normalize_query(query: str) -> str:
+    """Queries that only differ in case or whitespace share a cached vector"""
+    return " ".join(query.split()).lower()
+
+
+class QueryCache:
+    """
+    In-process LRU cache of query vectors with a TTL, keyed by embedder, model and normalized query.
+    An optional LocalEmbeddingCache acts as a second tier shared by all workers on the same machine.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl: float = 3600,
+        disk: LocalEmbeddingCache | None = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk = disk
+        self.entries: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_key(self, embedder: str, model: str, query: str) -> str:
+        return get_cache_key(embedder, model, normalize_query(query))
+
+    def get(self, key: str) -> list[float] | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, vector = entry
+        if expires < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return vector
+
+    def set(self, key: str, vector: list[float]):
+        self.entries[key] = (time.monotonic() + self.ttl, vector)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def lookup(self, key: str) -> list[float] | None:
+        vector = self.get(key)
+        if vector is not None:
+            self.hits += 1
+            return vector
+        if self.disk is not None:
+            try:
+                vector = (await self.disk.get_many(None, "", [key])).get(key)
+            except Exception as e:
+                msg.warn(f"Query cache lookup failed: {str(e)}")
+            if vector is not None:
+                self.disk_hits += 1
+                self.set(key, vector)
+                return vector
+        self.misses += 1
+        return None
+
+    async def store(self, key: str, vector: list[float]):
+        self.set(key, vector)
+        if self.disk is not None:
+            try:
+                await self.disk.set_many(None, "", {key: vector})
+            except Exception as e:
+                msg.warn(f"Failed to store query vector in cache: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+
+def create_query_cache() -> QueryCache | None:
+    """Query vector cache, sized with VERBA_QUERY_CACHE_SIZE (0 disables it)"""
+    max_entries = get_int_setting("VERBA_QUERY_CACHE_SIZE", 10000, minimum=0)
+    if max_entries <= 0:
+        return None
+    disk = None
+    if os.getenv("VERBA_QUERY_CACHE_DISK", "false").lower() in ["true", "1", "yes"]:
+        disk = LocalEmbeddingCache(
+            path=os.path.join(get_data_dir(), "query_cache.sqlite"),
+            max_entries=max_entries * 10,
+        )
+    return QueryCache(
+        max_entries=max_entries,
+        ttl=float(os.getenv("VERBA_QUERY_CACHE_TTL", 3600)),
+        disk=disk,
+    )
+
+
+def get_deployment(client) -> str | None:
+    """URL of the Weaviate deployment a client is connected to"""
+    return getattr(getattr(client, "_connection", None), "url", None)
+
+
+class CorpusVersions:
+    """
+    Generation counter per Weaviate deployment, bumped whenever documents are written or deleted.
+    Cached query results remember the generation they were computed at and are stale once it changed.
+    Generations are stored in SQLite, so every worker and client on this machine sees the writes of the others.
+    They are kept in memory for ttl seconds, so writes of other workers are noticed within ttl,
+    and bumps on the event loop are written from a thread. Own writes are seen immediately.
+    Writes from other machines or outside of Verba are only noticed once cached results expire.
+    """
+
+    def __init__(self, path: str | None = None, ttl: float | None = None):
+        self.path = path or os.path.join(get_data_dir(), "corpus_versions.sqlite")
+        self.ttl = (
+            ttl if ttl is not None else float(os.getenv("VERBA_CORPUS_VERSION_TTL", 1))
+        )
+        self.connection: sqlite3.Connection | None = None
+        self.lock = threading.Lock()
+        # Deployment -> (generation, monotonic time it was read)
+        self.cached: dict[str, tuple[int, float]] = {}
+        # Bumps per deployment that aren't committed yet, guarded by pending_lock
+        self.pending: dict[str, int] = {}
+        self.pending_lock = threading.Lock()
+        self.flush_scheduled = False
+        # Clients without a deployment URL only see their own writes
+        self.generations: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS generations (deployment TEXT PRIMARY KEY, generation INTEGER NOT NULL)"
+            )
+        return self.connection
+
+    def get(self, client) -> int:
+        if client is None:
+            return 0
+        deployment = get_deployment(client)
+        if deployment is None:
+            return self.generations.get(client, 0)
+        cached = self.cached.get(deployment)
+        if cached is not None and time.monotonic() - cached[1] < self.ttl:
+            return cached[0]
+        with self.lock:
+            row = (
+                self.connect()
+                .execute(
+                    "SELECT generation FROM generations WHERE deployment = ?",
+                    (deployment,),
+                )
+                .fetchone()
+            )
+            # Bumps that are still being written count already
+            with self.pending_lock:
+                generation = (row[0] if row else 0) + self.pending.get(deployment, 0)
+        self.cached[deployment] = (generation, time.monotonic())
+        return generation
+
+    def bump(self, client):
+        if client is None:
+            return
+        deployment = get_deployment(client)
+        if deployment is None:
+            self.generations[client] = self.get(client) + 1
+            return
+        generation = self.get(client) + 1
+        self.cached[deployment] = (generation, self.cached[deployment][1])
+        with self.pending_lock:
+            self.pending[deployment] = self.pending.get(deployment, 0) + 1
+            if self.flush_scheduled:
+                return
+            self.flush_scheduled = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        # Bumps that arrive until the thread picks them up are written in one transaction
+        loop.run_in_executor(None, self.flush)
+
+    def flush(self):
+        """Write the pending bumps to SQLite"""
+        with self.lock:
+            with self.pending_lock:
+                self.flush_scheduled = False
+                pending = dict(self.pending)
+            if not pending:
+                return
+            connection = self.connect()
+            connection.executemany(
+                "INSERT INTO generations (deployment, generation) VALUES (?, ?) "
+                "ON CONFLICT(deployment) DO UPDATE SET generation = generation + excluded.generation",
+                list(pending.items()),
+            )
+            connection.commit()
+            with self.pending_lock:
+                for deployment, count in pending.items():
+                    self.pending[deployment] -= count
+                    if self.pending[deployment] == 0:
+                        del self.pending[deployment]
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+def get_scope_key(*parts) -> str:
+    """Hash of the settings a cached result depends on"""
+    return hashlib.sha256(
+        json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class AnswerCacheEntry:
+    """Retrieved documents and context of a query, plus the answers generated from them"""
+
+    def __init__(
+        self,
+        client,
+        scope: str,
+        vector: list[float],
+        documents: list,
+        context: str,
+        generation: int,
+        expires: float,
+    ):
+        self.client = weakref.ref(client)
+        self.scope = scope
+        norm = np.linalg.norm(vector)
+        self.vector = np.asarray(vector, dtype=np.float32) / (norm if norm else 1.0)
+        self.documents = documents
+        self.context = context
+        self.generation = generation
+        self.expires = expires
+        self.aliases: set[str] = set()
+        # Generator scope key to answer
+        self.answers: dict[str, str] = {}
+
+
+class SemanticAnswerCache:
+    """
+    Caches retrieval results and generated answers by query vector.
+    A query whose vector is within the cosine threshold of a cached one gets the cached documents and context,
+    and the answer generated for that context is replayed instead of calling the generator again.
+    Entries are only served while the corpus generation of their deployment is unchanged.
+    """
+
+    def __init__(
+        self,
+        corpus: CorpusVersions,
+        threshold: float = 0.97,
+        max_entries: int = 1000,
+        ttl: float = 86400,
+    ):
+        self.corpus = corpus
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[int, AnswerCacheEntry] = OrderedDict()
+        # Normalized query and context hash to the entry that served them
+        self.aliases: dict[str, AnswerCacheEntry] = {}
+        self.hits = 0
+        self.answer_hits = 0
+        self.misses = 0
+
+    def get_alias(self, query: str, context: str) -> str:
+        return get_scope_key(normalize_query(query), context)
+
+    def is_valid(
+        self, entry: AnswerCacheEntry, generations: dict | None = None
+    ) -> bool:
+        """generations memoizes the corpus generation per client while validating many entries"""
+        client = entry.client()
+        if client is None or entry.expires < time.monotonic():
+            return False
+        if generations is None:
+            return self.corpus.get(client) == entry.generation
+        if id(client) not in generations:
+            generations[id(client)] = self.corpus.get(client)
+        return generations[id(client)] == entry.generation
+
+    def remove(self, entry: AnswerCacheEntry):
+        self.entries.pop(id(entry), None)
+        for alias in entry.aliases:
+            if self.aliases.get(alias) is entry:
+                del self.aliases[alias]
+
+    def lookup(
+        self, client, scope: str, query: str, vector: list[float]
+    ) -> AnswerCacheEntry | None:
+        """Most similar valid entry above the threshold"""
+        candidates = []
+        generations = {}
+        for entry in list(self.entries.values()):
+            if not self.is_valid(entry, generations):
+                self.remove(entry)
+            elif entry.client() is client and entry.scope == scope:
+                candidates.append(entry)
+
+        if candidates:
+            norm = np.linalg.norm(vector)
+            query_vector = np.asarray(vector, dtype=np.float32) / (
+                norm if norm else 1.0
+            )
+            similarities = (
+                np.stack([entry.vector for entry in candidates]) @ query_vector
+            )
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                entry = candidates[best]
+                self.entries.move_to_end(id(entry))
+                self.add_alias(entry, query)
+                self.hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    def store(
+        self,
+        client,
+        scope: str,
+        query: str,
+        vector: list[float],
+        documents: list,
+        context: str,
+    ):
+        if client is None or not context:
+            return
+        entry = AnswerCacheEntry(
+            client,
+            scope,
+            vector,
+            documents,
+            context,
+            self.corpus.get(client),
+            time.monotonic() + self.ttl,
+        )
+        self.entries[id(entry)] = entry
+        self.add_alias(entry, query)
+        while len(self.entries) > self.max_entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.remove(evicted)
+
+    def add_alias(self, entry: AnswerCacheEntry, query: str):
+        alias = self.get_alias(query, entry.context)
+        entry.aliases.add(alias)
+        self.aliases[alias] = entry
+
+    def get_answer(self, query: str, context: str, generator: str) -> str | None:
+        entry = self.aliases.get(self.get_alias(query, context))
+        if entry is None or not self.is_valid(entry):
+            return None
+        answer = entry.answers.get(generator)
+        if answer is not None:
+            self.answer_hits += 1
+        return answer
+
+    def set_answer(self, query: str, context: str, generator: str, answer: str):
+        entry = self.aliases.get(self.get_alias(query, context))
+        if entry is not None and self.is_valid(entry):
+            entry.answers[generator] = answer
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "answer_hits": self.answer_hits,
+            "misses": self.misses,
+        }
+
+
+def create_answer_cache(corpus: CorpusVersions) -> SemanticAnswerCache | None:
+    """Semantic answer cache, enabled with VERBA_ANSWER_CACHE"""
+    if os.getenv("VERBA_ANSWER_CACHE", "false").lower() not in ["true", "1", "yes"]:
+        return None
+    return SemanticAnswerCache(
+        corpus,
+        threshold=float(os.getenv("VERBA_ANSWER_CACHE_THRESHOLD", 0.97)),
+        max_entries=get_int_setting("VERBA_ANSWER_CACHE_SIZE", 1000),
+        ttl=float(os.getenv("VERBA_ANSWER_CACHE_TTL", 86400)),
+    )
+
+
+class RetrievalCache:
+    """
+    Exact cache of retrieval results keyed by query and retrieval settings,
+    valid while the corpus generation of the deployment is unchanged.
+    """
+
+    def __init__(
+        self, corpus: CorpusVersions, max_entries: int = 1000, ttl: float = 300
+    ):
+        self.corpus = corpus
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[tuple[int, str], tuple] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, client, key: str) -> tuple[list, str] | None:
+        entry = self.entries.get((id(client), key))
+        if entry is not None:
+            client_ref, generation, expires, result = entry
+            if (
+                client_ref() is client
+                and generation == self.corpus.get(client)
+                and expires >= time.monotonic()
+            ):
+                self.entries.move_to_end((id(client), key))
+                self.hits += 1
+                return result
+            del self.entries[(id(client), key)]
+        self.misses += 1
+        return None
+
+    def set(self, client, key: str, result: tuple[list, str]):
+        if client is None:
+            return
+        self.entries[(id(client), key)] = (
+            weakref.ref(client),
+            self.corpus.get(client),
+            time.monotonic() + self.ttl,
+            result,
+        )
+        self.entries.move_to_end((id(client), key))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+def create_retrieval_cache(corpus: CorpusVersions) -> RetrievalCache | None:
+    """Retrieval result cache, sized with VERBA_RETRIEVAL_CACHE_SIZE (0 disables it)"""
+    max_entries = get_int_setting("VERBA_RETRIEVAL_CACHE_SIZE", 1000, minimum=0)
+    if max_entries <= 0:
+        return None
+    return RetrievalCache(
+        corpus,
+        max_entries=max_entries,
+        ttl=float(os.getenv("VERBA_RETRIEVAL_CACHE_TTL", 300)),
+    )
@@ -20,6 +20,10 @@ class Chunk:
         self.end_i = end_i
         self.content_without_overlap = content_without_overlap
         self.labels = []
+        # Page of paged documents (PDF) the chunk starts on, 0 if unknown
+        self.page = 0
+        # Tokens of the content, counted at ingest for context packing
+        self.tokens = 0
 
     def to_json(self) -> dict:
         """Convert the Chunk object to a dictionary."""
@@ -33,6 +37,8 @@ class Chunk:
             "end_i": self.end_i,
             "content_without_overlap": self.content_without_overlap,
             "labels": self.labels,
+            "page": self.page,
+            "tokens": self.tokens,
         }
 
     @classmethod
@@ -48,4 +54,6 @@ class Chunk:
             labels=data.get("labels", []),
         )
         chunk.doc_uuid = (data.get("doc_uuid", ""),)
+        chunk.page = data.get("page", 0)
+        chunk.tokens = data.get("tokens", 0)
         return chunk
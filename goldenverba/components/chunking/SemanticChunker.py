@@ -23,6 +23,7 @@ class SemanticChunker(Chunker):
         super().__init__()
         self.name = "Semantic"
         self.requires_library = ["sklearn"]
+        self.requires_embedder = True
         self.description = (
             "Split documents based on semantic similarity or max sentences"
         )
@@ -44,12 +44,12 @@ class SentenceChunker(Chunker):
 
         for document in documents:
 
-            doc = document.spacy_doc
-
             # Skip if document already contains chunks
             if len(document.chunks) > 0:
                 continue
 
+            doc = document.spacy_doc
+
             sentences = [sent.text for sent in doc.sents]
 
             # If Split Size is higher than actual Token Count or if Split Size is Zero
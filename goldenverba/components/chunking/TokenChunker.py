@@ -44,12 +44,12 @@ class TokenChunker(Chunker):
 
         for document in documents:
 
-            doc = document.spacy_doc
-
             # Skip if document already contains chunks
             if len(document.chunks) > 0:
                 continue
 
+            doc = document.spacy_doc
+
             # If Split Size is higher than actual Token Count or if Split Size is Zero
             if units > len(doc) or units == 0:
                 document.chunks.append(
@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import aiohttp
+from wasabi import msg
+
+from goldenverba.components.util import get_data_dir
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str | None:
+    """
+    Canonical form of an URL used to dedupe pages: lowercase scheme and host, no default port,
+    no fragment and sorted query parameters. Returns None for anything that isn't http(s).
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+
+    if ":" in host:
+        host = f"[{host}]"
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+class PageCache:
+    """
+    SQLite cache of HTTP validators (ETag and Last-Modified) and outgoing links per crawled URL,
+    so a re-crawl sends conditional requests and can follow the links of unchanged pages.
+    Entries are scoped, a page imported into one deployment or with one RAG config is still fetched for another.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(get_data_dir(), "crawl_cache.sqlite")
+        self.connection: sqlite3.Connection | None = None
+        self.lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS scoped_pages (scope TEXT NOT NULL, url TEXT NOT NULL, etag TEXT, last_modified TEXT, links TEXT, updated REAL NOT NULL, PRIMARY KEY (scope, url))"
+            )
+        return self.connection
+
+    def read(
+        self, scope: str, url: str
+    ) -> tuple[str | None, str | None, list[str] | None] | None:
+        with self.lock:
+            row = (
+                self.connect()
+                .execute(
+                    "SELECT etag, last_modified, links FROM scoped_pages WHERE scope = ? AND url = ?",
+                    (scope, url),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        etag, last_modified, links = row
+        return etag, last_modified, json.loads(links) if links is not None else None
+
+    def write(self, scope: str, pages: list["CrawledPage"]):
+        with self.lock:
+            connection = self.connect()
+            connection.executemany(
+                "INSERT OR REPLACE INTO scoped_pages (scope, url, etag, last_modified, links, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        scope,
+                        page.url,
+                        page.etag,
+                        page.last_modified,
+                        json.dumps(page.links) if page.links is not None else None,
+                        time.time(),
+                    )
+                    for page in pages
+                ],
+            )
+            connection.commit()
+
+    def delete(self, urls: list[str] | None):
+        with self.lock:
+            connection = self.connect()
+            if urls is None:
+                connection.execute("DELETE FROM scoped_pages")
+            else:
+                connection.executemany(
+                    "DELETE FROM scoped_pages WHERE url = ?", [(url,) for url in urls]
+                )
+            connection.commit()
+
+    async def get(self, scope: str, url: str):
+        """Cached (etag, last_modified, links) of an URL or None"""
+        return await asyncio.to_thread(self.read, scope, url)
+
+    async def set(self, scope: str, pages: list["CrawledPage"]):
+        await asyncio.to_thread(self.write, scope, pages)
+
+    async def forget(self, urls: list[str] | None = None):
+        """Drop the cached validators of the URLs in every scope (of every URL with None), so the next crawl fetches them fully"""
+        await asyncio.to_thread(self.delete, urls)
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+class CrawledPage:
+    """A page visited by the Crawler, html is None if the page didn't change since the last crawl"""
+
+    def __init__(self, url: str, depth: int, html: str | None):
+        self.url = url
+        self.depth = depth
+        self.html = html
+        self.etag: str | None = None
+        self.last_modified: str | None = None
+        self.links: list[str] | None = None
+
+
+class CrawlState:
+    """
+    Validators of one crawl, read from the PageCache in the scope of the import.
+    Fetched pages are only stored once their documents were imported, a failed import is fetched again next time.
+    """
+
+    def __init__(self, cache: PageCache, scope: str):
+        self.cache = cache
+        self.scope = scope
+        self.fetched: dict[str, CrawledPage] = {}
+        self.unchanged = 0
+
+    async def get(self, url: str):
+        """Cached (etag, last_modified, links) of an URL or None"""
+        return await self.cache.get(self.scope, url)
+
+    async def imported(self, urls: list[str]):
+        """Store the validators of the fetched pages whose documents were imported"""
+        pages = [self.fetched.pop(url) for url in urls if url in self.fetched]
+        if pages:
+            await self.cache.set(self.scope, pages)
+
+
+class Crawler:
+    """
+    Breadth-first crawler: a fixed number of workers fetch pages from a shared frontier.
+    Requests to the same host are spaced by the politeness delay, URLs are normalized and visited once,
+    and no more than max_pages pages are requested per crawl.
+    Pages are handed to on_page as they arrive. With a CrawlState, pages that didn't change
+    since the last crawl answer 304 and are skipped, their cached links are still followed.
+    Deleting the document of a page has to forget it in the PageCache, otherwise it's never imported again.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        extract_links,
+        concurrency: int = 8,
+        max_pages: int = 100,
+        max_depth: int = 0,
+        delay: float = 0.0,
+        state: CrawlState | None = None,
+    ):
+        self.session = session
+        self.extract_links = extract_links
+        self.concurrency = max(1, concurrency)
+        self.max_pages = max(1, max_pages)
+        self.max_depth = max(0, max_depth)
+        self.delay = max(0.0, delay)
+        self.state = state
+        self.seen: set[str] = set()
+        self.host_locks: dict[str, asyncio.Lock] = {}
+        self.next_request: dict[str, float] = {}
+
+    async def crawl(self, urls: list[str], on_page):
+        """Crawl from the given start URLs, on_page is awaited for every changed page"""
+        frontier = asyncio.Queue()
+        for url in urls:
+            self.enqueue(frontier, url, 0)
+
+        workers = [
+            asyncio.create_task(self.worker(frontier, on_page))
+            for _ in range(self.concurrency)
+        ]
+        try:
+            await frontier.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def enqueue(self, frontier: asyncio.Queue, url: str, depth: int):
+        normalized = normalize_url(url)
+        if normalized is None or normalized in self.seen:
+            return
+        if len(self.seen) >= self.max_pages:
+            return
+        self.seen.add(normalized)
+        frontier.put_nowait((normalized, depth))
+
+    async def worker(self, frontier: asyncio.Queue, on_page):
+        while True:
+            url, depth = await frontier.get()
+            try:
+                page = await self.visit(url, depth)
+                if page is not None:
+                    if page.html is not None:
+                        await on_page(page)
+                        if self.state is not None:
+                            # Only the validators are kept until the page was imported
+                            page.html = None
+                            self.state.fetched[page.url] = page
+                    for link in page.links or []:
+                        self.enqueue(frontier, link, depth + 1)
+            except Exception as e:
+                msg.warn(f"Failed to process URL {url}: {str(e)}")
+            finally:
+                frontier.task_done()
+
+    async def visit(self, url: str, depth: int) -> CrawledPage | None:
+        follow = depth < self.max_depth
+        cached = await self.state.get(url) if self.state is not None else None
+
+        headers = {}
+        # Without cached links an unchanged page couldn't be followed, so fetch it fully
+        if cached is not None and (cached[2] is not None or not follow):
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        await self.wait_for_host(urlsplit(url).netloc)
+        async with self.session.get(url, headers=headers) as response:
+            if response.status == 304 and headers:
+                self.state.unchanged += 1
+                page = CrawledPage(url, depth, None)
+                page.links = cached[2] if follow else None
+                return page
+
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "text/html")
+            if depth > 0 and not content_type.startswith(
+                ("text/html", "application/xhtml", "text/plain")
+            ):
+                # Linked files like images or PDFs aren't web pages
+                return None
+            page = CrawledPage(url, depth, await response.text())
+            page.etag = response.headers.get("ETag")
+            page.last_modified = response.headers.get("Last-Modified")
+            final_url = str(response.url)
+
+        if follow:
+            page.links = await asyncio.to_thread(
+                self.extract_links, page.html, final_url
+            )
+        return page
+
+    async def wait_for_host(self, host: str):
+        """Space the start of requests to the same host by the politeness delay"""
+        if self.delay == 0:
+            return
+        lock = self.host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            wait = self.next_request.get(host, 0.0) - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.next_request[host] = loop.time() + self.delay
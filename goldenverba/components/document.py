@@ -1,9 +1,11 @@
 from goldenverba.server.types import FileConfig
 from goldenverba.components.chunk import Chunk
+from goldenverba.components.util import count_tokens
 from spacy.tokens import Doc
 from spacy.language import Language
 import spacy
 import json
+from bisect import bisect_right
 
 from langdetect import detect
 
@@ -64,7 +66,30 @@ class Document:
         self.meta = meta
         self.metadata = metadata
         self.chunks: list[Chunk] = []
+        # Character offsets where each page starts, for paged files like PDFs
+        self.pages: list[int] = []
+        self._spacy_doc: Doc | None = None
+
+    @property
+    def spacy_doc(self) -> Doc:
+        """spaCy Doc of the content, only built when a chunker asks for it"""
+        if self._spacy_doc is None:
+            self._spacy_doc = self.create_spacy_doc(self.content)
+        return self._spacy_doc
+
+    @spacy_doc.setter
+    def spacy_doc(self, doc: Doc):
+        self._spacy_doc = doc
+
+    def __getstate__(self) -> dict:
+        # The spaCy Doc is rebuilt on demand, don't ship it between processes
+        state = self.__dict__.copy()
+        state["_spacy_doc"] = None
+        return state
 
+    @staticmethod
+    def create_spacy_doc(content: str) -> Doc:
+        """Detect the language of the content and process it with spaCy"""
         MAX_BATCH_SIZE = 500000
 
         if len(content) > MAX_BATCH_SIZE:
@@ -77,14 +102,12 @@ class Document:
                 docs.append(nlp(content[i : i + MAX_BATCH_SIZE]))
 
             # Merged all processed docs
-            doc = Doc.from_docs(docs)
+            return Doc.from_docs(docs)
         else:
             # Process smaller content, directly based on language
             detected_language = detect_language(content)
             nlp = load_nlp_for_language(detected_language)
-            doc = nlp(content)
-
-        self.spacy_doc = doc
+            return nlp(content)
 
     @staticmethod
     def to_json(document) -> dict:
@@ -130,6 +153,28 @@ class Document:
             return None
 
 
+def assign_pages(document: Document):
+    """Set the page of every chunk by locating it in the content of a paged document"""
+    if not document.pages:
+        return
+    cursor = 0
+    for chunk in document.chunks:
+        text = (chunk.content_without_overlap or chunk.content).strip()
+        position = document.content.find(text[:200], cursor) if text else -1
+        if position == -1:
+            # Chunkers that rewrite the text can't be located, keep the last position
+            position = cursor
+        cursor = position
+        chunk.page = bisect_right(document.pages, position)
+
+
+def assign_tokens(document: Document):
+    """Count the tokens of every chunk, stored with the chunk to budget the context"""
+    tokens = count_tokens([chunk.content for chunk in document.chunks])
+    for chunk, count in zip(document.chunks, tokens):
+        chunk.tokens = count
+
+
 def create_document(content: str, fileConfig: FileConfig) -> Document:
     """Create a Document object from the file content."""
     return Document(
@@ -1,10 +1,11 @@
 import os
 import requests
-import aiohttp
 import json
 
 from goldenverba.components.interfaces import Embedding
 from goldenverba.components.types import InputConfig
+from goldenverba.components.http_pool import http_pool
+from goldenverba.components.scheduler import get_rate_limit, raise_for_rate_limit
 from goldenverba.components.util import get_environment, get_token
 
 from wasabi import msg
@@ -20,6 +21,9 @@ class CohereEmbedder(Embedding):
         self.name = "Cohere"
         self.description = "Vectorizes documents and queries using Cohere"
         self.url = os.getenv("COHERE_BASE_URL", "https://api.cohere.com/v1")
+        self.max_batch_size = 96
+        self.requests_per_minute = get_rate_limit("COHERE_EMBED_RPM")
+        self.tokens_per_minute = get_rate_limit("COHERE_EMBED_TPM")
         models = get_models(self.url, get_token("COHERE_API_KEY", None), "embed")
 
         self.config["Model"] = InputConfig(
@@ -55,12 +59,13 @@ class CohereEmbedder(Embedding):
 
         all_embeddings = []
 
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session() as session:
             for chunk in chunks(content, 96):
                 data = {"texts": chunk, "model": model, "input_type": "search_document"}
                 async with session.post(
                     self.url + "/embed", data=json.dumps(data), headers=headers
                 ) as response:
+                    await raise_for_rate_limit(response)
                     response.raise_for_status()
                     response_data = await response.json()
                     embeddings = response_data.get("embeddings", [])
@@ -8,6 +8,12 @@ from wasabi import msg
 
 from goldenverba.components.interfaces import Embedding
 from goldenverba.components.types import InputConfig
+from goldenverba.components.http_pool import http_pool
+from goldenverba.components.scheduler import (
+    RetryableError,
+    get_rate_limit,
+    raise_for_rate_limit,
+)
 from goldenverba.components.util import get_environment, get_token
 
 
@@ -18,6 +24,8 @@ class OpenAIEmbedder(Embedding):
         super().__init__()
         self.name = "OpenAI"
         self.description = "Vectorizes documents and queries using OpenAI"
+        self.requests_per_minute = get_rate_limit("OPENAI_EMBED_RPM")
+        self.tokens_per_minute = get_rate_limit("OPENAI_EMBED_TPM")
 
         # If a different key is set for the OpenAI embedding, use it
         api_key = get_token("OPENAI_EMBED_API_KEY")
@@ -90,7 +98,7 @@ class OpenAIEmbedder(Embedding):
         payload_bytes = json.dumps(payload).encode("utf-8")
         payload_io = io.BytesIO(payload_bytes)
 
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session() as session:
             try:
                 async with session.post(
                     f"{base_url}/embeddings",
@@ -98,6 +106,7 @@ class OpenAIEmbedder(Embedding):
                     data=payload_io,
                     timeout=30,
                 ) as response:
+                    await raise_for_rate_limit(response)
                     response.raise_for_status()
                     data = await response.json()
 
@@ -112,9 +121,10 @@ class OpenAIEmbedder(Embedding):
 
                     return embeddings
 
+            except RetryableError:
+                raise
+
             except aiohttp.ClientError as e:
-                if isinstance(e, aiohttp.ClientResponseError) and e.status == 429:
-                    raise Exception("Rate limit exceeded. Waiting before retrying...")
                 raise Exception(f"API request failed: {str(e)}")
 
             except Exception as e:
@@ -1,5 +1,17 @@
+import os
+from concurrent.futures import Future
+
+from wasabi import msg
+
 from goldenverba.components.interfaces import Embedding
+from goldenverba.components.model_pool import (
+    BACKENDS,
+    BACKEND_DESCRIPTION,
+    ModelPool,
+    quantize_int8,
+)
 from goldenverba.components.types import InputConfig
+from goldenverba.components.util import get_int_setting
 
 try:
     from sentence_transformers import SentenceTransformer
@@ -7,6 +19,81 @@ except Exception as e:
     pass
 
 
+def create_model(model_name: str, backend: str):
+    """Load a SentenceTransformer model with the given backend"""
+    if backend == "ONNX":
+        return SentenceTransformer(model_name, backend="onnx", device="cpu")
+
+    model = SentenceTransformer(model_name)
+    if backend == "Torch int8":
+        model = quantize_int8(model.to("cpu"))
+    return model
+
+
+class SentenceTransformersEngine(ModelPool):
+    """
+    Keeps SentenceTransformer models loaded and encodes on dedicated threads.
+    """
+
+    kind = "SentenceTransformer"
+    thread_name_prefix = "verba-st"
+
+    def __init__(self, max_models: int | None = None, max_workers: int | None = None):
+        super().__init__(
+            max_models or get_int_setting("VERBA_ST_MAX_MODELS", 2),
+            max_workers or get_int_setting("VERBA_ST_WORKERS", 1),
+        )
+
+    def load_model(self, model_name: str, backend: str):
+        model = create_model(model_name, backend)
+        # First encode initializes kernels and allocations
+        model.encode(["warmup"])
+        return model
+
+    def encode(
+        self,
+        model_name: str,
+        backend: str,
+        content: list[str],
+        batch_size: int,
+        normalize: bool,
+    ) -> list[list[float]]:
+        model = self.get_model(model_name, backend)
+        embeddings = model.encode(
+            content,
+            batch_size=batch_size,
+            normalize_embeddings=normalize,
+            convert_to_numpy=True,
+        )
+        return embeddings.tolist()
+
+    def warmup(self, models: list[str], backend: str = "Torch") -> list[Future]:
+        """Load models in the background, e.g. on server startup"""
+        return [
+            self.submit(self.try_load, model_name, backend) for model_name in models
+        ]
+
+    def try_load(self, model_name: str, backend: str):
+        try:
+            self.get_model(model_name, backend)
+        except Exception as e:
+            msg.warn(f"Failed to warm up SentenceTransformer {model_name}: {str(e)}")
+
+
+engine = SentenceTransformersEngine()
+
+
+def warmup_sentence_transformers():
+    """Preload the models listed in VERBA_ST_WARMUP (comma separated)"""
+    models = [
+        model.strip()
+        for model in os.getenv("VERBA_ST_WARMUP", "").split(",")
+        if model.strip()
+    ]
+    if models:
+        engine.warmup(models, os.getenv("VERBA_ST_BACKEND", "Torch"))
+
+
 class SentenceTransformersEmbedder(Embedding):
     """
     SentenceTransformersEmbedder base class for Verba.
@@ -31,13 +118,34 @@ class SentenceTransformersEmbedder(Embedding):
                     "paraphrase-MiniLM-L6-v2",
                 ],
             ),
+            "Backend": InputConfig(
+                type="dropdown",
+                value=os.getenv("VERBA_ST_BACKEND", "Torch"),
+                description=BACKEND_DESCRIPTION,
+                values=BACKENDS,
+            ),
+            "Batch Size": InputConfig(
+                type="number",
+                value=32,
+                description="Number of texts encoded at once",
+                values=[],
+            ),
+            "Normalize": InputConfig(
+                type="bool",
+                value=False,
+                description="Normalize embeddings to unit length",
+                values=[],
+            ),
         }
 
     async def vectorize(self, config: dict, content: list[str]) -> list[float]:
         try:
             model_name = config.get("Model").value
-            model = SentenceTransformer(model_name)
-            embeddings = model.encode(content).tolist()
-            return embeddings
+            backend = self.get_option(config, "Backend")
+            batch_size = max(1, int(self.get_option(config, "Batch Size")))
+            normalize = bool(self.get_option(config, "Normalize"))
+            return await engine.run(
+                engine.encode, model_name, backend, content, batch_size, normalize
+            )
         except Exception as e:
             raise Exception(f"Failed to vectorize chunks: {str(e)}")
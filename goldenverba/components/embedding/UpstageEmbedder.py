@@ -8,6 +8,12 @@ from wasabi import msg
 
 from goldenverba.components.interfaces import Embedding
 from goldenverba.components.types import InputConfig
+from goldenverba.components.http_pool import http_pool
+from goldenverba.components.scheduler import (
+    RetryableError,
+    get_rate_limit,
+    raise_for_rate_limit,
+)
 from goldenverba.components.util import get_environment, get_token
 
 
@@ -21,6 +27,8 @@ class UpstageEmbedder(Embedding):
             "Vectorizes documents and queries using Upstage Solar Embeddings"
         )
         self.max_batch_size = 100
+        self.requests_per_minute = get_rate_limit("UPSTAGE_EMBED_RPM")
+        self.tokens_per_minute = get_rate_limit("UPSTAGE_EMBED_TPM")
 
         # Fetch available models
         api_key = get_token("UPSTAGE_API_KEY")
@@ -72,7 +80,7 @@ class UpstageEmbedder(Embedding):
         payload_bytes = json.dumps(payload).encode("utf-8")
         payload_io = io.BytesIO(payload_bytes)
 
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session() as session:
             try:
                 async with session.post(
                     f"{base_url}/embeddings",
@@ -80,6 +88,7 @@ class UpstageEmbedder(Embedding):
                     data=payload_io,
                     timeout=30,
                 ) as response:
+                    await raise_for_rate_limit(response)
                     response.raise_for_status()
                     data = await response.json()
 
@@ -94,9 +103,10 @@ class UpstageEmbedder(Embedding):
 
                     return embeddings
 
+            except RetryableError:
+                raise
+
             except aiohttp.ClientError as e:
-                if isinstance(e, aiohttp.ClientResponseError) and e.status == 429:
-                    raise Exception("Rate limit exceeded. Waiting before retrying...")
                 raise Exception(f"API request failed: {str(e)}")
 
             except Exception as e:
@@ -8,6 +8,12 @@ from wasabi import msg
 
 from goldenverba.components.interfaces import Embedding
 from goldenverba.components.types import InputConfig
+from goldenverba.components.http_pool import http_pool
+from goldenverba.components.scheduler import (
+    RetryableError,
+    get_rate_limit,
+    raise_for_rate_limit,
+)
 from goldenverba.components.util import get_environment
 
 
@@ -18,6 +24,8 @@ class VoyageAIEmbedder(Embedding):
         super().__init__()
         self.name = "VoyageAI"
         self.description = "Vectorizes documents and queries using VoyageAI"
+        self.requests_per_minute = get_rate_limit("VOYAGE_EMBED_RPM")
+        self.tokens_per_minute = get_rate_limit("VOYAGE_EMBED_TPM")
 
         # Fetch available models
         api_key = os.getenv("VOYAGE_API_KEY")
@@ -66,7 +74,7 @@ class VoyageAIEmbedder(Embedding):
         }
         payload = {"input": content, "model": model}
 
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session() as session:
             try:
                 async with session.post(
                     f"{base_url}/embeddings",
@@ -77,6 +85,7 @@ class VoyageAIEmbedder(Embedding):
                     if response.status == 400:
                         error_body = await response.text()
                         raise ValueError(f"Bad Request: {error_body}")
+                    await raise_for_rate_limit(response)
                     response.raise_for_status()
                     data = await response.json()
 
@@ -91,9 +100,10 @@ class VoyageAIEmbedder(Embedding):
 
                     return embeddings
 
+            except RetryableError:
+                raise
+
             except aiohttp.ClientError as e:
-                if isinstance(e, aiohttp.ClientResponseError) and e.status == 429:
-                    raise Exception("Rate limit exceeded. Waiting before retrying...")
                 raise Exception(f"API request failed: {str(e)}")
 
             except Exception as e:
@@ -0,0 +1,74 @@
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from wasabi import msg
+
+from goldenverba.components.util import get_int_setting
+
+
+def get_process_workers() -> int:
+    """Number of worker processes for CPU-bound ingestion work, 0 runs everything on the event loop"""
+    return get_int_setting(
+        "VERBA_PROCESS_WORKERS", min(4, os.cpu_count() or 1), minimum=0
+    )
+
+
+def run_async(func, *args, **kwargs):
+    """Run a coroutine function to completion inside a worker process"""
+    return asyncio.run(func(*args, **kwargs))
+
+
+class ProcessPoolManager:
+    """
+    Runs CPU-bound parsing, chunking and PCA in worker processes to keep the event loop responsive.
+    Functions and their arguments have to be picklable.
+    """
+
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = (
+            get_process_workers() if max_workers is None else max(0, max_workers)
+        )
+        self.executor: ProcessPoolExecutor | None = None
+
+    def get_executor(self) -> ProcessPoolExecutor | None:
+        if self.max_workers == 0:
+            return None
+        if self.executor is None:
+            msg.info(f"Starting process pool with {self.max_workers} workers")
+            # spawn avoids forking the running event loop and open connections
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self.executor
+
+    async def run(self, func, *args, **kwargs):
+        """Run a synchronous function in the process pool, or inline if the pool is disabled"""
+        executor = self.get_executor()
+        if executor is None:
+            return func(*args, **kwargs)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+        except BrokenProcessPool:
+            msg.fail("Process pool crashed, it will be restarted on the next call")
+            self.shutdown(wait=False)
+            raise
+
+    async def run_async(self, func, *args, **kwargs):
+        """Run a coroutine function in the process pool, or on the event loop if the pool is disabled"""
+        if self.get_executor() is None:
+            return await func(*args, **kwargs)
+        return await self.run(run_async, func, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=True)
+            self.executor = None
+
+
+process_pool = ProcessPoolManager()
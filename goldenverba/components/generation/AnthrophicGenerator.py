@@ -2,8 +2,8 @@ import os
 from dotenv import load_dotenv
 from goldenverba.components.interfaces import Generator
 from goldenverba.components.types import InputConfig
+from goldenverba.components.http_pool import http_pool
 from goldenverba.components.util import get_environment
-import aiohttp
 import json
 
 load_dotenv()
@@ -67,7 +67,7 @@ class AnthropicGenerator(Generator):
             "max_tokens": 4096,
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with http_pool.session() as session:
             async with session.post(
                 self.url,
                 json=data,
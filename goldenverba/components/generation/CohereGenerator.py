@@ -1,10 +1,10 @@
 import os
 import json
-import aiohttp
 from typing import List, Dict, AsyncGenerator
 
 from goldenverba.components.interfaces import Generator
 from goldenverba.components.types import InputConfig
+from goldenverba.components.http_pool import http_pool
 from goldenverba.components.embedding.CohereEmbedder import get_models
 from goldenverba.components.util import get_environment, get_token
 
@@ -74,7 +74,7 @@ class CohereGenerator(Generator):
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_pool.session() as session:
                 async with session.post(
                     self.url + "/chat", json=data, headers=headers
                 ) as response:
@@ -1,12 +1,12 @@
 import json
 import os
-import aiohttp
 from typing import Any, AsyncGenerator, List, Dict
 from wasabi import msg
 import requests
 
 from goldenverba.components.interfaces import Generator
 from goldenverba.components.types import InputConfig
+from goldenverba.components.http_pool import http_pool
 from goldenverba.components.util import get_environment
 
 GROQ_BASE_URL = "https://api.groq.com/openai/v1/"
@@ -88,7 +88,7 @@ class GroqGenerator(Generator):
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_pool.session() as session:
                 async with session.post(
                     self.url + "/chat/completions", json=data, headers=headers
                 ) as response:
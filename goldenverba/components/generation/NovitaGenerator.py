@@ -1,11 +1,11 @@
 import os
 from dotenv import load_dotenv
 import json
-import aiohttp
 import requests
 
 from goldenverba.components.interfaces import Generator
 from goldenverba.components.types import InputConfig
+from goldenverba.components.http_pool import http_pool
 from goldenverba.components.util import get_environment, get_token
 
 load_dotenv()
@@ -67,7 +67,7 @@ class NovitaGenerator(Generator):
             "stream": True,
         }
 
-        async with aiohttp.ClientSession() as client:
+        async with http_pool.session() as client:
             async with client.post(
                 url=f"{novita_url}/chat/completions",
                 json=data,
@@ -1,12 +1,12 @@
 import os
 import json
-import aiohttp
 from urllib.parse import urljoin
 from typing import List, Dict, AsyncGenerator
 
 from goldenverba.components.interfaces import Generator
 from goldenverba.components.embedding.OllamaEmbedder import get_models
 from goldenverba.components.types import InputConfig
+from goldenverba.components.http_pool import http_pool
 
 
 class OllamaGenerator(Generator):
@@ -46,7 +46,7 @@ class OllamaGenerator(Generator):
         data = {"model": model, "messages": messages}
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_pool.session() as session:
                 async with session.post(urljoin(self.url, "/api/chat"), json=data) as response:
                     async for line in response.content:
                         if line.strip():
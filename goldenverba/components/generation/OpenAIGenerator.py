@@ -2,9 +2,9 @@ import os
 from dotenv import load_dotenv
 from goldenverba.components.interfaces import Generator
 from goldenverba.components.types import InputConfig
+from goldenverba.components.http_pool import http_pool
 from goldenverba.components.util import get_environment, get_token
 from typing import List
-import httpx
 import json
 from wasabi import msg
 
@@ -77,7 +77,7 @@ class OpenAIGenerator(Generator):
             "stream": True,
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_pool.client() as client:
             async with client.stream(
                 "POST",
                 f"{openai_url}/chat/completions",
@@ -2,8 +2,8 @@ import os
 from dotenv import load_dotenv
 from goldenverba.components.interfaces import Generator
 from goldenverba.components.types import InputConfig
+from goldenverba.components.http_pool import http_pool
 from goldenverba.components.util import get_environment, get_token
-import httpx
 import json
 
 from goldenverba.components.interfaces import Generator
@@ -81,7 +81,7 @@ class UpstageGenerator(Generator):
             "stream": True,
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_pool.client() as client:
             async with client.stream(
                 "POST",
                 f"{base_url}/chat/completions",
@@ -0,0 +1,108 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiohttp
+import httpx
+from wasabi import msg
+
+from goldenverba.components.util import get_int_setting
+
+KEEPALIVE_TIMEOUT = 30
+DNS_CACHE_TTL = 300
+
+
+def use_http2() -> bool:
+    """HTTP/2 for httpx clients, enabled with VERBA_HTTP2 and only if h2 is installed"""
+    if os.getenv("VERBA_HTTP2", "false").lower() not in ["true", "1", "yes"]:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        msg.warn("VERBA_HTTP2 is set but h2 is not installed, falling back to HTTP/1.1")
+        return False
+    return True
+
+
+class HTTPClientPool:
+    """
+    Process-wide aiohttp session and httpx client shared by all embedders and generators,
+    so requests reuse kept-alive connections instead of paying a TCP and TLS handshake per batch or chat turn.
+    The clients are created by the FastAPI lifespan and bound to its event loop,
+    outside of it (scripts, tests, other loops) every use gets a short-lived client as before.
+    """
+
+    def __init__(
+        self,
+        max_connections: int | None = None,
+        max_connections_per_host: int | None = None,
+    ):
+        self.max_connections = max_connections or get_int_setting(
+            "VERBA_HTTP_MAX_CONNECTIONS", 100
+        )
+        self.max_connections_per_host = max_connections_per_host or get_int_setting(
+            "VERBA_HTTP_MAX_CONNECTIONS_PER_HOST", 20
+        )
+        self.aiohttp_session: aiohttp.ClientSession | None = None
+        self.httpx_client: httpx.AsyncClient | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+
+    def create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    def create_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections_per_host,
+            keepalive_expiry=KEEPALIVE_TIMEOUT,
+        )
+        return httpx.AsyncClient(limits=limits, http2=use_http2())
+
+    async def start(self):
+        """Create the shared clients on the running event loop"""
+        await self.close()
+        self.loop = asyncio.get_running_loop()
+        self.aiohttp_session = self.create_session()
+        self.httpx_client = self.create_client()
+        msg.info(
+            f"Started HTTP connection pool ({self.max_connections} connections, {self.max_connections_per_host} per host)"
+        )
+
+    def is_shared(self) -> bool:
+        return self.loop is not None and self.loop is asyncio.get_running_loop()
+
+    @asynccontextmanager
+    async def session(self):
+        """Yields an aiohttp.ClientSession, the shared one is not closed on exit"""
+        if self.is_shared() and not self.aiohttp_session.closed:
+            yield self.aiohttp_session
+            return
+        async with self.create_session() as session:
+            yield session
+
+    @asynccontextmanager
+    async def client(self):
+        """Yields an httpx.AsyncClient, the shared one is not closed on exit"""
+        if self.is_shared() and not self.httpx_client.is_closed:
+            yield self.httpx_client
+            return
+        async with self.create_client() as client:
+            yield client
+
+    async def close(self):
+        if self.aiohttp_session is not None:
+            await self.aiohttp_session.close()
+            self.aiohttp_session = None
+        if self.httpx_client is not None:
+            await self.httpx_client.aclose()
+            self.httpx_client = None
+        self.loop = None
+
+
+http_pool = HTTPClientPool()
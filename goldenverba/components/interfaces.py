@@ -1,6 +1,8 @@
 import os
+from typing import AsyncIterator
 
 from goldenverba.components.document import Document
+from goldenverba.components.crawler import PageCache
 from goldenverba.server.types import FileConfig
 from goldenverba.components.types import InputConfig
 
@@ -42,6 +44,12 @@ class VerbaComponent:
             "available": self.check_available(envs, libs),
         }
 
+    def get_option(self, config: dict, name: str):
+        """Value of an option, configs saved before the option existed fall back to its default"""
+        if name in config:
+            return config[name].value
+        return self.config[name].value
+
     def check_available(self, envs, libs) -> bool:
         if self.requires_env:
             for _env in self.requires_env:
@@ -54,6 +62,33 @@ class VerbaComponent:
         return True
 
 
+class SyncState:
+    """
+    Documents stored by a previous import of the same source, so a reader only loads what changed.
+    Titles the reader doesn't report as seen no longer exist in the source.
+    """
+
+    def __init__(self, stored: dict[str, tuple[str, dict]]):
+        # Title -> (document uuid, document meta)
+        self.stored = stored
+        self.seen: set[str] = set()
+        self.unchanged = 0
+
+    def changed(self, title: str, key: str, version: str) -> bool:
+        """Mark a title as seen, returns whether the stored meta[key] differs from version"""
+        self.seen.add(title)
+        if title in self.stored and self.stored[title][1].get(key) == version:
+            self.unchanged += 1
+            return False
+        return True
+
+    def removed(self) -> list[str]:
+        """UUIDs of stored documents that weren't seen"""
+        return [
+            uuid for title, (uuid, _) in self.stored.items() if title not in self.seen
+        ]
+
+
 class Reader(VerbaComponent):
     """
     Interface for Verba Readers.
@@ -71,6 +106,27 @@ class Reader(VerbaComponent):
         """
         raise NotImplementedError("load method must be implemented by a subclass.")
 
+    async def stream(
+        self, config: dict, fileConfig: FileConfig, **options
+    ) -> AsyncIterator[Document]:
+        """Yield the Verba Documents of fileConfig one by one, takes the same arguments as load.
+        Readers that load many documents override it, so an import only holds as many as the pipeline queues.
+        """
+        for document in await self.load(config, fileConfig, **options):
+            yield document
+
+    def get_sync_prefix(self, config: dict) -> str | None:
+        """Source prefix of the documents an incremental import keeps in sync, None if the reader doesn't sync.
+        Readers that sync accept a SyncState as the sync argument of load.
+        """
+        return None
+
+    def get_page_cache(self, config: dict | None = None) -> PageCache | None:
+        """Cache of crawled pages, None if the reader doesn't crawl with conditional requests.
+        Readers with a cache accept a CrawlState as the crawl argument of load.
+        """
+        return None
+
 
 class Embedding(VerbaComponent):
     """
@@ -80,6 +136,9 @@ class Embedding(VerbaComponent):
     def __init__(self):
         super().__init__()
         self.max_batch_size = 128
+        # Provider limits enforced by the EmbeddingScheduler, None means unlimited
+        self.requests_per_minute: int | None = None
+        self.tokens_per_minute: int | None = None
 
     async def vectorize(self, config: dict, content: list[str]) -> list[float]:
         """Embed verba documents and its chunks to Weaviate
@@ -98,6 +157,7 @@ class Chunker(VerbaComponent):
     def __init__(self):
         super().__init__()
         self.config = {}
+        self.requires_embedder = False
 
     async def chunk(
         self,
@@ -140,10 +200,23 @@ class Retriever(VerbaComponent):
         embedder,
         labels,
         document_uuids,
+        vectors=None,
+        max_tokens=None,
     ):
-
+        """
+        @parameter: vectors : dict[str, list[float]] | None - Query vectors of further embedding collections to search, keyed by embedder model
+        @parameter: max_tokens : int | None - Token budget of the returned context, what the generator's context_window leaves for it
+        """
         raise NotImplementedError("retrieve method must be implemented by a subclass.")
 
+    def requires_vector(self, config: dict) -> bool:
+        """Whether retrieve needs the query vector, if not the query isn't vectorized"""
+        return True
+
+    def get_fanout_timeout(self, config: dict) -> float | None:
+        """Per collection timeout in seconds if the collections of all embedders are searched, None for only the selected one"""
+        return None
+
 
 class Generator(VerbaComponent):
     """
@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+
+from goldenverba.components.document import Document
+from goldenverba.components.util import get_data_dir, get_document_uuid
+from goldenverba.server.types import FileConfig
+
+
+def get_document_key(document: Document) -> str:
+    """Identifies a document by title, source and content"""
+    content_hash = hashlib.sha256(document.content.encode("utf-8")).hexdigest()
+    return f"{get_document_uuid(document)}:{content_hash}"
+
+
+def get_import_fingerprint(fileConfig: FileConfig) -> str:
+    """Changes whenever the import settings change, so stale progress isn't reused"""
+    rag_config = {
+        key: component.model_dump() for key, component in fileConfig.rag_config.items()
+    }
+    return hashlib.sha256(
+        json.dumps(
+            [rag_config, fileConfig.labels, fileConfig.metadata], sort_keys=True
+        ).encode("utf-8")
+    ).hexdigest()
+
+
+class ImportJournal:
+    """
+    SQLite journal of import progress, so an interrupted import resumes instead of starting from scratch.
+    Imports are keyed by FileConfig.fileID, documents by title, source and content hash.
+    The journal of an import is removed once all of its documents were imported.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(get_data_dir(), "import_journal.sqlite")
+        self.connection: sqlite3.Connection | None = None
+        self.lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS imports (file_id TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS documents (file_id TEXT NOT NULL, document_key TEXT NOT NULL, title TEXT, stage TEXT NOT NULL, updated REAL NOT NULL, PRIMARY KEY (file_id, document_key))"
+            )
+        return self.connection
+
+    def execute(self, func, *args):
+        with self.lock:
+            connection = self.connect()
+            result = func(connection, *args)
+            connection.commit()
+            return result
+
+    @staticmethod
+    def _start(connection, file_id: str, fingerprint: str) -> dict[str, str]:
+        row = connection.execute(
+            "SELECT fingerprint FROM imports WHERE file_id = ?", (file_id,)
+        ).fetchone()
+        if row is not None and row[0] != fingerprint:
+            connection.execute("DELETE FROM documents WHERE file_id = ?", (file_id,))
+        connection.execute(
+            "INSERT OR REPLACE INTO imports (file_id, fingerprint, updated) VALUES (?, ?, ?)",
+            (file_id, fingerprint, time.time()),
+        )
+        rows = connection.execute(
+            "SELECT document_key, stage FROM documents WHERE file_id = ?", (file_id,)
+        ).fetchall()
+        return {document_key: stage for document_key, stage in rows}
+
+    @staticmethod
+    def _record(connection, file_id: str, document_key: str, title: str, stage: str):
+        connection.execute(
+            "INSERT OR REPLACE INTO documents (file_id, document_key, title, stage, updated) VALUES (?, ?, ?, ?, ?)",
+            (file_id, document_key, title, stage, time.time()),
+        )
+
+    @staticmethod
+    def _finish(connection, file_id: str):
+        connection.execute("DELETE FROM documents WHERE file_id = ?", (file_id,))
+        connection.execute("DELETE FROM imports WHERE file_id = ?", (file_id,))
+
+    async def start(self, fileConfig: FileConfig) -> dict[str, str]:
+        """Open the journal of an import, returns the last completed stage per document key"""
+        return await asyncio.to_thread(
+            self.execute,
+            self._start,
+            fileConfig.fileID,
+            get_import_fingerprint(fileConfig),
+        )
+
+    async def record(self, file_id: str, document_key: str, title: str, stage: str):
+        await asyncio.to_thread(
+            self.execute, self._record, file_id, document_key, title, stage
+        )
+
+    async def finish(self, file_id: str):
+        await asyncio.to_thread(self.execute, self._finish, file_id)
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+def create_import_journal() -> ImportJournal | None:
+    """Journal enabled with VERBA_IMPORT_JOURNAL (default true)"""
+    if os.getenv("VERBA_IMPORT_JOURNAL", "true").lower() in ["false", "0", "no"]:
+        return None
+    return ImportJournal()
@@ -3,27 +3,47 @@ from wasabi import msg
 import weaviate
 from weaviate.client import WeaviateAsyncClient
 from weaviate.auth import AuthApiKey
-from weaviate.classes.query import Filter, Sort, MetadataQuery
+from weaviate.classes.query import Filter, Sort, MetadataQuery, HybridFusion
 from weaviate.collections.classes.data import DataObject
 from weaviate.classes.aggregate import GroupByAggregate
 from weaviate.classes.init import AdditionalConfig, Timeout
+from weaviate.util import generate_uuid5
 
 import os
 import asyncio
 import json
 import re
 from datetime import datetime
+from typing import AsyncIterator
 
 from sklearn.decomposition import PCA
 
 
-from goldenverba.components.document import Document
+from goldenverba.components.document import Document, assign_pages, assign_tokens
 from goldenverba.components.interfaces import (
     Reader,
     Chunker,
     Embedding,
     Retriever,
     Generator,
+    SyncState,
+)
+from goldenverba.components.batching import BulkImporter
+from goldenverba.components.cache import (
+    CorpusVersions,
+    EmbeddingCache,
+    QueryCache,
+    get_cache_key,
+)
+from goldenverba.components.crawler import CrawlState
+from goldenverba.components.executor import process_pool
+from goldenverba.components.scheduler import EmbeddingScheduler
+from goldenverba.components.util import (
+    count_tokens,
+    get_chunk_uuid,
+    get_document_uuid,
+    get_int_setting,
+    reduce_to_3d,
 )
 from goldenverba.server.helpers import LoggerManager
 from goldenverba.server.types import FileConfig, FileStatus
@@ -158,12 +178,43 @@ else:
 ### ----------------------- ###
 
 
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Merge overlapping and adjacent inclusive ranges"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+# Properties of kept chunks that can change when a document is updated in place
+KEPT_CHUNK_PROPERTIES = [
+    "chunk_id",
+    "start_i",
+    "end_i",
+    "content_without_overlap",
+    "title",
+    "labels",
+    "page",
+    "tokens",
+    "pca",
+]
+
+# Message framing and the query template around every message sent to a generator
+MESSAGE_OVERHEAD_TOKENS = 16
+
+
 class WeaviateManager:
     def __init__(self):
         self.document_collection_name = "VERBA_DOCUMENTS"
         self.config_collection_name = "VERBA_CONFIGURATION"
         self.suggestion_collection_name = "VERBA_SUGGESTIONS"
         self.embedding_table = {}
+        self.cache_table = {}
+        # Invalidates cached query results whenever documents change
+        self.corpus = CorpusVersions()
 
     ### Connection Handling
 
@@ -325,14 +376,38 @@ class WeaviateManager:
         else:
             return True
 
+    async def get_populated_embeddings(
+        self, client: WeaviateAsyncClient, embedders: list[str]
+    ) -> list[str]:
+        """Embedders whose collection exists and holds chunks, without creating missing collections"""
+
+        async def has_chunks(embedder: str) -> bool:
+            collection_name = "VERBA_Embedding_" + re.sub(
+                r"[^a-zA-Z0-9]", "_", embedder
+            )
+            try:
+                if not await client.collections.exists(collection_name):
+                    return False
+                response = await client.collections.get(
+                    collection_name
+                ).aggregate.over_all(total_count=True)
+                self.embedding_table[embedder] = collection_name
+                return response.total_count > 0
+            except Exception as e:
+                msg.warn(f"Failed to count chunks of {embedder}: {str(e)}")
+                return False
+
+        populated = await asyncio.gather(
+            *[has_chunks(embedder) for embedder in embedders]
+        )
+        return [embedder for embedder, found in zip(embedders, populated) if found]
+
     async def verify_cache_collection(self, client: WeaviateAsyncClient, embedder):
-        if embedder not in self.embedding_table:
-            self.embedding_table[embedder] = "VERBA_Cache_" + re.sub(
+        if embedder not in self.cache_table:
+            self.cache_table[embedder] = "VERBA_Cache_" + re.sub(
                 r"[^a-zA-Z0-9]", "_", embedder
             )
-            return await self.verify_collection(client, self.embedding_table[embedder])
-        else:
-            return True
+        return await self.verify_collection(client, self.cache_table[embedder])
 
     async def verify_embedding_collections(
         self, client: WeaviateAsyncClient, environment_variables, libraries
@@ -401,10 +476,8 @@ class WeaviateManager:
             embedder_collection = client.collections.get(self.embedding_table[embedder])
 
             ### Import Document
-            document_obj = Document.to_json(document)
-            doc_uuid = await document_collection.data.insert(document_obj)
-
-            chunk_ids = []
+            # Deterministic UUIDs turn inserts into idempotent upserts, so retries are safe
+            doc_uuid = get_document_uuid(document)
 
             try:
                 for chunk in document.chunks:
@@ -412,38 +485,228 @@ class WeaviateManager:
                     chunk.labels = document.labels
                     chunk.title = document.title
 
+                document_response = await document_collection.data.insert_many(
+                    [DataObject(properties=Document.to_json(document), uuid=doc_uuid)]
+                )
+                if document_response.has_errors:
+                    raise Exception(
+                        f"Failed to ingest document into Weaviate: {document_response.errors}"
+                    )
+
                 chunk_response = await embedder_collection.data.insert_many(
                     [
-                        DataObject(properties=chunk.to_json(), vector=chunk.vector)
+                        DataObject(
+                            properties=chunk.to_json(),
+                            vector=chunk.vector,
+                            uuid=get_chunk_uuid(doc_uuid, chunk),
+                        )
                         for chunk in document.chunks
                     ]
                 )
-                chunk_ids = [
-                    chunk_response.uuids[uuid] for uuid in chunk_response.uuids
-                ]
-
                 if chunk_response.has_errors:
                     raise Exception(
                         f"Failed to ingest chunks into Weaviate: {chunk_response.errors}"
                     )
 
-                if doc_uuid and chunk_response:
-                    response = await embedder_collection.aggregate.over_all(
-                        filters=Filter.by_property("doc_uuid").equal(doc_uuid),
-                        total_count=True,
+            except Exception as e:
+                await self.rollback_document(client, doc_uuid, embedder)
+                raise Exception(f"Chunk import failed with : {str(e)}")
+
+            self.corpus.bump(client)
+            return doc_uuid
+
+    async def create_importer(
+        self, client: WeaviateAsyncClient, embedder: str
+    ) -> BulkImporter:
+        """Bulk ingestion of many documents into the document and embedding collections"""
+        if await self.verify_collection(
+            client, self.document_collection_name
+        ) and await self.verify_embedding_collection(client, embedder):
+            return BulkImporter(
+                client.collections.get(self.document_collection_name),
+                client.collections.get(self.embedding_table[embedder]),
+                on_write=lambda: self.corpus.bump(client),
+            )
+        raise Exception(f"Couldn't verify collections for {embedder}")
+
+    async def rollback_document(
+        self, client: WeaviateAsyncClient, uuid: str, embedder: str
+    ):
+        """Remove a partially imported document and its chunks"""
+        if await self.verify_embedding_collection(client, embedder):
+            document_collection = client.collections.get(self.document_collection_name)
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+            await document_collection.data.delete_by_id(uuid)
+            await embedder_collection.data.delete_many(
+                where=Filter.by_property("doc_uuid").equal(uuid)
+            )
+            self.corpus.bump(client)
+
+    async def get_stored_chunks(
+        self, client: WeaviateAsyncClient, uuid: str, embedder: str
+    ) -> tuple[str, list] | None:
+        """Returns the metadata and all chunks of a stored document, or None if it was embedded with another model"""
+        document = await self.get_document(
+            client, uuid, properties=["meta", "metadata"]
+        )
+        if document is None:
+            return None
+
+        embedding_config = json.loads(document.get("meta"))["Embedder"]
+        if embedding_config["config"]["Model"]["value"] != embedder:
+            return None
+
+        if await self.verify_embedding_collection(client, embedder):
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+            chunks = []
+            while True:
+                filters = Filter.by_property("doc_uuid").equal(uuid)
+                if chunks:
+                    filters = filters & Filter.by_property("chunk_id").greater_than(
+                        chunks[-1].properties["chunk_id"]
+                    )
+                response = await embedder_collection.query.fetch_objects(
+                    filters=filters,
+                    limit=1000,
+                    sort=Sort.by_property("chunk_id", ascending=True),
+                    return_properties=["content", *KEPT_CHUNK_PROPERTIES],
+                    include_vector=True,
+                )
+                chunks.extend(response.objects)
+                if len(response.objects) < 1000:
+                    break
+            return document.get("metadata", ""), chunks
+
+    async def update_document(
+        self,
+        client: WeaviateAsyncClient,
+        uuid: str,
+        document: Document,
+        embedder: str,
+        kept_chunks: dict,
+        removed_chunks: list[str],
+    ):
+        """Update a stored document in place
+        @parameter: kept_chunks : dict - Index in document.chunks to the stored chunk object with the same content
+        @parameter: removed_chunks : list[str] - UUIDs of stored chunks that no longer exist
+        """
+        if await self.verify_collection(
+            client, self.document_collection_name
+        ) and await self.verify_embedding_collection(client, embedder):
+            document_collection = client.collections.get(self.document_collection_name)
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+
+            for chunk in document.chunks:
+                chunk.doc_uuid = uuid
+                chunk.labels = document.labels
+                chunk.title = document.title
+
+            new_chunks = [
+                chunk for i, chunk in enumerate(document.chunks) if i not in kept_chunks
+            ]
+            new_uuids = [get_chunk_uuid(uuid, chunk) for chunk in new_chunks]
+            # A new chunk can have the UUID of a removed chunk, the insert overwrites that one
+            removed = {str(chunk_uuid) for chunk_uuid in removed_chunks}
+            overwritten = removed.intersection(new_uuids)
+            updated: list = []
+            semaphore = asyncio.Semaphore(16)
+
+            async def update_chunk(stored, properties: dict):
+                if all(
+                    stored.properties.get(key) == value
+                    for key, value in properties.items()
+                ):
+                    return
+                async with semaphore:
+                    await embedder_collection.data.update(
+                        uuid=stored.uuid, properties=properties
+                    )
+                updated.append(stored)
+
+            try:
+                if new_chunks:
+                    chunk_response = await embedder_collection.data.insert_many(
+                        [
+                            DataObject(
+                                properties=chunk.to_json(),
+                                vector=chunk.vector,
+                                uuid=chunk_uuid,
+                            )
+                            for chunk, chunk_uuid in zip(new_chunks, new_uuids)
+                        ]
                     )
-                    if response.total_count != len(document.chunks):
-                        await document_collection.data.delete_by_id(doc_uuid)
-                        for _id in chunk_ids:
-                            await embedder_collection.data.delete_by_id(_id)
+                    if chunk_response.has_errors:
                         raise Exception(
-                            f"Chunk Mismatch detected after importing: Imported:{response.total_count} | Existing: {len(document.chunks)}"
+                            f"Failed to ingest chunks into Weaviate: {chunk_response.errors}"
+                        )
+
+                # Kept chunks only need new positions, their vectors stay untouched
+                await asyncio.gather(
+                    *[
+                        update_chunk(
+                            stored,
+                            {
+                                key: getattr(document.chunks[i], key)
+                                for key in KEPT_CHUNK_PROPERTIES
+                            },
                         )
+                        for i, stored in kept_chunks.items()
+                    ]
+                )
+
+                await document_collection.data.update(
+                    uuid=uuid, properties=Document.to_json(document)
+                )
 
             except Exception as e:
-                if doc_uuid:
-                    await self.delete_document(client, doc_uuid)
-                raise Exception(f"Chunk import failed with : {str(e)}")
+                # Only undo this update, the stored document and its chunks stay as they were
+                await self.rollback_chunks(
+                    client,
+                    embedder,
+                    [
+                        chunk_uuid
+                        for chunk_uuid in new_uuids
+                        if chunk_uuid not in overwritten
+                    ],
+                    updated,
+                )
+                raise Exception(f"Chunk update failed with : {str(e)}")
+
+            self.corpus.bump(client)
+            removed = [
+                chunk_uuid
+                for chunk_uuid in removed_chunks
+                if str(chunk_uuid) not in overwritten
+            ]
+            if removed:
+                await embedder_collection.data.delete_many(
+                    where=Filter.by_id().contains_any(removed)
+                )
+
+    async def rollback_chunks(
+        self,
+        client: WeaviateAsyncClient,
+        embedder: str,
+        inserted: list[str],
+        updated: list,
+    ):
+        """Remove the chunks an update inserted and restore the stored properties of the chunks it changed"""
+        embedder_collection = client.collections.get(self.embedding_table[embedder])
+        try:
+            if inserted:
+                await embedder_collection.data.delete_many(
+                    where=Filter.by_id().contains_any(inserted)
+                )
+            for stored in updated:
+                await embedder_collection.data.update(
+                    uuid=stored.uuid,
+                    properties={
+                        key: stored.properties.get(key) for key in KEPT_CHUNK_PROPERTIES
+                    },
+                )
+        except Exception as e:
+            msg.warn(f"Failed to roll back chunk update: {str(e)}")
+        self.corpus.bump(client)
 
     ### Document CRUD
 
@@ -484,6 +747,7 @@ class WeaviateManager:
                     await embedder_collection.data.delete_many(
                         where=Filter.by_property("doc_uuid").equal(uuid)
                     )
+                    self.corpus.bump(client)
 
     async def delete_all_documents(self, client: WeaviateAsyncClient):
         if await self.verify_collection(client, self.document_collection_name):
@@ -502,6 +766,7 @@ class WeaviateManager:
         for collection in collection_payload["collections"]:
             if "VERBA" in collection["name"]:
                 await client.collections.delete(collection["name"])
+        self.corpus.bump(client)
 
     async def get_documents(
         self,
@@ -557,6 +822,44 @@ class WeaviateManager:
                 for doc in response.objects
             ], total_count
 
+    async def get_documents_by_source(
+        self, client: WeaviateAsyncClient, prefix: str
+    ) -> dict[str, tuple[str, dict]]:
+        """Documents whose source starts with prefix
+        @returns dict[str, tuple[str, dict]] - Title -> (uuid, meta)
+        """
+        stored = {}
+        if await self.verify_collection(client, self.document_collection_name):
+            document_collection = client.collections.get(self.document_collection_name)
+            # Offsets are capped by QUERY_MAXIMUM_RESULTS and the cursor can't be combined with filters,
+            # so the sources are scanned with the cursor and the meta is only fetched for the matches
+            titles = {}
+            after = None
+            while True:
+                response = await document_collection.query.fetch_objects(
+                    limit=1000, after=after, return_properties=["title", "source"]
+                )
+                for obj in response.objects:
+                    if (obj.properties.get("source") or "").startswith(prefix):
+                        titles[str(obj.uuid)] = obj.properties["title"]
+                if len(response.objects) < 1000:
+                    break
+                after = response.objects[-1].uuid
+
+            uuids = list(titles)
+            for i in range(0, len(uuids), 1000):
+                response = await document_collection.query.fetch_objects(
+                    filters=Filter.by_id().contains_any(uuids[i : i + 1000]),
+                    limit=1000,
+                    return_properties=["meta"],
+                )
+                for obj in response.objects:
+                    stored[titles[str(obj.uuid)]] = (
+                        str(obj.uuid),
+                        json.loads(obj.properties["meta"]),
+                    )
+        return stored
+
     async def get_document(
         self, client: WeaviateAsyncClient, uuid: str, properties: list[str] = None
     ) -> list[dict]:
@@ -572,6 +875,22 @@ class WeaviateManager:
                 msg.warn(f"Document not found ({uuid})")
                 return None
 
+    async def get_documents_by_ids(
+        self, client: WeaviateAsyncClient, uuids: list[str], properties: list[str]
+    ) -> dict[str, dict]:
+        """Properties of many documents in one query, missing documents are left out"""
+        if not uuids:
+            return {}
+        if await self.verify_collection(client, self.document_collection_name):
+            document_collection = client.collections.get(self.document_collection_name)
+            response = await document_collection.query.fetch_objects(
+                filters=Filter.by_id().contains_any(list(uuids)),
+                return_properties=properties,
+                limit=len(uuids),
+            )
+            return {str(item.uuid): item.properties for item in response.objects}
+        return {}
+
     ### Labels
 
     async def get_labels(self, client: WeaviateAsyncClient) -> list[str]:
@@ -758,6 +1077,27 @@ class WeaviateManager:
 
         return None
 
+    def get_chunk_filters(self, labels: list[str], document_uuids: list[str]):
+        filters = []
+
+        if labels:
+            filters.append(Filter.by_property("labels").contains_all(labels))
+
+        if document_uuids:
+            filters.append(Filter.by_property("doc_uuid").contains_any(document_uuids))
+
+        if filters:
+            apply_filters = filters[0]
+            for filter in filters[1:]:
+                apply_filters = apply_filters & filter
+            return apply_filters
+        return None
+
+    def get_limit(self, limit_mode: str, limit: int) -> dict:
+        if limit_mode == "Autocut":
+            return {"auto_limit": limit}
+        return {"limit": limit}
+
     async def hybrid_chunks(
         self,
         client: WeaviateAsyncClient,
@@ -768,46 +1108,74 @@ class WeaviateManager:
         limit: int,
         labels: list[str],
         document_uuids: list[str],
+        alpha: float = 0.5,
+        fusion_type: str = "Relative Score",
     ):
         if await self.verify_embedding_collection(client, embedder):
             embedder_collection = client.collections.get(self.embedding_table[embedder])
 
-            filters = []
+            chunks = await embedder_collection.query.hybrid(
+                query=query,
+                vector=vector,
+                alpha=alpha,
+                fusion_type=(
+                    HybridFusion.RANKED
+                    if fusion_type == "Ranked"
+                    else HybridFusion.RELATIVE_SCORE
+                ),
+                return_metadata=MetadataQuery(score=True, explain_score=False),
+                filters=self.get_chunk_filters(labels, document_uuids),
+                **self.get_limit(limit_mode, limit),
+            )
 
-            if labels:
-                filters.append(Filter.by_property("labels").contains_all(labels))
+            return chunks.objects
 
-            if document_uuids:
-                filters.append(
-                    Filter.by_property("doc_uuid").contains_any(document_uuids)
-                )
+    async def bm25_chunks(
+        self,
+        client: WeaviateAsyncClient,
+        embedder: str,
+        query: str,
+        limit_mode: str,
+        limit: int,
+        labels: list[str],
+        document_uuids: list[str],
+    ):
+        """Keyword search only, doesn't need a query vector"""
+        if await self.verify_embedding_collection(client, embedder):
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
 
-            if filters:
-                apply_filters = filters[0]
-                for filter in filters[1:]:
-                    apply_filters = apply_filters & filter
-            else:
-                apply_filters = None
+            chunks = await embedder_collection.query.bm25(
+                query=query,
+                return_metadata=MetadataQuery(score=True),
+                filters=self.get_chunk_filters(labels, document_uuids),
+                **self.get_limit(limit_mode, limit),
+            )
 
-            if limit_mode == "Autocut":
-                chunks = await embedder_collection.query.hybrid(
-                    query=query,
-                    vector=vector,
-                    alpha=0.5,
-                    auto_limit=limit,
-                    return_metadata=MetadataQuery(score=True, explain_score=False),
-                    filters=apply_filters,
-                )
-            else:
-                chunks = await embedder_collection.query.hybrid(
-                    query=query,
-                    vector=vector,
-                    alpha=0.5,
-                    limit=limit,
-                    return_metadata=MetadataQuery(score=True, explain_score=False),
-                    filters=apply_filters,
-                )
+            return chunks.objects
 
+    async def vector_chunks(
+        self,
+        client: WeaviateAsyncClient,
+        embedder: str,
+        vector: list[float],
+        limit_mode: str,
+        limit: int,
+        labels: list[str],
+        document_uuids: list[str],
+    ):
+        """Vector search only, chunks are scored by 1 - distance"""
+        if await self.verify_embedding_collection(client, embedder):
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+
+            chunks = await embedder_collection.query.near_vector(
+                near_vector=vector,
+                return_metadata=MetadataQuery(distance=True),
+                filters=self.get_chunk_filters(labels, document_uuids),
+                **self.get_limit(limit_mode, limit),
+            )
+
+            for chunk in chunks.objects:
+                chunk.metadata.score = 1 - (chunk.metadata.distance or 0)
             return chunks.objects
 
     async def get_chunk_by_ids(
@@ -828,6 +1196,61 @@ class WeaviateManager:
                 msg.fail(f"Failed to fetch chunks: {str(e)}")
                 raise e
 
+    async def get_chunks_by_pages(
+        self,
+        client: WeaviateAsyncClient,
+        embedder: str,
+        doc_uuid: str,
+        pages: list[int],
+    ):
+        """Chunks of a paged document (PDF) that start on the given pages"""
+        if await self.verify_embedding_collection(client, embedder):
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+            try:
+                weaviate_chunks = await embedder_collection.query.fetch_objects(
+                    filters=(
+                        Filter.by_property("doc_uuid").equal(str(doc_uuid))
+                        & Filter.by_property("page").contains_any(list(pages))
+                    ),
+                    limit=1000,
+                    sort=Sort.by_property("chunk_id", ascending=True),
+                )
+                return weaviate_chunks.objects
+            except Exception as e:
+                msg.fail(f"Failed to fetch chunks: {str(e)}")
+                raise e
+
+    async def get_chunks_by_ranges(
+        self,
+        client: WeaviateAsyncClient,
+        embedder: str,
+        ranges: dict[str, list[tuple[int, int]]],
+    ):
+        """Chunks of many documents in one query, ranges are inclusive chunk_id bounds per document UUID"""
+        filters = []
+        limit = 0
+        for doc_uuid, doc_ranges in ranges.items():
+            for start, end in merge_ranges(doc_ranges):
+                filters.append(
+                    Filter.by_property("doc_uuid").equal(str(doc_uuid))
+                    & Filter.by_property("chunk_id").greater_or_equal(start)
+                    & Filter.by_property("chunk_id").less_or_equal(end)
+                )
+                limit += end - start + 1
+        if not filters:
+            return []
+        if await self.verify_embedding_collection(client, embedder):
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+            try:
+                weaviate_chunks = await embedder_collection.query.fetch_objects(
+                    filters=Filter.any_of(filters),
+                    limit=limit,
+                )
+                return weaviate_chunks.objects
+            except Exception as e:
+                msg.fail(f"Failed to fetch chunks: {str(e)}")
+                raise e
+
     ### Suggestion Logic
 
     async def add_suggestion(self, client: WeaviateAsyncClient, query: str):
@@ -909,7 +1332,62 @@ class WeaviateManager:
 
     ### Cache Logic
 
-    # TODO: Implement Cache Logic
+    async def get_cached_embeddings(
+        self, client: WeaviateAsyncClient, embedder: str, keys: list[str]
+    ) -> dict[str, list[float]]:
+        if await self.verify_cache_collection(client, embedder):
+            cache_collection = client.collections.get(self.cache_table[embedder])
+            cached = {}
+            for i in range(0, len(keys), 1000):
+                batch = keys[i : i + 1000]
+                response = await cache_collection.query.fetch_objects(
+                    filters=Filter.by_id().contains_any(
+                        [generate_uuid5(key) for key in batch]
+                    ),
+                    limit=len(batch),
+                    include_vector=True,
+                    return_properties=["key"],
+                )
+                for item in response.objects:
+                    cached[item.properties["key"]] = item.vector["default"]
+            return cached
+        return {}
+
+    async def add_cached_embeddings(
+        self,
+        client: WeaviateAsyncClient,
+        embedder: str,
+        embeddings: dict[str, list[float]],
+        max_entries: int,
+    ):
+        if await self.verify_cache_collection(client, embedder):
+            cache_collection = client.collections.get(self.cache_table[embedder])
+            timestamp = datetime.now().isoformat()
+            response = await cache_collection.data.insert_many(
+                [
+                    DataObject(
+                        properties={"key": key, "timestamp": timestamp},
+                        vector=vector,
+                        uuid=generate_uuid5(key),
+                    )
+                    for key, vector in embeddings.items()
+                ]
+            )
+            if response.has_errors:
+                msg.warn(f"Failed to cache embeddings: {response.errors}")
+
+            total_count = await cache_collection.length()
+            if total_count > max_entries:
+                oldest = await cache_collection.query.fetch_objects(
+                    limit=total_count - int(max_entries * 0.9),
+                    sort=Sort.by_property("timestamp", ascending=True),
+                    return_properties=[],
+                )
+                await cache_collection.data.delete_many(
+                    where=Filter.by_id().contains_any(
+                        [item.uuid for item in oldest.objects]
+                    )
+                )
 
     ### Metadata Retrieval
 
@@ -955,22 +1433,48 @@ class ReaderManager:
         self.readers: dict[str, Reader] = {reader.name: reader for reader in readers}
 
     async def load(
-        self, reader: str, fileConfig: FileConfig, logger: LoggerManager
+        self,
+        reader: str,
+        fileConfig: FileConfig,
+        logger: LoggerManager,
+        sync: SyncState | None = None,
+        crawl: CrawlState | None = None,
     ) -> list[Document]:
+        return [
+            document
+            async for document in self.stream(reader, fileConfig, logger, sync, crawl)
+        ]
+
+    async def stream(
+        self,
+        reader: str,
+        fileConfig: FileConfig,
+        logger: LoggerManager,
+        sync: SyncState | None = None,
+        crawl: CrawlState | None = None,
+    ) -> AsyncIterator[Document]:
+        """Yield the documents of the reader as they are loaded"""
         try:
             loop = asyncio.get_running_loop()
             start_time = loop.time()
             if reader in self.readers:
                 config = fileConfig.rag_config["Reader"].components[reader].config
-                documents: list[Document] = await self.readers[reader].load(
-                    config, fileConfig
-                )
-                for document in documents:
+                options = {}
+                if sync is not None:
+                    options["sync"] = sync
+                if crawl is not None:
+                    options["crawl"] = crawl
+                count = 0
+                async for document in self.readers[reader].stream(
+                    config, fileConfig, **options
+                ):
                     document.meta["Reader"] = (
                         fileConfig.rag_config["Reader"].components[reader].model_dump()
                     )
+                    count += 1
+                    yield document
                 elapsed_time = round(loop.time() - start_time, 2)
-                if len(documents) == 1:
+                if count == 1:
                     await logger.send_report(
                         fileConfig.fileID,
                         FileStatus.LOADING,
@@ -981,13 +1485,12 @@ class ReaderManager:
                     await logger.send_report(
                         fileConfig.fileID,
                         FileStatus.LOADING,
-                        f"Loaded {fileConfig.filename} with {len(documents)} documents",
+                        f"Loaded {fileConfig.filename} with {count} documents",
                         took=elapsed_time,
                     )
                 await logger.send_report(
                     fileConfig.fileID, FileStatus.CHUNKING, "", took=0
                 )
-                return documents
             else:
                 raise Exception(f"{reader} Reader not found")
 
@@ -1017,13 +1520,22 @@ class ChunkerManager:
                 embedder_config = (
                     fileConfig.rag_config["Embedder"].components[embedder.name].config
                 )
-                chunked_documents = await self.chunkers[chunker].chunk(
-                    config=config,
-                    documents=documents,
-                    embedder=embedder,
-                    embedder_config=embedder_config,
-                )
+                if self.chunkers[chunker].requires_embedder:
+                    chunked_documents = await self.chunkers[chunker].chunk(
+                        config=config,
+                        documents=documents,
+                        embedder=embedder,
+                        embedder_config=embedder_config,
+                    )
+                else:
+                    chunked_documents = await process_pool.run_async(
+                        self.chunkers[chunker].chunk,
+                        config=config,
+                        documents=documents,
+                    )
                 for chunked_document in chunked_documents:
+                    assign_pages(chunked_document)
+                    assign_tokens(chunked_document)
                     chunked_document.meta["Chunker"] = (
                         fileConfig.rag_config["Chunker"]
                         .components[chunker]
@@ -1056,10 +1568,27 @@ class ChunkerManager:
 
 
 class EmbeddingManager:
-    def __init__(self):
+    def __init__(
+        self,
+        cache: EmbeddingCache | None = None,
+        query_cache: QueryCache | None = None,
+    ):
         self.embedders: dict[str, Embedding] = {
             embedder.name: embedder for embedder in embedders
         }
+        self.cache = cache
+        self.query_cache = query_cache
+        self.schedulers: dict[str, EmbeddingScheduler] = {}
+
+    def get_scheduler(self, embedder: str) -> EmbeddingScheduler:
+        """One scheduler per provider so limits are shared across concurrent imports"""
+        if embedder not in self.schedulers:
+            self.schedulers[embedder] = EmbeddingScheduler(
+                embedder,
+                requests_per_minute=self.embedders[embedder].requests_per_minute,
+                tokens_per_minute=self.embedders[embedder].tokens_per_minute,
+            )
+        return self.schedulers[embedder]
 
     async def vectorize(
         self,
@@ -1067,9 +1596,11 @@ class EmbeddingManager:
         fileConfig: FileConfig,
         documents: list[Document],
         logger: LoggerManager,
+        client=None,
     ) -> list[Document]:
         """Vectorizes chunks in batches
         @parameter: documents : Document - Verba document
+        @parameter: client : WeaviateAsyncClient - (Optional) Client for the Weaviate embedding cache
         @returns Document - Document with vectorized chunks
         """
         try:
@@ -1083,16 +1614,10 @@ class EmbeddingManager:
                         document.metadata + "\n" + chunk.content
                         for chunk in document.chunks
                     ]
-                    embeddings = await self.batch_vectorize(embedder, config, content)
-
-                    if len(embeddings) >= 3:
-                        pca = PCA(n_components=3)
-                        generated_pca_embeddings = pca.fit_transform(embeddings)
-                        pca_embeddings = [
-                            pca_.tolist() for pca_ in generated_pca_embeddings
-                        ]
-                    else:
-                        pca_embeddings = [embedding[0:3] for embedding in embeddings]
+                    embeddings = await self.batch_vectorize(
+                        embedder, config, content, client
+                    )
+                    pca_embeddings = await process_pool.run(reduce_to_3d, embeddings)
 
                     for vector, chunk, pca_ in zip(
                         embeddings, document.chunks, pca_embeddings
@@ -1123,19 +1648,37 @@ class EmbeddingManager:
             raise e
 
     async def batch_vectorize(
-        self, embedder: str, config: dict, content: list[str]
+        self, embedder: str, config: dict, content: list[str], client=None
     ) -> list[list[float]]:
-        """Vectorize content in batches"""
+        """Vectorize content in batches, only texts missing from the embedding cache are sent to the embedder"""
         try:
+            model = config["Model"].value if "Model" in config else embedder
+            keys = [get_cache_key(embedder, model, text) for text in content]
+            embeddings = await self.get_cached_embeddings(client, model, keys)
+
+            missing = {}
+            for key, text in zip(keys, content):
+                if key not in embeddings:
+                    missing[key] = text
+            missing_content = list(missing.values())
+
+            if not missing_content:
+                msg.info(f"Loaded all {len(content)} embeddings from cache")
+                return [embeddings[key] for key in keys]
+
             batches = [
-                content[i : i + self.embedders[embedder].max_batch_size]
-                for i in range(0, len(content), self.embedders[embedder].max_batch_size)
-            ]
-            msg.info(f"Vectorizing {len(content)} chunks in {len(batches)} batches")
-            tasks = [
-                self.embedders[embedder].vectorize(config, batch) for batch in batches
+                missing_content[i : i + self.embedders[embedder].max_batch_size]
+                for i in range(
+                    0, len(missing_content), self.embedders[embedder].max_batch_size
+                )
             ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            msg.info(
+                f"Vectorizing {len(missing_content)} chunks in {len(batches)} batches ({len(content) - len(missing_content)} cached)"
+            )
+            results = await self.get_scheduler(embedder).map(
+                lambda batch: self.embedders[embedder].vectorize(config, batch),
+                batches,
+            )
 
             # Check if all tasks were successful
             errors = [r for r in results if isinstance(r, Exception)]
@@ -1149,28 +1692,92 @@ class EmbeddingManager:
             flattened_results = [item for sublist in results for item in sublist]
 
             # Verify the number of vectors matches the input content
-            if len(flattened_results) != len(content):
+            if len(flattened_results) != len(missing_content):
                 raise Exception(
-                    f"Mismatch in vectorization results: expected {len(content)} vectors, got {len(flattened_results)}"
+                    f"Mismatch in vectorization results: expected {len(missing_content)} vectors, got {len(flattened_results)}"
                 )
 
-            return flattened_results
+            new_embeddings = dict(zip(missing.keys(), flattened_results))
+            await self.set_cached_embeddings(client, model, new_embeddings)
+            embeddings.update(new_embeddings)
+
+            return [embeddings[key] for key in keys]
         except Exception as e:
             raise Exception(f"Batch vectorization failed: {str(e)}")
 
+    async def get_cached_embeddings(
+        self, client, model: str, keys: list[str]
+    ) -> dict[str, list[float]]:
+        if self.cache is None:
+            return {}
+        try:
+            return await self.cache.get_many(client, model, list(dict.fromkeys(keys)))
+        except Exception as e:
+            msg.warn(f"Embedding cache lookup failed: {str(e)}")
+            return {}
+
+    async def set_cached_embeddings(
+        self, client, model: str, embeddings: dict[str, list[float]]
+    ):
+        if self.cache is None:
+            return
+        try:
+            await self.cache.set_many(client, model, embeddings)
+        except Exception as e:
+            msg.warn(f"Failed to store embeddings in cache: {str(e)}")
+
     async def vectorize_query(
         self, embedder: str, content: str, rag_config: dict
     ) -> list[float]:
         try:
             if embedder in self.embedders:
                 config = rag_config["Embedder"].components[embedder].config
-                embeddings = await self.embedders[embedder].vectorize(config, [content])
-                return embeddings[0]
+                if self.query_cache is None:
+                    embeddings = await self.embedders[embedder].vectorize(
+                        config, [content]
+                    )
+                    return embeddings[0]
+
+                model = config["Model"].value if "Model" in config else embedder
+                key = self.query_cache.get_key(embedder, model, content)
+                vector = await self.query_cache.lookup(key)
+                if vector is None:
+                    embeddings = await self.embedders[embedder].vectorize(
+                        config, [content]
+                    )
+                    vector = embeddings[0]
+                    await self.query_cache.store(key, vector)
+                return vector
             else:
                 raise Exception(f"{embedder} Embedder not found")
         except Exception as e:
             raise e
 
+    async def vectorize_queries(
+        self, embedders: list[str], content: str, rag_config: dict, timeout: float
+    ) -> dict[str, list[float]]:
+        """Vectorize the query for several embedders concurrently, embedders that fail or exceed the timeout are left out"""
+
+        async def vectorize(embedder: str):
+            try:
+                return await asyncio.wait_for(
+                    self.vectorize_query(embedder, content, rag_config), timeout
+                )
+            except asyncio.TimeoutError:
+                msg.warn(
+                    f"Vectorizing the query with {embedder} exceeded {int(timeout * 1000)}ms"
+                )
+            except Exception as e:
+                msg.warn(f"Failed to vectorize the query with {embedder}: {str(e)}")
+            return None
+
+        vectors = await asyncio.gather(*[vectorize(embedder) for embedder in embedders])
+        return {
+            embedder: vector
+            for embedder, vector in zip(embedders, vectors)
+            if vector is not None
+        }
+
 
 class RetrieverManager:
     def __init__(self):
@@ -1178,6 +1785,18 @@ class RetrieverManager:
             retriever.name: retriever for retriever in retrievers
         }
 
+    def get_fanout_timeout(self, retriever: str, rag_config: dict) -> float | None:
+        if retriever not in self.retrievers:
+            raise Exception(f"Retriever {retriever} not found")
+        config = rag_config["Retriever"].components[retriever].config
+        return self.retrievers[retriever].get_fanout_timeout(config)
+
+    def requires_vector(self, retriever: str, rag_config: dict) -> bool:
+        if retriever not in self.retrievers:
+            raise Exception(f"Retriever {retriever} not found")
+        config = rag_config["Retriever"].components[retriever].config
+        return self.retrievers[retriever].requires_vector(config)
+
     async def retrieve(
         self,
         client,
@@ -1188,6 +1807,8 @@ class RetrieverManager:
         weaviate_manager: WeaviateManager,
         labels: list[str],
         document_uuids: list[str],
+        vectors: dict[str, list[float]] | None = None,
+        max_tokens: int | None = None,
     ):
         try:
             if retriever not in self.retrievers:
@@ -1209,6 +1830,8 @@ class RetrieverManager:
                 embedder_model,
                 labels,
                 document_uuids,
+                vectors=vectors,
+                max_tokens=max_tokens,
             )
             return (documents, context)
 
@@ -1222,6 +1845,29 @@ class GeneratorManager:
             generator.name: generator for generator in generators
         }
 
+    def get_context_window(self, rag_config: dict) -> int | None:
+        """Token budget of the selected generator's context"""
+        generator = rag_config["Generator"].selected
+        if generator not in self.generators:
+            return None
+        return self.generators[generator].context_window
+
+    def get_context_budget(
+        self, rag_config: dict, query: str, conversation: list = []
+    ) -> int | None:
+        """Tokens left for the retrieved context after the system message, the conversation, the query and the answer"""
+        context_window = self.get_context_window(rag_config)
+        if context_window is None:
+            return None
+        generator = rag_config["Generator"].selected
+        config = rag_config["Generator"].components[generator].config
+        system_message = self.generators[generator].get_option(config, "System Message")
+        prompt = [system_message, query, *[item.content for item in conversation]]
+        overhead = MESSAGE_OVERHEAD_TOKENS * len(prompt)
+        prompt_tokens = sum(count_tokens(prompt)) + overhead
+        answer_tokens = get_int_setting("VERBA_ANSWER_TOKENS", 1024, minimum=0)
+        return max(0, context_window - prompt_tokens - answer_tokens)
+
     async def generate_stream(self, rag_config, query, context, conversation):
         """Generate a stream of response dicts based on a list of queries and list of contexts, and includes conversational context
         @parameter: queries : list[str] - List of queries
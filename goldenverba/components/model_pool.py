@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from wasabi import msg
+
+BACKENDS = ["Torch", "ONNX", "Torch int8"]
+BACKEND_DESCRIPTION = "ONNX needs goldenverba[onnx], Torch int8 quantizes the model for faster CPU inference"
+
+
+def quantize_int8(module):
+    """Dynamic int8 quantization of the linear layers, CPU only"""
+    import torch
+
+    return torch.quantization.quantize_dynamic(
+        module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+
+class ModelPool:
+    """
+    Keeps the least recently used local models loaded and runs inference on dedicated threads,
+    so models are loaded once instead of per call and inference doesn't block the event loop.
+    Subclasses implement load_model.
+    """
+
+    kind = "model"
+    thread_name_prefix = "verba-model"
+
+    def __init__(self, max_models: int, max_workers: int):
+        self.max_models = max_models
+        self.max_workers = max_workers
+        self.models: OrderedDict[tuple[str, str], object] = OrderedDict()
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.executor: ThreadPoolExecutor | None = None
+
+    def load_model(self, model_name: str, backend: str):
+        raise NotImplementedError(
+            "load_model method must be implemented by a subclass."
+        )
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=self.thread_name_prefix
+            )
+        return self.executor
+
+    def get_model(self, model_name: str, backend: str):
+        key = (model_name, backend)
+        with self.lock:
+            if key in self.models:
+                self.models.move_to_end(key)
+                return self.models[key]
+
+        # Loads are serialized so concurrent calls don't load the same model twice
+        with self.load_lock:
+            with self.lock:
+                if key in self.models:
+                    return self.models[key]
+            msg.info(f"Loading {self.kind} {model_name} ({backend})")
+            model = self.load_model(model_name, backend)
+            with self.lock:
+                self.models[key] = model
+                while len(self.models) > self.max_models:
+                    evicted, _ = self.models.popitem(last=False)
+                    msg.info(f"Unloaded {self.kind} {evicted[0]} ({evicted[1]})")
+        return model
+
+    def submit(self, func, *args) -> Future:
+        return self.get_executor().submit(func, *args)
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.get_executor(), func, *args)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        with self.lock:
+            self.models.clear()
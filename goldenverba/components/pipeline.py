@@ -0,0 +1,439 @@
+import os
+import asyncio
+import hashlib
+from copy import deepcopy
+from typing import AsyncIterator
+
+from wasabi import msg
+
+from goldenverba.components.document import Document
+from goldenverba.components.executor import process_pool
+from goldenverba.components.journal import ImportJournal, get_document_key
+from goldenverba.components.util import (
+    get_chunk_uuid,
+    get_int_setting,
+    reduce_to_3d,
+)
+from goldenverba.server.helpers import LoggerManager
+from goldenverba.server.types import FileConfig, FileStatus
+
+
+def get_chunk_hash(metadata: str, content: str) -> str:
+    """Hash of the exact text a chunk is embedded with"""
+    return hashlib.sha256((metadata + "\n" + content).encode("utf-8")).hexdigest()
+
+
+class ImportTask:
+    """A single document travelling through the import pipeline"""
+
+    def __init__(self, document: Document, fileConfig: FileConfig):
+        self.document = document
+        self.fileConfig = fileConfig
+        self.start_time = 0.0
+        self.chunk_count = 0
+        self.error: Exception | None = None
+        self.document_key = ""
+        self.skipped = False
+        # Set when an existing document is updated incrementally
+        self.existing_uuid: str | None = None
+        self.kept_chunks: dict = {}
+        self.removed_chunks: list[str] = []
+
+
+class ImportRun:
+    """State shared by all stages during one import"""
+
+    def __init__(self, client, logger: LoggerManager, importer=None, file_id: str = ""):
+        self.client = client
+        self.logger = logger
+        self.importer = importer
+        self.file_id = file_id
+        # Pending completions of documents handed to the importer, finished ones remove themselves
+        self.completions: set[asyncio.Task] = set()
+        # Last completed stage per document key from an interrupted import
+        self.completed: dict[str, str] = {}
+
+
+class ImportPipeline:
+    """
+    Streams documents through chunking, embedding and ingestion.
+    Every stage has its own workers connected by bounded queues, so one document is embedded while
+    the previous one is inserted, and only a limited number of chunked documents are held in memory.
+    New documents are written through one BulkImporter, so chunks of many documents share batches.
+    """
+
+    def __init__(
+        self,
+        manager,
+        concurrency: int | None = None,
+        queue_size: int | None = None,
+        journal: ImportJournal | None = None,
+    ):
+        self.manager = manager
+        self.journal = journal
+        self.concurrency = concurrency or get_int_setting("VERBA_IMPORT_CONCURRENCY", 4)
+        self.queue_size = queue_size or get_int_setting("VERBA_IMPORT_QUEUE_SIZE", 8)
+        self.incremental = os.getenv(
+            "VERBA_INCREMENTAL_OVERWRITE", "true"
+        ).lower() not in ["false", "0", "no"]
+
+    async def run(
+        self,
+        client,
+        documents: list[Document] | AsyncIterator[Document],
+        fileConfig: FileConfig,
+        logger: LoggerManager,
+    ) -> list[ImportTask]:
+        """Import all documents, returns one finished ImportTask per document.
+        Documents from an async iterator are only read as fast as the pipeline takes them.
+        """
+        chunk_queue = asyncio.Queue(maxsize=self.queue_size)
+        embed_queue = asyncio.Queue(maxsize=self.queue_size)
+        insert_queue = asyncio.Queue(maxsize=self.queue_size)
+        finished: list[ImportTask] = []
+        run = ImportRun(
+            client,
+            logger,
+            await self.manager.weaviate_manager.create_importer(
+                client, self.get_model(fileConfig)
+            ),
+            fileConfig.fileID,
+        )
+        if self.journal is not None:
+            run.completed = await self.journal.start(fileConfig)
+
+        stages = [
+            (self.chunk, chunk_queue, embed_queue),
+            (self.embed, embed_queue, insert_queue),
+            (self.insert, insert_queue, None),
+        ]
+        workers = [
+            asyncio.create_task(self.worker(stage, run, in_queue, out_queue, finished))
+            for stage, in_queue, out_queue in stages
+            for _ in range(self.concurrency)
+        ]
+
+        try:
+            if hasattr(documents, "__aiter__"):
+                async for document in documents:
+                    await self.feed(run, document, fileConfig, chunk_queue, finished)
+            else:
+                for document in documents:
+                    await self.feed(run, document, fileConfig, chunk_queue, finished)
+
+            # Each stage hands its items to the next one before marking them as done
+            for _, in_queue, _ in stages:
+                await in_queue.join()
+
+            await run.importer.flush()
+            await asyncio.gather(*list(run.completions))
+
+            if self.journal is not None and all(
+                task.error is None for task in finished
+            ):
+                await self.journal.finish(fileConfig.fileID)
+        finally:
+            pending = workers + list(run.completions)
+            for worker in pending:
+                worker.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return finished
+
+    async def worker(
+        self,
+        stage,
+        run: ImportRun,
+        in_queue: asyncio.Queue,
+        out_queue: asyncio.Queue | None,
+        finished: list[ImportTask],
+    ):
+        while True:
+            task: ImportTask = await in_queue.get()
+            try:
+                try:
+                    await stage(run, task)
+                except Exception as e:
+                    task.error = e
+                    await self.report_error(task, run.logger)
+
+                if out_queue is not None and task.error is None:
+                    await out_queue.put(task)
+                else:
+                    finished.append(task)
+            finally:
+                in_queue.task_done()
+
+    async def feed(
+        self,
+        run: ImportRun,
+        document: Document,
+        fileConfig: FileConfig,
+        chunk_queue: asyncio.Queue,
+        finished: list[ImportTask],
+    ):
+        task = await self.create_task(document, fileConfig, run.logger)
+        if self.journal is not None:
+            task.document_key = get_document_key(document)
+            if run.completed.get(task.document_key) == "inserted":
+                # Imported before the last import was interrupted
+                task.skipped = True
+                finished.append(task)
+                await run.logger.send_report(
+                    task.fileConfig.fileID,
+                    status=FileStatus.DONE,
+                    message=f"Skipped {task.fileConfig.filename}, it was already imported",
+                    took=0,
+                )
+                return
+            await self.record(run, task, "loaded")
+        await chunk_queue.put(task)
+
+    async def record(self, run: ImportRun, task: ImportTask, stage: str):
+        if self.journal is None:
+            return
+        try:
+            await self.journal.record(
+                run.file_id, task.document_key, task.document.title, stage
+            )
+        except Exception as e:
+            msg.warn(f"Failed to update import journal: {str(e)}")
+
+    async def create_task(
+        self, document: Document, fileConfig: FileConfig, logger: LoggerManager
+    ) -> ImportTask:
+        if fileConfig.isURL:
+            currentFileConfig = deepcopy(fileConfig)
+            currentFileConfig.fileID = fileConfig.fileID + document.title
+            currentFileConfig.isURL = False
+            currentFileConfig.filename = document.title
+            await logger.create_new_document(
+                fileConfig.fileID + document.title,
+                document.title,
+                fileConfig.fileID,
+            )
+        else:
+            currentFileConfig = fileConfig
+
+        task = ImportTask(document, currentFileConfig)
+        task.start_time = asyncio.get_running_loop().time()
+        return task
+
+    ### Stages
+
+    async def chunk(self, run: ImportRun, task: ImportTask):
+        fileConfig = task.fileConfig
+        weaviate_manager = self.manager.weaviate_manager
+
+        duplicate_uuid = await weaviate_manager.exist_document_name(
+            run.client, task.document.title
+        )
+        if duplicate_uuid is not None and run.completed.get(task.document_key) in [
+            "chunked",
+            "embedded",
+        ]:
+            # Written, or cleared for overwriting, by the interrupted import itself
+            await weaviate_manager.delete_document(run.client, duplicate_uuid)
+            duplicate_uuid = None
+
+        if duplicate_uuid is not None and not fileConfig.overwrite:
+            raise Exception(f"{task.document.title} already exists in Verba")
+        elif duplicate_uuid is not None and fileConfig.overwrite:
+            if self.incremental:
+                task.existing_uuid = duplicate_uuid
+            else:
+                await weaviate_manager.delete_document(run.client, duplicate_uuid)
+
+        embedder = fileConfig.rag_config["Embedder"].selected
+        chunked_documents = await self.manager.chunker_manager.chunk(
+            fileConfig.rag_config["Chunker"].selected,
+            fileConfig,
+            [task.document],
+            self.manager.embedder_manager.embedders[embedder],
+            run.logger,
+        )
+        task.document = chunked_documents[0]
+        task.chunk_count = len(task.document.chunks)
+
+        if task.existing_uuid is not None:
+            await self.compare_chunks(run.client, task)
+
+        await self.record(run, task, "chunked")
+
+    async def compare_chunks(self, client, task: ImportTask):
+        """Match new chunks with the stored ones by content hash so only changed chunks are embedded and inserted"""
+        weaviate_manager = self.manager.weaviate_manager
+        stored = await weaviate_manager.get_stored_chunks(
+            client, task.existing_uuid, self.get_model(task.fileConfig)
+        )
+        if stored is None:
+            # Stored with a different embedding model, nothing can be reused
+            await weaviate_manager.delete_document(client, task.existing_uuid)
+            task.existing_uuid = None
+            return
+
+        metadata, stored_chunks = stored
+        available: dict[str, list] = {}
+        for stored_chunk in stored_chunks:
+            available.setdefault(
+                get_chunk_hash(metadata, stored_chunk.properties["content"]), []
+            ).append(stored_chunk)
+
+        chunks = task.document.chunks
+        hashes = [get_chunk_hash(task.document.metadata, c.content) for c in chunks]
+
+        def keep(i: int, rule):
+            matches = available.get(hashes[i], [])
+            for j, stored_chunk in enumerate(matches):
+                if rule(stored_chunk):
+                    task.kept_chunks[i] = matches.pop(j)
+                    return
+
+        # A stored chunk whose UUID is the one a new chunk would be inserted with has to be kept
+        # by that chunk, otherwise the insert would overwrite it. Then prefer the same position.
+        new_uuids = [get_chunk_uuid(task.existing_uuid, chunk) for chunk in chunks]
+        for i in range(len(chunks)):
+            keep(i, lambda stored_chunk: str(stored_chunk.uuid) == new_uuids[i])
+        for i, chunk in enumerate(chunks):
+            if i not in task.kept_chunks:
+                keep(
+                    i,
+                    lambda stored_chunk: stored_chunk.properties["chunk_id"]
+                    == chunk.chunk_id,
+                )
+        for i in range(len(chunks)):
+            if i not in task.kept_chunks:
+                keep(i, lambda stored_chunk: True)
+
+        task.removed_chunks = [
+            stored_chunk.uuid
+            for matches in available.values()
+            for stored_chunk in matches
+        ]
+        msg.info(
+            f"Updating {task.document.title}: {task.chunk_count - len(task.kept_chunks)} new, {len(task.kept_chunks)} unchanged and {len(task.removed_chunks)} removed chunks"
+        )
+
+    async def embed(self, run: ImportRun, task: ImportTask):
+        chunks = task.document.chunks
+        if task.kept_chunks:
+            # Unchanged chunks keep their stored vectors
+            task.document.chunks = [
+                chunk for i, chunk in enumerate(chunks) if i not in task.kept_chunks
+            ]
+        try:
+            vectorized_documents = await self.manager.embedder_manager.vectorize(
+                task.fileConfig.rag_config["Embedder"].selected,
+                task.fileConfig,
+                [task.document],
+                run.logger,
+                run.client,
+            )
+        finally:
+            task.document.chunks = chunks
+        task.document = vectorized_documents[0]
+        if task.kept_chunks:
+            await self.project_chunks(task)
+        await self.record(run, task, "embedded")
+
+    async def project_chunks(self, task: ImportTask):
+        """Place kept and new chunks of an updated document in one PCA space for the vector viewer"""
+        chunks = task.document.chunks
+        if len(task.kept_chunks) == len(chunks) and not task.removed_chunks:
+            # Same vectors as stored, so the stored coordinates are still valid
+            for i, stored in task.kept_chunks.items():
+                chunks[i].pca = stored.properties.get("pca") or chunks[i].pca
+            return
+
+        vectors = [
+            (
+                task.kept_chunks[i].vector["default"]
+                if i in task.kept_chunks
+                else chunk.vector
+            )
+            for i, chunk in enumerate(chunks)
+        ]
+        for chunk, pca in zip(chunks, await process_pool.run(reduce_to_3d, vectors)):
+            chunk.pca = pca
+
+    async def insert(self, run: ImportRun, task: ImportTask):
+        if task.existing_uuid is not None:
+            await self.manager.weaviate_manager.update_document(
+                run.client,
+                task.existing_uuid,
+                task.document,
+                self.get_model(task.fileConfig),
+                task.kept_chunks,
+                task.removed_chunks,
+            )
+            self.release(task)
+            await self.record(run, task, "inserted")
+            await self.report_done(task, run.logger)
+        else:
+            doc_uuid, completion = await run.importer.add(task.document)
+            self.release(task)
+            completion_task = asyncio.create_task(
+                self.complete(run, task, doc_uuid, completion)
+            )
+            run.completions.add(completion_task)
+            completion_task.add_done_callback(run.completions.discard)
+
+    async def complete(
+        self, run: ImportRun, task: ImportTask, doc_uuid: str, completion
+    ):
+        """Wait until all objects of a document were written by the importer"""
+        try:
+            errors = await completion
+            if errors:
+                await self.manager.weaviate_manager.rollback_document(
+                    run.client, doc_uuid, self.get_model(task.fileConfig)
+                )
+                raise Exception(
+                    f"Failed to ingest {len(errors)} objects into Weaviate: {'; '.join(errors[:3])}"
+                )
+            await self.record(run, task, "inserted")
+            await self.report_done(task, run.logger)
+        except Exception as e:
+            task.error = e
+            await self.report_error(task, run.logger)
+
+    def release(self, task: ImportTask):
+        # Release chunks and vectors as soon as they are handed to Weaviate
+        task.document.chunks = []
+        task.document.spacy_doc = None
+        task.kept_chunks = {}
+
+    async def report_done(self, task: ImportTask, logger: LoggerManager):
+        fileConfig = task.fileConfig
+        loop = asyncio.get_running_loop()
+        await logger.send_report(
+            fileConfig.fileID,
+            status=FileStatus.INGESTING,
+            message=f"Imported {fileConfig.filename} into Weaviate",
+            took=round(loop.time() - task.start_time, 2),
+        )
+        await logger.send_report(
+            fileConfig.fileID,
+            status=FileStatus.DONE,
+            message=f"Import for {fileConfig.filename} completed successfully",
+            took=round(loop.time() - task.start_time, 2),
+        )
+
+    def get_model(self, fileConfig: FileConfig) -> str:
+        embedder = fileConfig.rag_config["Embedder"]
+        return embedder.components[embedder.selected].config["Model"].value
+
+    async def report_error(self, task: ImportTask, logger: LoggerManager):
+        loop = asyncio.get_running_loop()
+        task.error = Exception(
+            f"Import for {task.fileConfig.filename} failed: {str(task.error)}"
+        )
+        try:
+            await logger.send_report(
+                task.fileConfig.fileID,
+                status=FileStatus.ERROR,
+                message=str(task.error),
+                took=round(loop.time() - task.start_time, 2),
+            )
+        except Exception as e:
+            msg.fail(f"Failed to report import error: {str(e)}")
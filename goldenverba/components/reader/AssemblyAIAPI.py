@@ -1,5 +1,3 @@
-import base64
-import io
 import os
 
 import requests
@@ -10,7 +8,7 @@ import assemblyai as aai
 from goldenverba.components.document import Document, create_document
 from goldenverba.components.interfaces import Reader
 from goldenverba.server.types import FileConfig
-from goldenverba.components.util import get_environment
+from goldenverba.components.util import get_environment, open_file
 from goldenverba.components.types import InputConfig
 
 
@@ -109,7 +107,7 @@ class AssemblyAIReader(Reader):
         msg.info(f"Loading {fileConfig.filename}")
 
         file_data = aiohttp.FormData()
-        file_bytes = io.BytesIO(base64.b64decode(fileConfig.content))
+        file_bytes = open_file(fileConfig)
         file_data.add_field(
             "files",
             file_bytes,
@@ -135,3 +133,5 @@ class AssemblyAIReader(Reader):
             )
         except Exception as e:
             raise Exception(f"Failed to process {fileConfig.filename}: {str(e)}")
+        finally:
+            file_bytes.close()
@@ -1,13 +1,23 @@
-import base64
+import os
 import json
 import io
+import tempfile
 import csv
+import codecs
+from itertools import islice
+import asyncio
+from collections import deque
+from contextlib import contextmanager
 
 from wasabi import msg
 
 from goldenverba.components.document import Document, create_document
 from goldenverba.components.interfaces import Reader
+from goldenverba.components.types import InputConfig
+from goldenverba.components.executor import process_pool
+from goldenverba.components.util import get_file_source
 from goldenverba.server.types import FileConfig
+from goldenverba.server.helpers import get_upload_dir, remove_file
 
 # Optional imports with error handling
 try:
@@ -89,6 +99,26 @@ class BasicReader(Reader):
             ".h",
             ".hpp",
         ]  # Add supported text extensions
+        self.config = {
+            "PDF Mode": InputConfig(
+                type="dropdown",
+                value="Pages",
+                description="Pages extracts PDF pages in parallel worker processes and records the page of every chunk, Full Text extracts the whole file at once",
+                values=["Pages", "Full Text"],
+            ),
+            "Spreadsheet Split": InputConfig(
+                type="dropdown",
+                value="File",
+                description="Import CSV and Excel files as one document, one document per sheet or one document per number of rows",
+                values=["File", "Sheet", "Rows"],
+            ),
+            "Rows per Document": InputConfig(
+                type="number",
+                value=1000,
+                description="Number of rows per document when splitting spreadsheets by rows",
+                values=[],
+            ),
+        }
 
         # Initialize spaCy model if available
         self.nlp = spacy.blank("en") if spacy else None
@@ -102,22 +132,25 @@ class BasicReader(Reader):
         msg.info(f"Loading {fileConfig.filename} ({fileConfig.extension.lower()})")
 
         if fileConfig.extension != "":
-            decoded_bytes = base64.b64decode(fileConfig.content)
+            # Path of a spooled upload or the decoded base64 content
+            decoded_bytes = get_file_source(fileConfig)
 
         try:
-            if fileConfig.extension == "":
+            if fileConfig.extension == "" and fileConfig.file_path is not None:
+                file_content = await self.load_text_file(fileConfig.file_path)
+            elif fileConfig.extension == "":
                 file_content = fileConfig.content
             elif fileConfig.extension.lower() == "json":
                 return await self.load_json_file(decoded_bytes, fileConfig)
             elif fileConfig.extension.lower() == "pdf":
+                if self.get_option(config, "PDF Mode") == "Pages":
+                    return [await self.load_pdf_pages(decoded_bytes, fileConfig)]
                 file_content = await self.load_pdf_file(decoded_bytes)
             elif fileConfig.extension.lower() == "docx":
                 file_content = await self.load_docx_file(decoded_bytes)
-            elif fileConfig.extension.lower() == "csv":
-                file_content = await self.load_csv_file(decoded_bytes)
-            elif fileConfig.extension.lower() in ["xlsx", "xls"]:
-                file_content = await self.load_excel_file(
-                    decoded_bytes, fileConfig.extension.lower()
+            elif fileConfig.extension.lower() in ["csv", "xlsx", "xls"]:
+                return await self.load_spreadsheet(
+                    decoded_bytes, fileConfig.extension.lower(), config, fileConfig
                 )
             elif fileConfig.extension.lower() in [
                 ext.lstrip(".") for ext in self.extension
@@ -136,8 +169,9 @@ class BasicReader(Reader):
             msg.fail(f"Failed to load {fileConfig.filename}: {str(e)}")
             raise
 
-    async def load_text_file(self, decoded_bytes: bytes) -> str:
+    async def load_text_file(self, decoded_bytes: bytes | str) -> str:
         """Load and decode a text file."""
+        decoded_bytes = await read_source(decoded_bytes)
         try:
             return decoded_bytes.decode("utf-8")
         except UnicodeDecodeError:
@@ -145,9 +179,10 @@ class BasicReader(Reader):
             return decoded_bytes.decode("latin-1")
 
     async def load_json_file(
-        self, decoded_bytes: bytes, fileConfig: FileConfig
+        self, decoded_bytes: bytes | str, fileConfig: FileConfig
     ) -> list[Document]:
         """Load and parse a JSON file."""
+        decoded_bytes = await read_source(decoded_bytes)
         try:
             json_obj = json.loads(decoded_bytes.decode("utf-8"))
             document = Document.from_json(json_obj, self.nlp)
@@ -159,167 +194,358 @@ class BasicReader(Reader):
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in {fileConfig.filename}: {str(e)}")
 
-    async def load_pdf_file(self, decoded_bytes: bytes) -> str:
+    async def load_pdf_file(self, decoded_bytes: bytes | str) -> str:
         """Load and extract text from a PDF file."""
-        if not PdfReader:
-            raise ImportError("pypdf is not installed. Cannot process PDF files.")
-        pdf_bytes = io.BytesIO(decoded_bytes)
-        reader = PdfReader(pdf_bytes)
-        return "\n\n".join(page.extract_text() for page in reader.pages)
-
-    async def load_docx_file(self, decoded_bytes: bytes) -> str:
+        return await process_pool.run(extract_pdf_text, decoded_bytes)
+
+    async def load_pdf_pages(
+        self, decoded_bytes: bytes | str, fileConfig: FileConfig
+    ) -> Document:
+        """Extract PDF pages in parallel and keep track of where each page starts."""
+        pages = []
+        offset = 0
+        page_offsets = []
+        async for page_text in iter_pdf_pages(decoded_bytes):
+            page_offsets.append(offset)
+            pages.append(page_text)
+            offset += len(page_text) + 2
+        document = create_document("\n\n".join(pages), fileConfig)
+        document.pages = page_offsets
+        document.meta["pages"] = len(page_offsets)
+        return document
+
+    async def load_docx_file(self, decoded_bytes: bytes | str) -> str:
         """Load and extract text from a DOCX file."""
-        if not docx:
-            raise ImportError(
-                "python-docx is not installed. Cannot process DOCX files."
-            )
-        docx_bytes = io.BytesIO(decoded_bytes)
-        reader = docx.Document(docx_bytes)
-        return "\n".join(paragraph.text for paragraph in reader.paragraphs)
+        return await process_pool.run(extract_docx_text, decoded_bytes)
 
-    async def load_csv_file(self, decoded_bytes: bytes) -> str:
+    async def load_csv_file(self, decoded_bytes: bytes | str) -> str:
         """Load and convert CSV file to readable text format."""
-        try:
-            # Try UTF-8 first, fallback to latin-1
-            try:
-                text_content = decoded_bytes.decode("utf-8")
-            except UnicodeDecodeError:
-                text_content = decoded_bytes.decode("latin-1")
-
-            csv_reader = csv.reader(io.StringIO(text_content))
-            rows = list(csv_reader)
-
-            if not rows:
-                return "Empty CSV file"
-
-            # Format as a readable table
-            result = []
-            headers = rows[0] if rows else []
-
-            # Add headers
-            if headers:
-                result.append("Headers: " + " | ".join(headers))
-                result.append(" \n\n")
-
-            # Add data rows
-            for i, row in enumerate(rows[1:], 1):
-                if len(row) == len(headers):
-                    row_data = []
-                    for header, value in zip(headers, row):
-                        row_data.append(f"{header}: {value}")
-                    result.append(f"Row {i}: {' | '.join(row_data)}")
-                else:
-                    # Handle rows with different column counts
-                    result.append(f"Row {i}: {' | '.join(row)}")
-                result.append(" \n\n")
-            return "\n".join(result)
-
-        except Exception as e:
-            raise ValueError(f"Error reading CSV file: {str(e)}")
+        return await process_pool.run(render_csv, decoded_bytes)
 
-    async def load_excel_file(self, decoded_bytes: bytes, extension: str) -> str:
+    async def load_excel_file(self, decoded_bytes: bytes | str, extension: str) -> str:
         """Load and convert Excel file to readable text format."""
-        if not pd and not openpyxl:
-            raise ImportError("pandas or openpyxl is required to process Excel files.")
-
-        try:
-            excel_bytes = io.BytesIO(decoded_bytes)
-
-            # Use pandas if available for better support
-            if pd:
-                # Read all sheets
-                if extension == "xlsx":
-                    sheets_dict = pd.read_excel(
-                        excel_bytes, sheet_name=None, engine="openpyxl"
-                    )
-                else:  # xls
-                    try:
-                        sheets_dict = pd.read_excel(
-                            excel_bytes, sheet_name=None, engine="xlrd"
-                        )
-                    except Exception as e:
-                        # Try auto engine detection as fallback
-                        try:
-                            sheets_dict = pd.read_excel(
-                                excel_bytes, sheet_name=None, engine=None
-                            )
-                        except Exception:
-                            raise ImportError(
-                                f"Cannot read .xls file. Please install 'xlrd' for .xls support: pip install xlrd. "
-                                f"Original error: {str(e)}"
-                            )
-
-                result = []
-
-                for sheet_name, df in sheets_dict.items():
-                    result.append(f"\nSheet: {sheet_name}")
-
-                    if df.empty:
-                        result.append("(Empty sheet)")
-                        continue
-
-                    result.append(" \n\n")
-
-                    # Add column headers
-                    headers = df.columns.tolist()
-                    result.append("Headers: " + " | ".join(str(h) for h in headers))
-                    result.append(" \n\n")
-
-                    for idx, (_, row) in enumerate(df.iterrows()):
-                        row_data = []
-                        for header, value in zip(headers, row):
-                            # Handle NaN values
-                            display_value = str(value) if pd.notna(value) else ""
-                            row_data.append(f"{header}: {display_value}")
-                        result.append(f"Row {idx + 1}: {' | '.join(row_data)}")
-                        result.append(" \n\n")
-
-                return "\n".join(result)
-
-            else:
-                # Fallback to openpyxl for basic reading
-                if extension != "xlsx":
-                    raise ImportError(
-                        "openpyxl only supports .xlsx files. Please install pandas for .xls support."
-                    )
-
-                from openpyxl import load_workbook
-
-                workbook = load_workbook(excel_bytes, data_only=True)
-
-                result = []
-
-                for sheet_name in workbook.sheetnames:
-                    sheet = workbook[sheet_name]
-                    result.append(f"\nSheet: {sheet_name}")
-                    result.append(" \n\n")
+        return await process_pool.run(render_excel, decoded_bytes, extension)
+
+    async def load_spreadsheet(
+        self,
+        decoded_bytes: bytes | str,
+        extension: str,
+        config: dict,
+        fileConfig: FileConfig,
+    ) -> list[Document]:
+        """Load a CSV or Excel file as one document per file, sheet or number of rows."""
+        split = self.get_option(config, "Spreadsheet Split")
+        rows_per_document = int(self.get_option(config, "Rows per Document"))
+        parts = await process_pool.run(
+            render_spreadsheet, decoded_bytes, extension, split, rows_per_document
+        )
+        documents = []
+        for name, content in parts:
+            document = create_document(content, fileConfig)
+            if name:
+                document.title = f"{fileConfig.filename} ({name})"
+            documents.append(document)
+        return documents
+
+
+# Parsing functions are module level so they can run in the process pool.
+# They receive either the file bytes or the path of a spooled upload.
+
+
+async def read_source(source: bytes | str) -> bytes:
+    if isinstance(source, str):
+        with open(source, "rb") as file:
+            return await asyncio.to_thread(file.read)
+    return source
+
+
+def as_file(source: bytes | str):
+    """File path or in-memory file object accepted by the parsing libraries"""
+    return source if isinstance(source, str) else io.BytesIO(source)
+
+
+def extract_pdf_text(decoded_bytes: bytes | str) -> str:
+    """Extract text from a PDF file."""
+    if not PdfReader:
+        raise ImportError("pypdf is not installed. Cannot process PDF files.")
+    pdf_bytes = as_file(decoded_bytes)
+    reader = PdfReader(pdf_bytes)
+    return "\n\n".join(page.extract_text() for page in reader.pages)
+
+
+PDF_PAGES_PER_TASK = 25
+
+
+@contextmanager
+def spool_source(source: bytes | str, suffix: str = ""):
+    """Path of the file, in-memory bytes are written to a temporary file once so worker processes don't each receive a copy"""
+    if isinstance(source, str) or process_pool.max_workers == 0:
+        yield source
+        return
+    file_descriptor, path = tempfile.mkstemp(
+        dir=get_upload_dir(), prefix="spool_", suffix=suffix
+    )
+    try:
+        with os.fdopen(file_descriptor, "wb") as file:
+            file.write(source)
+        yield path
+    finally:
+        remove_file(path)
+
+
+async def iter_pdf_pages(source: bytes | str):
+    """Yield the text of every PDF page in order, while page ranges are extracted in parallel worker processes."""
+    with spool_source(source, ".pdf") as path:
+        async for page_text in iter_pdf_page_ranges(path):
+            yield page_text
+
+
+async def iter_pdf_page_ranges(source: bytes | str):
+    page_count = await process_pool.run(count_pdf_pages, source)
+    max_in_flight = max(1, process_pool.max_workers) * 2
+    pending = deque()
+    try:
+        for start in range(0, page_count, PDF_PAGES_PER_TASK):
+            end = min(start + PDF_PAGES_PER_TASK, page_count)
+            pending.append(
+                asyncio.ensure_future(
+                    process_pool.run(extract_pdf_pages, source, start, end)
+                )
+            )
+            if len(pending) >= max_in_flight:
+                for page_text in await pending.popleft():
+                    yield page_text
+        while pending:
+            for page_text in await pending.popleft():
+                yield page_text
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def count_pdf_pages(decoded_bytes: bytes | str) -> int:
+    if not PdfReader:
+        raise ImportError("pypdf is not installed. Cannot process PDF files.")
+    return len(PdfReader(as_file(decoded_bytes)).pages)
+
+
+def extract_pdf_pages(decoded_bytes: bytes | str, start: int, end: int) -> list[str]:
+    """Extract the text of the pages from start to end (exclusive)."""
+    if not PdfReader:
+        raise ImportError("pypdf is not installed. Cannot process PDF files.")
+    reader = PdfReader(as_file(decoded_bytes))
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def extract_docx_text(decoded_bytes: bytes | str) -> str:
+    """Extract text from a DOCX file."""
+    if not docx:
+        raise ImportError("python-docx is not installed. Cannot process DOCX files.")
+    docx_bytes = as_file(decoded_bytes)
+    reader = docx.Document(docx_bytes)
+    return "\n".join(paragraph.text for paragraph in reader.paragraphs)
+
+
+SPREADSHEET_CHUNK_ROWS = 10000
+ROW_SEPARATOR = "\n \n\n\n"
+
+
+def render_spreadsheet(
+    decoded_bytes: bytes | str,
+    extension: str,
+    split: str = "File",
+    rows_per_document: int = 1000,
+) -> list[tuple[str, str]]:
+    """Render a CSV or Excel file to text, split into one part per file, sheet or number of rows.
+    Rows are read in chunks and rendered column by column.
+    @returns list[tuple[str, str]] - Name and text of every part, the name is empty for the whole file
+    """
+    rows_per_document = max(1, int(rows_per_document))
+    chunk_rows = max(
+        rows_per_document,
+        SPREADSHEET_CHUNK_ROWS // rows_per_document * rows_per_document,
+    )
+    if extension == "csv":
+        frames = iter_csv_frames(decoded_bytes, chunk_rows)
+    else:
+        frames = iter_excel_frames(decoded_bytes, extension, chunk_rows)
+
+    parts: list[tuple[str, list[str]]] = []
+    current_sheet = None
+    for sheet_name, headers, start, frame in frames:
+        header = [f"\nSheet: {sheet_name}"] if extension != "csv" else []
+        if frame is None:
+            header.append("Empty CSV file" if extension == "csv" else "(Empty sheet)")
+        else:
+            header.append("Headers: " + " | ".join(headers))
+        lines = render_rows(headers, start, frame) if frame is not None else []
+
+        if split == "Rows" and lines:
+            for offset in range(0, len(lines), rows_per_document):
+                group = lines[offset : offset + rows_per_document]
+                name = f"rows {start + offset + 1}-{start + offset + len(group)}"
+                name = f"{sheet_name} {name}" if sheet_name else name
+                parts.append((name, header + group))
+        else:
+            if sheet_name != current_sheet:
+                if split != "File" or not parts:
+                    parts.append(("" if split == "File" else sheet_name, []))
+                parts[-1][1].extend(header)
+            parts[-1][1].extend(lines)
+        current_sheet = sheet_name
+
+    return [(name, ROW_SEPARATOR.join(texts)) for name, texts in parts]
+
+
+def render_rows(headers: list[str], start: int, frame) -> list[str]:
+    """Render rows as 'Row n: header: value | ...', vectorized per column with pandas"""
+    if pd is not None and isinstance(frame, pd.DataFrame):
+        names = [
+            headers[i] if i < len(headers) else f"Column {i + 1}"
+            for i in range(frame.shape[1])
+        ]
+        columns = [f"{name}: " + frame.iloc[:, i] for i, name in enumerate(names)]
+        if not columns:
+            return []
+        rows = (
+            columns[0].str.cat(columns[1:], sep=" | ")
+            if len(columns) > 1
+            else columns[0]
+        )
+        numbers = pd.Series(
+            range(start + 1, start + 1 + len(frame)), index=frame.index
+        ).astype(str)
+        return ("Row " + numbers + ": " + rows).tolist()
+
+    prefixes = [f"{header}: " for header in headers]
+    lines = []
+    for number, row in enumerate(frame, start + 1):
+        if len(row) == len(headers):
+            lines.append(
+                f"Row {number}: " + " | ".join(map(str.__add__, prefixes, row))
+            )
+        else:
+            # Handle rows with different column counts
+            lines.append(f"Row {number}: " + " | ".join(row))
+    return lines
 
-                    rows_data = []
-                    for row in sheet.iter_rows(values_only=True):
-                        if any(cell is not None for cell in row):  # Skip empty rows
-                            rows_data.append(
-                                [str(cell) if cell is not None else "" for cell in row]
-                            )
 
-                    if not rows_data:
-                        result.append("(Empty sheet)")
-                        continue
+def to_frame(rows: list[tuple]):
+    """Rows of cell values as a string DataFrame, or lists of strings without pandas"""
+    if pd is not None:
+        frame = pd.DataFrame(rows, dtype=object)
+        return frame.where(frame.notna(), "").astype(str)
+    return [["" if cell is None else str(cell) for cell in row] for row in rows]
 
-                    # Add headers and data
-                    headers = rows_data[0] if rows_data else []
-                    result.append("Headers: " + " | ".join(headers))
-                    result.append(" \n\n")
 
-                    for i, row in enumerate(rows_data[1:], 1):
-                        if len(row) == len(headers):
-                            row_data = [f"{h}: {v}" for h, v in zip(headers, row)]
-                            result.append(f"Row {i}: {' | '.join(row_data)}")
-                            result.append(" \n\n")
-                        else:
-                            result.append(f"Row {i}: {' | '.join(row)}")
-                            result.append(" \n\n")
+def detect_encoding(decoded_bytes: bytes | str) -> str:
+    """UTF-8 if the whole file decodes, latin-1 otherwise"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    file = as_file(decoded_bytes)
+    with open(file, "rb") if isinstance(file, str) else file as stream:
+        try:
+            while block := stream.read(1024 * 1024):
+                decoder.decode(block)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return "latin-1"
+    return "utf-8"
 
-                return "\n".join(result)
 
+def iter_csv_frames(decoded_bytes: bytes | str, chunk_rows: int):
+    """Yield (sheet, headers, start row, rows) for chunks of a CSV file.
+    Rows are parsed with the csv module so rows with a different number of columns are kept,
+    chunks where every row matches the headers are rendered as DataFrames when pandas is installed.
+    """
+    encoding = detect_encoding(decoded_bytes)
+    try:
+        file = as_file(decoded_bytes)
+        if isinstance(file, str):
+            file = open(file, "rb")
+        with io.TextIOWrapper(file, encoding=encoding, newline="") as text:
+            reader = csv.reader(text)
+            headers = next(reader, None)
+            if headers is None:
+                yield "", [], 0, None
+                return
+            start = 0
+            while rows := list(islice(reader, chunk_rows)):
+                if pd is not None and all(len(row) == len(headers) for row in rows):
+                    yield "", headers, start, pd.DataFrame(rows, dtype=str)
+                else:
+                    yield "", headers, start, rows
+                start += len(rows)
+            if start == 0:
+                yield "", headers, 0, []
+    except Exception as e:
+        raise ValueError(f"Error reading CSV file: {str(e)}")
+
+
+def iter_excel_frames(decoded_bytes: bytes | str, extension: str, chunk_rows: int):
+    """Yield (sheet, headers, start row, rows) for chunks of every sheet of an Excel file"""
+    if extension != "xlsx":
+        # xlrd can't stream, .xls files are limited to 65536 rows per sheet anyway
+        if not pd:
+            raise ImportError("pandas is required to process .xls files.")
+        try:
+            sheets = pd.read_excel(
+                as_file(decoded_bytes), sheet_name=None, engine="xlrd", header=None
+            )
         except Exception as e:
-            raise ValueError(f"Error reading Excel file: {str(e)}")
+            raise ImportError(
+                f"Cannot read .xls file. Please install 'xlrd' for .xls support: pip install xlrd. "
+                f"Original error: {str(e)}"
+            )
+        for sheet_name, frame in sheets.items():
+            frame = frame.dropna(how="all")
+            if frame.empty:
+                yield sheet_name, [], 0, None
+                continue
+            frame = frame.astype(object).where(frame.notna(), "").astype(str)
+            headers = frame.iloc[0].tolist()
+            for start in range(0, len(frame) - 1, chunk_rows):
+                yield sheet_name, headers, start, frame.iloc[
+                    1 + start : 1 + start + chunk_rows
+                ]
+            if len(frame) == 1:
+                yield sheet_name, headers, 0, []
+        return
+
+    if not openpyxl:
+        raise ImportError("openpyxl is required to process Excel files.")
+    try:
+        workbook = openpyxl.load_workbook(
+            as_file(decoded_bytes), read_only=True, data_only=True
+        )
+    except Exception as e:
+        raise ValueError(f"Error reading Excel file: {str(e)}")
+    try:
+        for sheet in workbook.worksheets:
+            rows = (
+                row
+                for row in sheet.iter_rows(values_only=True)
+                if any(cell is not None for cell in row)
+            )
+            header = next(rows, None)
+            if header is None:
+                yield sheet.title, [], 0, None
+                continue
+            headers = ["" if cell is None else str(cell) for cell in header]
+            start = 0
+            while chunk := list(islice(rows, chunk_rows)):
+                yield sheet.title, headers, start, to_frame(chunk)
+                start += len(chunk)
+            if start == 0:
+                yield sheet.title, headers, 0, []
+    finally:
+        workbook.close()
+
+
+def render_csv(decoded_bytes: bytes | str) -> str:
+    """Convert a CSV file to readable text format."""
+    return render_spreadsheet(decoded_bytes, "csv")[0][1]
+
+
+def render_excel(decoded_bytes: bytes | str, extension: str) -> str:
+    """Convert an Excel file to readable text format."""
+    return render_spreadsheet(decoded_bytes, extension)[0][1]
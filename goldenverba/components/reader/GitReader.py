@@ -1,19 +1,45 @@
 import aiohttp
+import asyncio
 import os
 import urllib
-import base64
+import hashlib
+import tarfile
+import tempfile
+from typing import AsyncIterator
 
 from wasabi import msg
 
 from goldenverba.components.document import Document
-from goldenverba.components.interfaces import Reader
+from goldenverba.components.interfaces import Reader, SyncState
 from goldenverba.server.types import FileConfig
 from goldenverba.components.reader.BasicReader import BasicReader
-from goldenverba.components.util import get_environment
+from goldenverba.components.util import get_environment, get_int_setting
 
 from goldenverba.components.types import InputConfig
 
 
+def get_git_concurrency() -> int:
+    """Maximum number of files downloaded at the same time in the Files fetch mode"""
+    return get_int_setting("VERBA_GIT_MAX_CONCURRENCY", 8)
+
+
+def get_blob_sha(size: int):
+    """SHA-1 object hash Git uses for blobs, update it with the file content"""
+    return hashlib.sha1(f"blob {size}\0".encode("utf-8"))
+
+
+class GitFile:
+    """A repository file downloaded to a temporary directory"""
+
+    def __init__(self, path: str, file_path: str, link: str, size: int, sha: str = ""):
+        self.path = path
+        self.file_path = file_path
+        self.link = link
+        self.size = size
+        self.sha = sha
+        self.extension = os.path.splitext(path)[1][1:]
+
+
 class GitReader(Reader):
     """
     The GitReader downloads files from GitHub or GitLab and ingests them into Weaviate.
@@ -26,6 +52,8 @@ class GitReader(Reader):
         self.description = (
             "Downloads and ingests all files from a GitHub or GitLab Repo."
         )
+        self.github_url = "https://api.github.com"
+        self.gitlab_url = "https://gitlab.com"
         self.config = {
             "Platform": InputConfig(
                 type="dropdown",
@@ -57,6 +85,18 @@ class GitReader(Reader):
                 description="Enter the path or leave it empty to import all",
                 values=[],
             ),
+            "Fetch Mode": InputConfig(
+                type="dropdown",
+                value="Archive",
+                description="Archive downloads the branch as a single tarball, Files downloads matching files concurrently",
+                values=["Archive", "Files"],
+            ),
+            "Sync Mode": InputConfig(
+                type="dropdown",
+                value="Full",
+                description="Full imports every file, Incremental only imports added or modified files (by Git blob SHA) and deletes documents of removed files",
+                values=["Full", "Incremental"],
+            ),
         }
 
         if os.getenv("GITHUB_TOKEN") is None and os.getenv("GITLAB_TOKEN") is None:
@@ -67,63 +107,80 @@ class GitReader(Reader):
                 values=[],
             )
 
-    async def load(self, config: dict, fileConfig: FileConfig) -> list[Document]:
-        documents = []
+    async def load(
+        self, config: dict, fileConfig: FileConfig, sync: SyncState | None = None
+    ) -> list[Document]:
+        return [
+            document async for document in self.stream(config, fileConfig, sync=sync)
+        ]
+
+    async def stream(
+        self, config: dict, fileConfig: FileConfig, sync: SyncState | None = None
+    ) -> AsyncIterator[Document]:
         platform = config["Platform"].value
         token = self.get_token(config, platform)
+        owner = config["Owner"].value
+        name = config["Name"].value
+        branch = config["Branch"].value
+        path = config["Path"].value
+        fetch_mode = self.get_option(config, "Fetch Mode")
 
         reader = BasicReader()
 
-        if platform == "GitHub":
-            owner = config["Owner"].value
-            name = config["Name"].value
-            branch = config["Branch"].value
-            path = config["Path"].value
-            fetch_url = f"https://api.github.com/repos/{owner}/{name}/git/trees/{branch}?recursive=1"
-            docs = await self.fetch_docs_github(fetch_url, path, token, reader)
-        else:  # GitLab
-            owner = config["Owner"].value
-            name = config["Name"].value
-            project_id = urllib.parse.quote(f"{owner}/{name}", safe="")
-            branch = config["Branch"].value
-            path = config["Path"].value
-            fetch_url = f"https://gitlab.com/api/v4/projects/{project_id}/repository/tree?ref={branch}&path={path}&per_page=100"
-            docs = await self.fetch_docs_gitlab(fetch_url, token, reader)
-
-        msg.info(f"Fetched {len(docs)} document paths from {fetch_url}")
-
-        for _file in docs:
-            try:
-                if platform == "GitHub":
-                    content, link, size, extension = await self.download_file_github(
-                        owner, name, _file, branch, token
+        with tempfile.TemporaryDirectory(prefix="verba_git_") as directory:
+            async with aiohttp.ClientSession(
+                headers=self.get_headers(token, platform)
+            ) as session:
+                if fetch_mode == "Archive":
+                    files = await self.download_archive(
+                        session, platform, owner, name, branch, path, reader, directory
                     )
+                    if sync is not None:
+                        files = [
+                            _file
+                            for _file in files
+                            if sync.changed(_file.path, "git_sha", _file.sha)
+                        ]
                 else:
-                    content, link, size, extension = await self.download_file_gitlab(
-                        owner, name, _file, branch, token
+                    files = await self.download_files(
+                        session,
+                        platform,
+                        owner,
+                        name,
+                        branch,
+                        path,
+                        reader,
+                        directory,
+                        sync,
                     )
 
-                if content:
+            msg.info(f"Fetched {len(files)} files from {owner}/{name} ({branch})")
+
+            for _file in files:
+                try:
                     new_file_config = FileConfig(
                         fileID=fileConfig.fileID,
-                        filename=_file,
+                        filename=_file.path,
                         isURL=False,
                         overwrite=fileConfig.overwrite,
-                        extension=extension,
-                        source=link,
-                        content=content,
+                        extension=_file.extension,
+                        source=_file.link,
+                        content="",
                         labels=fileConfig.labels,
                         rag_config=fileConfig.rag_config,
-                        file_size=size,
+                        file_size=_file.size,
                         status=fileConfig.status,
+                        metadata=fileConfig.metadata,
                         status_report=fileConfig.status_report,
                     )
+                    new_file_config._file_path = _file.file_path
                     document = await reader.load(config, new_file_config)
-                    documents.append(document[0])
-            except Exception as e:
-                raise Exception(f"Couldn't load retrieve {_file}: {str(e)}")
-
-        return documents
+                except Exception as e:
+                    raise Exception(f"Couldn't load retrieve {_file.path}: {str(e)}")
+                # Files are read one at a time while the pipeline imports the previous ones
+                for _document in document:
+                    _document.meta["git_sha"] = _file.sha
+                    yield _document
 
     def get_token(self, config: dict, platform: str) -> str:
         env_var = "GITHUB_TOKEN" if platform == "GitHub" else "GITLAB_TOKEN"
@@ -131,73 +188,234 @@ class GitReader(Reader):
             config, "Git Token", env_var, f"No {platform} Token detected"
         )
 
-    async def fetch_docs_github(
-        self, url: str, folder: str, token: str, reader: Reader
-    ) -> list[str]:
-        headers = self.get_headers(token, "GitHub")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.json()
-                return [
-                    item["path"]
-                    for item in data["tree"]
-                    if item["path"].startswith(folder)
-                    and any(item["path"].endswith(ext) for ext in reader.extension)
-                ]
-
-    async def fetch_docs_gitlab(self, url: str, token: str, reader: Reader) -> list:
-        headers = self.get_headers(token, "GitLab")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.json()
-                return [
-                    item["path"]
-                    for item in data
-                    if item["type"] == "blob"
-                    and any(item["path"].endswith(ext) for ext in reader.extension)
-                ]
+    def get_sync_prefix(self, config: dict) -> str | None:
+        if self.get_option(config, "Sync Mode") != "Incremental":
+            return None
+        return self.get_link(
+            config["Platform"].value,
+            config["Owner"].value,
+            config["Name"].value,
+            config["Branch"].value,
+            config["Path"].value,
+        )
 
-    async def download_file_github(
-        self, owner: str, name: str, path: str, branch: str, token: str
-    ) -> tuple[str, str, int, str]:
-        url = (
-            f"https://api.github.com/repos/{owner}/{name}/contents/{path}?ref={branch}"
+    def matches(self, path: str, folder: str, reader: Reader) -> bool:
+        return path.startswith(folder) and any(
+            path.endswith(ext) for ext in reader.extension
         )
-        headers = self.get_headers(token, "GitHub")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.json()
-                content_b64 = data["content"]
-                link = data["html_url"]
-                size = data["size"]
-                extension = os.path.splitext(path)[1][1:]
-                return content_b64, link, size, extension
 
-    async def download_file_gitlab(
-        self, owner: str, name: str, file_path: str, branch: str, token: str
-    ) -> tuple[str, str, int, str]:
-        project_id = urllib.parse.quote(f"{owner}/{name}", safe="")
-        url = f"https://gitlab.com/api/v4/projects/{project_id}/repository/files/{urllib.parse.quote(file_path, safe='')}/raw?ref={branch}"
-        headers = {"PRIVATE-TOKEN": token}
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    content = await response.read()
-                    content_b64 = base64.b64encode(content).decode("utf-8")
-                    size = len(content)
-                    extension = os.path.splitext(file_path)[1][1:]
-                    link = (
-                        f"https://gitlab.com/{owner}/{name}/-/blob/{branch}/{file_path}"
+    def get_link(
+        self, platform: str, owner: str, name: str, branch: str, path: str
+    ) -> str:
+        if platform == "GitHub":
+            return f"https://github.com/{owner}/{name}/blob/{branch}/{path}"
+        return f"{self.gitlab_url}/{owner}/{name}/-/blob/{branch}/{path}"
+
+    ### Archive mode
+
+    async def download_archive(
+        self,
+        session: aiohttp.ClientSession,
+        platform: str,
+        owner: str,
+        name: str,
+        branch: str,
+        folder: str,
+        reader: Reader,
+        directory: str,
+    ) -> list[GitFile]:
+        """Download the branch as one tarball and extract the matching files"""
+        if platform == "GitHub":
+            url = f"{self.github_url}/repos/{owner}/{name}/tarball/{urllib.parse.quote(branch, safe='')}"
+        else:
+            project_id = urllib.parse.quote(f"{owner}/{name}", safe="")
+            url = f"{self.gitlab_url}/api/v4/projects/{project_id}/repository/archive.tar.gz?sha={urllib.parse.quote(branch, safe='')}"
+            if folder:
+                url += f"&path={urllib.parse.quote(folder, safe='')}"
+
+        archive_path = os.path.join(directory, "archive.tar.gz")
+        async with session.get(url) as response:
+            response.raise_for_status()
+            with open(archive_path, "wb") as archive:
+                async for data in response.content.iter_chunked(1024 * 1024):
+                    archive.write(data)
+
+        entries = await asyncio.to_thread(
+            self.extract_archive, archive_path, folder, reader, directory
+        )
+        os.remove(archive_path)
+        return [
+            GitFile(
+                path,
+                file_path,
+                self.get_link(platform, owner, name, branch, path),
+                size,
+                sha,
+            )
+            for path, file_path, size, sha in entries
+        ]
+
+    def extract_archive(
+        self, archive_path: str, folder: str, reader: Reader, directory: str
+    ) -> list[tuple[str, str, int, str]]:
+        """Extract regular files below folder with a supported extension
+        @returns list[tuple[str, str, int, str]] - Repository path, extracted file, size and blob SHA
+        """
+        entries = []
+        with tarfile.open(archive_path, mode="r|gz") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                # Archives have a single top-level directory named after the commit
+                parts = member.name.split("/", 1)
+                if len(parts) < 2 or not self.matches(parts[1], folder, reader):
+                    continue
+                file_descriptor, file_path = tempfile.mkstemp(dir=directory)
+                sha = get_blob_sha(member.size)
+                with os.fdopen(file_descriptor, "wb") as file:
+                    source = archive.extractfile(member)
+                    while data := source.read(1024 * 1024):
+                        file.write(data)
+                        sha.update(data)
+                entries.append((parts[1], file_path, member.size, sha.hexdigest()))
+        return entries
+
+    ### Files mode
+
+    async def download_files(
+        self,
+        session: aiohttp.ClientSession,
+        platform: str,
+        owner: str,
+        name: str,
+        branch: str,
+        folder: str,
+        reader: Reader,
+        directory: str,
+        sync: SyncState | None = None,
+    ) -> list[GitFile]:
+        """List the matching files and download them concurrently on one session"""
+        if platform == "GitHub":
+            fetch_url = (
+                f"{self.github_url}/repos/{owner}/{name}/git/trees/{branch}?recursive=1"
+            )
+            paths = await self.fetch_docs_github(session, fetch_url, folder, reader)
+        else:
+            project_id = urllib.parse.quote(f"{owner}/{name}", safe="")
+            fetch_url = f"{self.gitlab_url}/api/v4/projects/{project_id}/repository/tree?ref={branch}&path={folder}&per_page=100"
+            paths = await self.fetch_docs_gitlab(session, fetch_url, reader)
+
+        msg.info(f"Fetched {len(paths)} document paths from {fetch_url}")
+        if sync is not None:
+            # Only download files whose blob changed since the last import
+            paths = {
+                path: sha
+                for path, sha in paths.items()
+                if sync.changed(path, "git_sha", sha)
+            }
+
+        semaphore = asyncio.Semaphore(get_git_concurrency())
+
+        async def download(path: str) -> GitFile:
+            async with semaphore:
+                if platform == "GitHub":
+                    _file = await self.download_file_github(
+                        session, owner, name, path, branch, directory
                     )
-                    return content_b64, link, size, extension
                 else:
-                    raise Exception(
-                        f"Failed to download file: {response.status} {await response.text()}"
+                    _file = await self.download_file_gitlab(
+                        session, owner, name, path, branch, directory
                     )
+                _file.sha = paths[path]
+                return _file
+
+        return await asyncio.gather(*[download(path) for path in paths])
+
+    async def fetch_docs_github(
+        self, session: aiohttp.ClientSession, url: str, folder: str, reader: Reader
+    ) -> dict[str, str]:
+        """Matching file paths and their blob SHAs"""
+        async with session.get(url) as response:
+            response.raise_for_status()
+            data = await response.json()
+            return {
+                item["path"]: item["sha"]
+                for item in data["tree"]
+                if item["type"] == "blob" and self.matches(item["path"], folder, reader)
+            }
+
+    async def fetch_docs_gitlab(
+        self, session: aiohttp.ClientSession, url: str, reader: Reader
+    ) -> dict[str, str]:
+        """Matching file paths and their blob SHAs"""
+        async with session.get(url) as response:
+            response.raise_for_status()
+            data = await response.json()
+            return {
+                item["path"]: item["id"]
+                for item in data
+                if item["type"] == "blob" and self.matches(item["path"], "", reader)
+            }
+
+    async def download_file_github(
+        self,
+        session: aiohttp.ClientSession,
+        owner: str,
+        name: str,
+        path: str,
+        branch: str,
+        directory: str,
+    ) -> GitFile:
+        url = f"{self.github_url}/repos/{owner}/{name}/contents/{urllib.parse.quote(path)}?ref={branch}"
+        # The raw media type returns the file itself instead of base64 JSON
+        headers = {"Accept": "application/vnd.github.raw"}
+        async with session.get(url, headers=headers) as response:
+            response.raise_for_status()
+            file_path, size = await self.save_response(response, directory)
+            return GitFile(
+                path,
+                file_path,
+                self.get_link("GitHub", owner, name, branch, path),
+                size,
+            )
+
+    async def download_file_gitlab(
+        self,
+        session: aiohttp.ClientSession,
+        owner: str,
+        name: str,
+        file_path: str,
+        branch: str,
+        directory: str,
+    ) -> GitFile:
+        project_id = urllib.parse.quote(f"{owner}/{name}", safe="")
+        url = f"{self.gitlab_url}/api/v4/projects/{project_id}/repository/files/{urllib.parse.quote(file_path, safe='')}/raw?ref={branch}"
+
+        async with session.get(url) as response:
+            if response.status == 200:
+                saved_path, size = await self.save_response(response, directory)
+                return GitFile(
+                    file_path,
+                    saved_path,
+                    self.get_link("GitLab", owner, name, branch, file_path),
+                    size,
+                )
+            else:
+                raise Exception(
+                    f"Failed to download file: {response.status} {await response.text()}"
+                )
+
+    async def save_response(
+        self, response: aiohttp.ClientResponse, directory: str
+    ) -> tuple[str, int]:
+        """Stream a response body to a temporary file, returns its path and size"""
+        file_descriptor, file_path = tempfile.mkstemp(dir=directory)
+        size = 0
+        with os.fdopen(file_descriptor, "wb") as file:
+            async for data in response.content.iter_chunked(1024 * 1024):
+                file.write(data)
+                size += len(data)
+        return file_path, size
 
     def get_headers(self, token: str, platform: str) -> dict:
         if platform == "GitHub":
@@ -208,4 +426,5 @@ class GitReader(Reader):
         else:  # GitLab
             return {
                 "Authorization": f"Bearer {token}",
+                "PRIVATE-TOKEN": token,
             }
@@ -1,12 +1,18 @@
 import base64
-import aiohttp
-from typing import Tuple, List
+from typing import List
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
 from wasabi import msg
 
 from goldenverba.components.document import Document
+from goldenverba.components.crawler import (
+    Crawler,
+    CrawledPage,
+    CrawlState,
+    PageCache,
+)
+from goldenverba.components.http_pool import http_pool
 from goldenverba.components.interfaces import Reader
 from goldenverba.server.types import FileConfig
 from goldenverba.components.reader.BasicReader import BasicReader
@@ -21,7 +27,7 @@ except ImportError:
 class HTMLReader(Reader):
     """
     The HTMLReader downloads HTML content from URLs and ingests it into Weaviate.
-    It can optionally fetch linked pages recursively.
+    It can optionally crawl linked pages of the same host breadth-first.
     """
 
     def __init__(self):
@@ -32,6 +38,7 @@ class HTMLReader(Reader):
         self.description = (
             "Downloads and ingests HTML from a URL, with optional recursive fetching."
         )
+        self.page_cache: PageCache | None = None
         self.config = {
             "URLs": InputConfig(
                 type="multi",
@@ -57,126 +64,100 @@ class HTMLReader(Reader):
                 description="Maximum depth for recursive fetching",
                 values=[],
             ),
+            "Max Pages": InputConfig(
+                type="number",
+                value=100,
+                description="Maximum number of pages fetched per import",
+                values=[],
+            ),
+            "Concurrency": InputConfig(
+                type="number",
+                value=8,
+                description="Number of pages fetched at the same time",
+                values=[],
+            ),
+            "Politeness Delay": InputConfig(
+                type="number",
+                value=250,
+                description="Milliseconds between the start of two requests to the same host",
+                values=[],
+            ),
+            "Skip Unchanged Pages": InputConfig(
+                type="bool",
+                value=True,
+                description="Send conditional requests with the ETag/Last-Modified of the last crawl and skip pages that didn't change",
+                values=[],
+            ),
         }
 
-    async def load(self, config: dict, fileConfig: FileConfig) -> list[Document]:
+    async def load(
+        self, config: dict, fileConfig: FileConfig, crawl: CrawlState | None = None
+    ) -> list[Document]:
         reader = BasicReader()
         urls = config["URLs"].values
         to_markdown = config["Convert To Markdown"].value
         recursive = config["Recursive"].value
-        max_depth = int(config["Max Depth"].value)
+        max_depth = int(config["Max Depth"].value) if recursive else 0
 
-        documents = []
-        processed_urls = set()
-
-        async with aiohttp.ClientSession() as session:
-            for url in urls:
-                try:
-                    await self.process_url(
-                        url,
-                        to_markdown,
-                        recursive,
-                        max_depth,
-                        0,
-                        session,
-                        reader,
-                        fileConfig,
-                        documents,
-                        processed_urls,
-                    )
-                except Exception as e:
-                    msg.warn(f"Failed to process URL {url}: {str(e)}")
+        max_pages = int(self.get_option(config, "Max Pages"))
+        concurrency = int(self.get_option(config, "Concurrency"))
+        delay = float(self.get_option(config, "Politeness Delay")) / 1000
 
-        return documents
+        documents = []
 
-    async def process_url(
-        self,
-        url: str,
-        to_markdown: bool,
-        recursive: bool,
-        max_depth: int,
-        current_depth: int,
-        session: aiohttp.ClientSession,
-        reader: BasicReader,
-        fileConfig: FileConfig,
-        documents: List[Document],
-        processed_urls: set,
-    ):
-        if url in processed_urls or current_depth > max_depth:
-            return
-
-        processed_urls.add(url)
-
-        try:
-            content, size, _html = await self.fetch_html_and_convert(
-                session, url, to_markdown
-            )
+        async def on_page(page: CrawledPage):
+            content = self.convert(page.html, to_markdown)
             new_file_config = FileConfig(
                 fileID=fileConfig.fileID,
-                filename=url,
+                filename=page.url,
                 isURL=False,
                 overwrite=fileConfig.overwrite,
                 extension="md" if to_markdown else "html",
-                source=url,
-                content=content,
+                source=page.url,
+                content=base64.b64encode(content).decode("utf-8"),
                 labels=fileConfig.labels,
                 rag_config=fileConfig.rag_config,
-                file_size=size,
+                file_size=len(content),
                 status=fileConfig.status,
                 status_report=fileConfig.status_report,
                 metadata=fileConfig.metadata,
             )
-            document = await reader.load(self.config, new_file_config)
-            documents.extend(document)
-
-            if recursive and current_depth < max_depth:
-                linked_urls = self.extract_links(_html, url)
-                for linked_url in linked_urls:
-                    await self.process_url(
-                        linked_url,
-                        to_markdown,
-                        recursive,
-                        max_depth,
-                        current_depth + 1,
-                        session,
-                        reader,
-                        fileConfig,
-                        documents,
-                        processed_urls,
-                    )
-        except Exception as e:
-            msg.warn(f"Failed to process URL {url}: {str(e)}")
-
-    async def fetch_html_and_convert(
-        self, session: aiohttp.ClientSession, url: str, to_markdown: bool
-    ) -> Tuple[str, int, str]:
-        """
-        Fetches the HTML content of the given URL and optionally converts it to Markdown.
+            documents.extend(await reader.load(self.config, new_file_config))
+
+        async with http_pool.session() as session:
+            crawler = Crawler(
+                session,
+                self.extract_links,
+                concurrency=concurrency,
+                max_pages=max_pages,
+                max_depth=max_depth,
+                delay=delay,
+                state=crawl,
+            )
+            await crawler.crawl(urls, on_page)
 
-        :param session: The aiohttp ClientSession to use for the request.
-        :param url: The URL of the web page to fetch.
-        :param to_markdown: Whether to convert the HTML to Markdown.
-        :return: A tuple containing the base64-encoded content and its size.
-        """
-        try:
-            async with session.get(url) as response:
-                response.raise_for_status()
-                html_content = await response.text()
-
-            if to_markdown:
-                if md is None:
-                    raise ImportError("markdownify is required for Markdown conversion")
-                content = md(html_content).encode("utf-8")
-            else:
-                content = html_content.encode("utf-8")
-
-            base64_content = base64.b64encode(content).decode("utf-8")
-            return base64_content, len(content), html_content
-
-        except aiohttp.ClientError as e:
-            raise Exception(f"Failed to fetch HTML content from URL: {str(e)}")
-        except ImportError as e:
-            raise Exception(f"Markdown conversion failed: {str(e)}")
+        if crawl is not None and crawl.unchanged > 0:
+            msg.info(
+                f"Skipped {crawl.unchanged} pages that didn't change since the last crawl"
+            )
+        return documents
+
+    def get_page_cache(self, config: dict | None = None) -> PageCache | None:
+        if config is not None and not self.get_option(config, "Skip Unchanged Pages"):
+            return None
+        if self.page_cache is None:
+            self.page_cache = PageCache()
+        return self.page_cache
+
+    def convert(self, html_content: str, to_markdown: bool) -> bytes:
+        """Encode the page, optionally converted to Markdown"""
+        if to_markdown:
+            if md is None:
+                raise Exception(
+                    "Markdown conversion failed: markdownify is required for Markdown conversion"
+                )
+            return md(html_content).encode("utf-8")
+        return html_content.encode("utf-8")
 
     def extract_links(self, html_content: str, base_url: str) -> List[str]:
         """
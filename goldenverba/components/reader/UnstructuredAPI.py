@@ -1,5 +1,3 @@
-import base64
-import io
 import os
 
 import requests
@@ -9,7 +7,7 @@ import aiohttp
 from goldenverba.components.document import Document, create_document
 from goldenverba.components.interfaces import Reader
 from goldenverba.server.types import FileConfig
-from goldenverba.components.util import get_environment
+from goldenverba.components.util import get_environment, open_file
 from goldenverba.components.types import InputConfig
 
 
@@ -81,7 +79,7 @@ class UnstructuredReader(Reader):
 
         file_data = aiohttp.FormData()
         file_data.add_field("strategy", strategy)
-        file_bytes = io.BytesIO(base64.b64decode(fileConfig.content))
+        file_bytes = open_file(fileConfig)
         file_data.add_field(
             "files",
             file_bytes,
@@ -111,3 +109,5 @@ class UnstructuredReader(Reader):
             )
         except Exception as e:
             raise Exception(f"Failed to process {fileConfig.filename}: {str(e)}")
+        finally:
+            file_bytes.close()
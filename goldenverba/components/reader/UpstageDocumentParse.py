@@ -1,5 +1,3 @@
-import base64
-import io
 import os
 
 import requests
@@ -9,7 +7,7 @@ import aiohttp
 from goldenverba.components.document import Document, create_document
 from goldenverba.components.interfaces import Reader
 from goldenverba.server.types import FileConfig
-from goldenverba.components.util import get_environment
+from goldenverba.components.util import get_environment, open_file
 from goldenverba.components.types import InputConfig
 
 
@@ -64,7 +62,7 @@ class UpstageDocumentParseReader(Reader):
         msg.info(f"Loading {fileConfig.filename}")
 
         file_data = aiohttp.FormData()
-        file_bytes = io.BytesIO(base64.b64decode(fileConfig.content))
+        file_bytes = open_file(fileConfig)
         file_data.add_field(
             "document",
             file_bytes,
@@ -94,3 +92,5 @@ class UpstageDocumentParseReader(Reader):
             )
         except Exception as e:
             raise Exception(f"Failed to process {fileConfig.filename}: {str(e)}")
+        finally:
+            file_bytes.close()
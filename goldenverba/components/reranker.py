@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+import math
+from collections import OrderedDict
+
+from wasabi import msg
+
+from goldenverba.components.model_pool import BACKENDS, ModelPool, quantize_int8
+from goldenverba.components.util import get_int_setting
+
+try:
+    from sentence_transformers import CrossEncoder
+except Exception as e:
+    pass
+
+RERANK_MODELS = [
+    "cross-encoder/ms-marco-MiniLM-L-6-v2",
+    "cross-encoder/ms-marco-TinyBERT-L-2-v2",
+    "BAAI/bge-reranker-base",
+]
+
+
+def create_cross_encoder(model_name: str, backend: str):
+    """Load a CrossEncoder model with the given backend"""
+    if backend == "ONNX":
+        return CrossEncoder(model_name, backend="onnx", device="cpu")
+
+    model = CrossEncoder(model_name, device="cpu")
+    if backend == "Torch int8":
+        model.model = quantize_int8(model.model)
+    return model
+
+
+def get_pair_key(model_name: str, backend: str, query: str, content: str) -> str:
+    text = "\0".join([model_name, backend, query, content])
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class RerankEngine(ModelPool):
+    """
+    Scores (query, chunk) pairs with local cross-encoders on dedicated threads.
+    Scores are cached per pair, so repeated queries over the same chunks only run inference once.
+    """
+
+    kind = "CrossEncoder"
+    thread_name_prefix = "verba-rerank"
+
+    def __init__(
+        self,
+        max_models: int | None = None,
+        max_workers: int | None = None,
+        cache_size: int | None = None,
+    ):
+        super().__init__(
+            max_models or get_int_setting("VERBA_RERANK_MAX_MODELS", 1),
+            max_workers or get_int_setting("VERBA_RERANK_WORKERS", 1),
+        )
+        self.cache_size = cache_size or get_int_setting(
+            "VERBA_RERANK_CACHE_SIZE", 10000
+        )
+        self.scores: OrderedDict[str, float] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+
+    def load_model(self, model_name: str, backend: str):
+        return create_cross_encoder(model_name, backend)
+
+    def score(
+        self,
+        model_name: str,
+        backend: str,
+        query: str,
+        contents: list[str],
+        batch_size: int = 32,
+    ) -> list[float]:
+        """Relevance of every content to the query between 0 and 1, only uncached pairs are predicted"""
+        keys = [
+            get_pair_key(model_name, backend, query, content) for content in contents
+        ]
+        scores = {}
+        with self.lock:
+            for key in keys:
+                if key in self.scores:
+                    self.scores.move_to_end(key)
+                    scores[key] = self.scores[key]
+            self.hits += len(scores)
+
+        missing = [
+            (key, content)
+            for key, content in dict(zip(keys, contents)).items()
+            if key not in scores
+        ]
+        if missing:
+            model = self.get_model(model_name, backend)
+            logits = model.predict(
+                [(query, content) for _, content in missing],
+                batch_size=batch_size,
+                show_progress_bar=False,
+            )
+            with self.lock:
+                self.misses += len(missing)
+                for (key, _), logit in zip(missing, logits):
+                    # Logits are squashed so scores stay comparable to the hybrid scores
+                    scores[key] = 1 / (1 + math.exp(-float(logit)))
+                    self.scores[key] = scores[key]
+                while len(self.scores) > self.cache_size:
+                    self.scores.popitem(last=False)
+
+        return [scores[key] for key in keys]
+
+    async def rerank(
+        self,
+        model_name: str,
+        backend: str,
+        query: str,
+        contents: list[str],
+        budget: float,
+        batch_size: int = 32,
+    ) -> list[float] | None:
+        """Score contents within the budget in seconds, returns None if the budget was exceeded"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self.get_executor(),
+            self.score,
+            model_name,
+            backend,
+            query,
+            contents,
+            batch_size,
+        )
+        try:
+            # The scoring keeps running after a timeout and fills the cache for the next query
+            return await asyncio.wait_for(asyncio.shield(future), timeout=budget)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            future.add_done_callback(lambda done: done.cancelled() or done.exception())
+            msg.warn(
+                f"Reranking {len(contents)} chunks exceeded {int(budget * 1000)}ms, keeping retrieval order"
+            )
+            return None
+        except Exception as e:
+            msg.warn(f"Reranking failed, keeping retrieval order: {str(e)}")
+            return None
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.scores),
+            "hits": self.hits,
+            "misses": self.misses,
+            "timeouts": self.timeouts,
+        }
+
+    def shutdown(self):
+        super().shutdown()
+        with self.lock:
+            self.scores.clear()
+
+
+rerank_engine = RerankEngine()
@@ -1,5 +1,40 @@
+import asyncio
+
+from wasabi import msg
+
 from goldenverba.components.interfaces import Retriever
 from goldenverba.components.types import InputConfig
+from goldenverba.components.util import count_tokens
+from goldenverba.components.model_pool import BACKENDS, BACKEND_DESCRIPTION
+from goldenverba.components.reranker import RERANK_MODELS, rerank_engine
+
+
+async def search_collection(search, embedder: str, vector, timeout: float) -> list:
+    """Search one embedding collection, a failed or timed out collection returns no chunks"""
+    try:
+        return await asyncio.wait_for(search(embedder, vector), timeout=timeout)
+    except asyncio.TimeoutError:
+        msg.warn(
+            f"Searching the {embedder} collection exceeded {int(timeout * 1000)}ms"
+        )
+    except Exception as e:
+        msg.warn(f"Searching the {embedder} collection failed: {str(e)}")
+    return []
+
+
+def reciprocal_rank_fusion(results: list[list], k: int = 60) -> list:
+    """Merge ranked chunk lists, chunks are scored by the sum of 1 / (k + rank) over the lists they appear in"""
+    scores = {}
+    chunks = {}
+    for result in results:
+        for rank, chunk in enumerate(result, start=1):
+            key = str(chunk.uuid)
+            chunks.setdefault(key, chunk)
+            scores[key] = scores.get(key, 0) + 1 / (k + rank)
+
+    for key, chunk in chunks.items():
+        chunk.metadata.score = scores[key]
+    return sorted(chunks.values(), key=lambda chunk: chunk.metadata.score, reverse=True)
 
 
 class WindowRetriever(Retriever):
@@ -15,8 +50,68 @@ class WindowRetriever(Retriever):
         self.config["Search Mode"] = InputConfig(
             type="dropdown",
             value="Hybrid Search",
-            description="Switch between search types.",
-            values=["Hybrid Search"],
+            description="Switch between search types. Keyword (BM25) doesn't vectorize the query, Vector skips keyword scoring.",
+            values=["Hybrid Search", "Keyword (BM25)", "Vector"],
+        )
+        self.config["Alpha"] = InputConfig(
+            type="number",
+            value=50,
+            description="Weight of the vector search in Hybrid Search (0-100), 0 is pure keyword search",
+            values=[],
+        )
+        self.config["Fusion Type"] = InputConfig(
+            type="dropdown",
+            value="Relative Score",
+            description="How Hybrid Search combines keyword and vector results",
+            values=["Relative Score", "Ranked"],
+        )
+        self.config["Rerank"] = InputConfig(
+            type="bool",
+            value=False,
+            description="Rerank the retrieved chunks with a local cross-encoder before adding their windows (needs sentence-transformers)",
+            values=[],
+        )
+        self.config["Rerank Model"] = InputConfig(
+            type="dropdown",
+            value=RERANK_MODELS[0],
+            description="Cross-encoder used for reranking",
+            values=RERANK_MODELS,
+        )
+        self.config["Rerank Backend"] = InputConfig(
+            type="dropdown",
+            value="Torch",
+            description=BACKEND_DESCRIPTION,
+            values=BACKENDS,
+        )
+        self.config["Rerank Candidates"] = InputConfig(
+            type="number",
+            value=30,
+            description="Number of chunks retrieved for reranking, replaces the Limit Mode",
+            values=[],
+        )
+        self.config["Rerank Top K"] = InputConfig(
+            type="number",
+            value=8,
+            description="Number of chunks kept after reranking",
+            values=[],
+        )
+        self.config["Rerank Budget"] = InputConfig(
+            type="number",
+            value=1000,
+            description="Milliseconds reranking may take, if exceeded the top chunks of the search are kept",
+            values=[],
+        )
+        self.config["Collections"] = InputConfig(
+            type="dropdown",
+            value="Selected Embedder",
+            description="All Embedders also searches the collections of documents imported with the other available embedders and merges the results",
+            values=["Selected Embedder", "All Embedders"],
+        )
+        self.config["Collection Timeout"] = InputConfig(
+            type="number",
+            value=2000,
+            description="Milliseconds to wait for each collection when searching All Embedders, slower collections are left out",
+            values=[],
         )
         self.config["Limit Mode"] = InputConfig(
             type="dropdown",
@@ -36,6 +131,12 @@ class WindowRetriever(Retriever):
             description="Number of surrounding chunks of retrieved chunks to add to context",
             values=[],
         )
+        self.config["Window Mode"] = InputConfig(
+            type="dropdown",
+            value="Chunks",
+            description="Chunks adds the surrounding chunks, Pages adds all chunks on the page of a retrieved chunk (for documents with page numbers like PDFs)",
+            values=["Chunks", "Pages"],
+        )
         self.config["Threshold"] = InputConfig(
             type="number",
             value=80,
@@ -53,6 +154,8 @@ class WindowRetriever(Retriever):
         embedder,
         labels,
         document_uuids,
+        vectors=None,
+        max_tokens=None,
     ):
         search_mode = config["Search Mode"].value
         limit_mode = config["Limit Mode"].value
@@ -61,48 +164,108 @@ class WindowRetriever(Retriever):
         window = max(0, min(10, int(config["Chunk Window"].value)))
         window_threshold = max(0, min(100, int(config["Threshold"].value)))
         window_threshold /= 100
+        window_mode = self.get_option(config, "Window Mode")
 
-        if search_mode == "Hybrid Search":
-            chunks = await weaviate_manager.hybrid_chunks(
-                client,
-                embedder,
-                query,
-                vector,
-                limit_mode,
-                limit,
-                labels,
-                document_uuids,
+        rerank = self.get_option(config, "Rerank")
+        if rerank:
+            # Over-fetch a fixed number of candidates, reranking picks the top k
+            limit_mode = "Fixed"
+            limit = max(1, int(self.get_option(config, "Rerank Candidates")))
+
+        async def search(embedder, vector):
+            if search_mode == "Keyword (BM25)":
+                chunks = await weaviate_manager.bm25_chunks(
+                    client,
+                    embedder,
+                    query,
+                    limit_mode,
+                    limit,
+                    labels,
+                    document_uuids,
+                )
+            elif search_mode == "Vector":
+                chunks = await weaviate_manager.vector_chunks(
+                    client,
+                    embedder,
+                    vector,
+                    limit_mode,
+                    limit,
+                    labels,
+                    document_uuids,
+                )
+            else:
+                alpha = self.get_option(config, "Alpha")
+                chunks = await weaviate_manager.hybrid_chunks(
+                    client,
+                    embedder,
+                    query,
+                    vector,
+                    limit_mode,
+                    limit,
+                    labels,
+                    document_uuids,
+                    alpha=max(0, min(100, int(alpha))) / 100,
+                    fusion_type=self.get_option(config, "Fusion Type"),
+                )
+            # Windows are fetched from the collection a chunk was found in
+            for chunk in chunks or []:
+                chunk.properties["embedder"] = embedder
+            return chunks or []
+
+        if vectors:
+            timeout = self.get_fanout_timeout(config)
+            targets = {embedder: vector, **vectors}
+            results = await asyncio.gather(
+                *[
+                    search_collection(search, _embedder, _vector, timeout)
+                    for _embedder, _vector in targets.items()
+                ]
             )
-        # TODO Add other search methods
+            chunks = reciprocal_rank_fusion(results)
+            if limit_mode == "Fixed":
+                chunks = chunks[:limit]
+        else:
+            chunks = await search(embedder, vector)
 
         if len(chunks) == 0:
             return ([], "We couldn't find any chunks to the query")
 
+        if rerank:
+            chunks = await self.rerank_chunks(config, query, chunks)
+
         # Group Chunks by document and sum score
+        doc_uuids = list(
+            dict.fromkeys(chunk.properties["doc_uuid"] for chunk in chunks)
+        )
+        stored_documents = await weaviate_manager.get_documents_by_ids(
+            client, doc_uuids, ["title", "metadata"]
+        )
         doc_map = {}
         scores = [0]
         for chunk in chunks:
-            if chunk.properties["doc_uuid"] not in doc_map:
-                document = await weaviate_manager.get_document(
-                    client, chunk.properties["doc_uuid"]
-                )
-                if document is None:
-                    continue
-                doc_map[chunk.properties["doc_uuid"]] = {
+            doc_uuid = chunk.properties["doc_uuid"]
+            if doc_uuid not in stored_documents:
+                continue
+            if doc_uuid not in doc_map:
+                document = stored_documents[doc_uuid]
+                doc_map[doc_uuid] = {
                     "title": document["title"],
                     "chunks": [],
                     "score": 0,
                     "metadata": document["metadata"],
                 }
-            doc_map[chunk.properties["doc_uuid"]]["chunks"].append(
+            doc_map[doc_uuid]["chunks"].append(
                 {
                     "uuid": str(chunk.uuid),
                     "score": chunk.metadata.score,
                     "chunk_id": chunk.properties["chunk_id"],
                     "content": chunk.properties["content"],
+                    "page": int(chunk.properties.get("page") or 0),
+                    "tokens": int(chunk.properties.get("tokens") or 0),
+                    "embedder": chunk.properties.get("embedder", embedder),
                 }
             )
-            doc_map[chunk.properties["doc_uuid"]]["score"] += chunk.metadata.score
+            doc_map[doc_uuid]["score"] += chunk.metadata.score
             scores.append(chunk.metadata.score)
         min_score = min(scores)
         max_score = max(scores)
@@ -110,55 +273,78 @@ class WindowRetriever(Retriever):
         def normalize_value(value, max_value, min_value):
             return (value - min_value) / (max_value - min_value)
 
-        def generate_window_list(value, window):
-
-            value = int(value)
-            window = int(window)
-            # Create a range of values around the given value, excluding the original value
-            return [i for i in range(value - window, value + window + 1) if i != value]
-
-        documents = []
-        context_documents = []
-
+        # Collect the windows of all documents first so they're fetched together
+        chunk_ranges = {}
+        page_windows = {}
         for doc in doc_map:
-            additional_chunk_ids = []
-            chunks_above_threshold = 0
             for chunk in doc_map[doc]["chunks"]:
                 normalized_score = normalize_value(
                     float(chunk["score"]), float(max_score), float(min_score)
                 )
                 if window_threshold <= normalized_score:
-                    chunks_above_threshold += 1
-                    additional_chunk_ids += generate_window_list(
-                        chunk["chunk_id"], window
-                    )
-            unique_chunk_ids = set(additional_chunk_ids)
-
-            if len(unique_chunk_ids) > 0:
-                additional_chunks = await weaviate_manager.get_chunk_by_ids(
-                    client, embedder, doc, unique_chunk_ids
+                    if window_mode == "Pages" and chunk["page"] > 0:
+                        page_windows.setdefault((chunk["embedder"], doc), set()).add(
+                            chunk["page"]
+                        )
+                    elif window > 0:
+                        chunk_id = int(chunk["chunk_id"])
+                        chunk_ranges.setdefault(chunk["embedder"], {}).setdefault(
+                            doc, []
+                        ).append((max(0, chunk_id - window), chunk_id + window))
+
+        window_embedders = list(chunk_ranges) + [
+            _embedder for _embedder, _ in page_windows
+        ]
+        window_results = await asyncio.gather(
+            *[
+                weaviate_manager.get_chunks_by_ranges(client, _embedder, ranges)
+                for _embedder, ranges in chunk_ranges.items()
+            ],
+            *[
+                weaviate_manager.get_chunks_by_pages(
+                    client, _embedder, doc, sorted(pages)
+                )
+                for (_embedder, doc), pages in page_windows.items()
+            ],
+        )
+        additional_chunks = {}
+        for _embedder, result in zip(window_embedders, window_results):
+            for chunk in result or []:
+                additional_chunks.setdefault(chunk.properties["doc_uuid"], []).append(
+                    (_embedder, chunk)
                 )
+
+        documents = []
+        context_documents = []
+
+        for doc in doc_map:
+            if doc in additional_chunks:
                 existing_chunk_ids = set(
-                    chunk["chunk_id"] for chunk in doc_map[doc]["chunks"]
+                    (chunk["embedder"], chunk["chunk_id"])
+                    for chunk in doc_map[doc]["chunks"]
                 )
-                for chunk in additional_chunks:
-                    if chunk.properties["chunk_id"] not in existing_chunk_ids:
+                for _embedder, chunk in additional_chunks[doc]:
+                    key = (_embedder, chunk.properties["chunk_id"])
+                    if key not in existing_chunk_ids:
                         doc_map[doc]["chunks"].append(
                             {
                                 "uuid": str(chunk.uuid),
                                 "score": 0,
                                 "chunk_id": chunk.properties["chunk_id"],
                                 "content": chunk.properties["content"],
+                                "page": int(chunk.properties.get("page") or 0),
+                                "tokens": int(chunk.properties.get("tokens") or 0),
+                                "embedder": _embedder,
                             }
                         )
-                        existing_chunk_ids.add(chunk.properties["chunk_id"])
+                        existing_chunk_ids.add(key)
 
             _chunks = [
                 {
                     "uuid": str(chunk["uuid"]),
                     "score": chunk["score"],
                     "chunk_id": chunk["chunk_id"],
-                    "embedder": embedder,
+                    "embedder": chunk["embedder"],
                 }
                 for chunk in doc_map[doc]["chunks"]
             ]
@@ -168,7 +354,9 @@ class WindowRetriever(Retriever):
                     "score": chunk["score"],
                     "content": chunk["content"],
                     "chunk_id": chunk["chunk_id"],
-                    "embedder": embedder,
+                    "page": chunk["page"],
+                    "tokens": chunk["tokens"],
+                    "embedder": chunk["embedder"],
                 }
                 for chunk in doc_map[doc]["chunks"]
             ]
@@ -200,22 +388,110 @@ class WindowRetriever(Retriever):
         )
         sorted_documents = sorted(documents, key=lambda x: x["score"], reverse=True)
 
-        context = self.combine_context(sorted_context_documents)
+        context = self.combine_context(sorted_context_documents, max_tokens)
         return (sorted_documents, context)
 
-    def combine_context(self, documents: list[dict]) -> str:
+    async def rerank_chunks(self, config: dict, query: str, chunks: list) -> list:
+        """Order chunks by cross-encoder score and keep the top k, on timeout or failure the search order is kept"""
+        top_k = max(1, int(self.get_option(config, "Rerank Top K")))
+        budget = max(0, int(self.get_option(config, "Rerank Budget"))) / 1000
+
+        scores = await rerank_engine.rerank(
+            self.get_option(config, "Rerank Model"),
+            self.get_option(config, "Rerank Backend"),
+            query,
+            [chunk.properties["content"] for chunk in chunks],
+            budget,
+        )
+        if scores is None:
+            return chunks[:top_k]
+
+        for chunk, score in zip(chunks, scores):
+            chunk.metadata.score = score
+        return sorted(chunks, key=lambda chunk: chunk.metadata.score, reverse=True)[
+            :top_k
+        ]
+
+    def get_fanout_timeout(self, config: dict) -> float | None:
+        if self.get_option(config, "Collections") != "All Embedders":
+            return None
+        return max(1, int(self.get_option(config, "Collection Timeout"))) / 1000
 
-        context = ""
+    def requires_vector(self, config: dict) -> bool:
+        return self.get_option(config, "Search Mode") != "Keyword (BM25)"
 
+    def combine_context(
+        self, documents: list[dict], max_tokens: int | None = None
+    ) -> str:
+        """Render the documents as context, with max_tokens only the chunks packed by pack_context are included"""
+        headers = {}
         for document in documents:
-            context += f"Document Title: {document['title']}\n"
+            header = [f"Document Title: {document['title']}\n"]
             if len(document["metadata"]) > 0:
-                context += f"Document Metadata: {document['metadata']}\n"
-            for chunk in document["chunks"]:
-                context += f"Chunk: {int(chunk['chunk_id'])+1}\n"
+                header.append(f"Document Metadata: {document['metadata']}\n")
+            headers[document["uuid"]] = "".join(header)
+
+        packed = None
+        if max_tokens is not None:
+            packed = self.pack_context(documents, headers, max_tokens)
+
+        context = []
+        for document in documents:
+            chunks = [
+                chunk
+                for chunk in document["chunks"]
+                if packed is None or (document["uuid"], chunk["uuid"]) in packed
+            ]
+            if packed is not None and not chunks:
+                continue
+            context.append(headers[document["uuid"]])
+            for chunk in chunks:
+                context.append(f"Chunk: {int(chunk['chunk_id'])+1}\n")
+                if chunk.get("page", 0) > 0:
+                    context.append(f"Page: {chunk['page']}\n")
                 if chunk["score"] > 0:
-                    context += f"High Relevancy: {chunk['score']:.2f}\n"
-                context += f"{chunk['content']}\n"
-            context += "\n\n"
+                    context.append(f"High Relevancy: {chunk['score']:.2f}\n")
+                context.append(f"{chunk['content']}\n")
+            context.append("\n\n")
+
+        return "".join(context)
+
+    def pack_context(
+        self, documents: list[dict], headers: dict[str, str], max_tokens: int
+    ) -> set[tuple[str, str]]:
+        """
+        Greedily pick the chunks that fit into max_tokens, retrieved chunks by score first and window chunks by the score of their document.
+        A document's title and metadata count once, with its first packed chunk.
+        """
+        # Chunks stored before token counts were added are counted now
+        missing = [
+            chunk
+            for document in documents
+            for chunk in document["chunks"]
+            if not chunk.get("tokens")
+        ]
+        missing_tokens = count_tokens([chunk["content"] for chunk in missing])
+        tokens = {id(chunk): count for chunk, count in zip(missing, missing_tokens)}
+        header_tokens = dict(zip(headers, count_tokens(list(headers.values()))))
+
+        candidates = [
+            (rank, document["uuid"], chunk)
+            for rank, document in enumerate(documents)
+            for chunk in document["chunks"]
+        ]
+        candidates.sort(key=lambda candidate: (-candidate[2]["score"], candidate[0]))
+
+        packed = set()
+        packed_documents = set()
+        used = 0
+        for _, doc_uuid, chunk in candidates:
+            # Chunk, page and relevancy lines
+            cost = tokens.get(id(chunk), chunk.get("tokens") or 0) + 16
+            if doc_uuid not in packed_documents:
+                cost += header_tokens[doc_uuid] + 2
+            if used + cost <= max_tokens:
+                packed.add((doc_uuid, chunk["uuid"]))
+                packed_documents.add(doc_uuid)
+                used += cost
 
-        return context
+        return packed
@@ -0,0 +1,203 @@
+import time
+import random
+import asyncio
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+from wasabi import msg
+
+from goldenverba.components.util import get_int_setting
+
+
+class RetryableError(Exception):
+    """Raised by embedders for temporary provider failures that are worth retrying"""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitError(RetryableError):
+    """Raised by embedders when the provider answers with 429 Too Many Requests"""
+
+
+def get_rate_limit(env: str) -> int | None:
+    """Read a per-minute provider limit from the environment, unset or 0 means unlimited"""
+    return get_int_setting(env, None, minimum=0) or None
+
+
+def get_retry_after(headers) -> float | None:
+    """Parse the Retry-After header (seconds or HTTP date) into seconds"""
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("Retry-After")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_date = parsedate_to_datetime(retry_after)
+        return max(0.0, (retry_date - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+async def raise_for_rate_limit(response):
+    """Turn 429 and 5xx responses of an aiohttp response into retryable errors"""
+    if response.status == 429:
+        raise RateLimitError(
+            f"Rate limit exceeded: {await response.text()}",
+            get_retry_after(response.headers),
+        )
+    if response.status in (500, 502, 503, 504):
+        raise RetryableError(
+            f"Provider unavailable ({response.status}): {await response.text()}",
+            get_retry_after(response.headers),
+        )
+
+
+def estimate_tokens(content: list[str]) -> int:
+    """Rough token count used for tokens-per-minute limits"""
+    return sum(len(text) for text in content) // 4 + 1
+
+
+class TokenBucket:
+    """Token bucket that refills continuously up to one minute worth of tokens"""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        amount = min(amount, self.capacity)
+        while True:
+            self.refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class EmbeddingScheduler:
+    """
+    Schedules embedding batches for one provider.
+    Requests and tokens per minute are limited with token buckets, the number of concurrent requests adapts
+    with AIMD (additive increase on success, halved on rate limits), and failed batches are retried with
+    Retry-After aware exponential backoff while the other batches keep going.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+        max_concurrency: int | None = None,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.name = name
+        self.request_bucket = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        )
+        self.max_concurrency = max_concurrency or get_int_setting(
+            "VERBA_EMBED_MAX_CONCURRENCY", 8
+        )
+        self.concurrency = float(self.max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.in_flight = 0
+        self.pause_until = 0.0
+        self.condition: asyncio.Condition | None = None
+        self.loop = None
+
+    def get_condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self.condition = asyncio.Condition()
+            self.in_flight = 0
+        return self.condition
+
+    async def acquire_slot(self):
+        condition = self.get_condition()
+        while True:
+            pause = self.pause_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            async with condition:
+                await condition.wait_for(
+                    lambda: self.in_flight < max(1, int(self.concurrency))
+                )
+                if self.pause_until <= time.monotonic():
+                    self.in_flight += 1
+                    return
+
+    async def release_slot(self):
+        condition = self.get_condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    def on_success(self):
+        self.concurrency = min(
+            self.max_concurrency, self.concurrency + 1 / max(1.0, self.concurrency)
+        )
+
+    def on_retry(self, error: RetryableError, attempt: int) -> float:
+        self.concurrency = max(1.0, self.concurrency / 2)
+        if error.retry_after is not None:
+            delay = min(self.max_delay, error.retry_after)
+        else:
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+            delay *= random.uniform(0.5, 1.0)
+        self.pause_until = max(self.pause_until, time.monotonic() + delay)
+        return delay
+
+    async def submit(self, func, batch: list[str]):
+        """Run func(batch) within the limits, retrying only this batch on retryable errors"""
+        attempt = 0
+        while True:
+            await self.acquire_slot()
+            try:
+                if self.request_bucket is not None:
+                    await self.request_bucket.acquire(1)
+                if self.token_bucket is not None:
+                    await self.token_bucket.acquire(estimate_tokens(batch))
+                result = await func(batch)
+                self.on_success()
+                return result
+            except RetryableError as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise Exception(
+                        f"{self.name} batch failed after {self.max_retries} retries: {str(e)}"
+                    )
+                delay = self.on_retry(e, attempt)
+                msg.warn(
+                    f"{self.name}: {str(e)[:200]} | retrying batch in {delay:.1f}s (concurrency {int(self.concurrency)})"
+                )
+            finally:
+                await self.release_slot()
+
+    async def map(self, func, batches: list[list[str]]) -> list:
+        """Run all batches, returns results or exceptions in batch order"""
+        return await asyncio.gather(
+            *[self.submit(func, batch) for batch in batches], return_exceptions=True
+        )
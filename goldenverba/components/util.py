@@ -1,5 +1,12 @@
 import numpy as np
 import os
+import io
+import base64
+import hashlib
+from functools import lru_cache
+
+from wasabi import msg
+from weaviate.util import generate_uuid5
 
 # Step 1: Standardize the data
 def standardize_data(X):
@@ -46,6 +53,16 @@ def pca(X, k):
     return X_pca
 
 
+def reduce_to_3d(embeddings: list[list[float]]) -> list[list[float]]:
+    """Reduce embeddings to three dimensions for the vector viewer"""
+    if len(embeddings) >= 3:
+        from sklearn.decomposition import PCA
+
+        pca = PCA(n_components=3)
+        return [pca_.tolist() for pca_ in pca.fit_transform(embeddings)]
+    return [embedding[0:3] for embedding in embeddings]
+
+
 def get_environment(config, value: str, env: str, error_msg: str) -> str:
     if value in config:
         token = config[value].value
@@ -55,7 +72,70 @@ def get_environment(config, value: str, env: str, error_msg: str) -> str:
         raise Exception(error_msg)
     return token
 
+def get_int_setting(env: str, default: int | None, minimum: int = 1) -> int | None:
+    """Integer setting from the environment, unset or empty values return the default"""
+    value = os.getenv(env)
+    if value is None or value == "":
+        return default
+    return max(minimum, int(value))
+
+
 def get_token(env: str, default: str = None) -> str:
     # return token, but treat empty string als None
     token = tok if bool(tok := os.getenv(env, None)) else default
-    return token
\ No newline at end of file
+    return token
+def get_data_dir() -> str:
+    """Directory for Verba's local state like caches and import journals"""
+    data_dir = os.getenv("VERBA_DATA_DIR") or os.path.join(
+        os.path.expanduser("~"), ".verba"
+    )
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
+
+
+def get_document_uuid(document) -> str:
+    """Deterministic document UUID derived from title and source"""
+    return generate_uuid5(f"{document.title}\n{document.source}")
+
+
+def get_chunk_uuid(doc_uuid: str, chunk) -> str:
+    """Deterministic chunk UUID derived from its document, position and content"""
+    content_hash = hashlib.sha256(chunk.content.encode("utf-8")).hexdigest()
+    return generate_uuid5(f"{doc_uuid}\n{chunk.chunk_id}\n{content_hash}")
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    """Tokenizer used for chunk token counts and context budgets, None if it can't be loaded"""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        msg.warn(f"Couldn't load the tiktoken encoding, estimating tokens: {str(e)}")
+        return None
+
+
+def count_tokens(texts: list[str]) -> list[int]:
+    """Number of tokens of every text, about four characters per token without tiktoken"""
+    encoding = get_encoding()
+    if encoding is None:
+        return [(len(text) + 3) // 4 for text in texts]
+    return [
+        len(tokens)
+        for tokens in encoding.encode_ordinary_batch(texts, num_threads=4)
+    ]
+
+
+def get_file_source(fileConfig) -> str | bytes:
+    """Path of a spooled upload, or the decoded bytes of a base64 FileConfig"""
+    if fileConfig.file_path is not None:
+        return fileConfig.file_path
+    return base64.b64decode(fileConfig.content)
+
+
+def open_file(fileConfig) -> io.BufferedIOBase:
+    """Binary file object of a spooled upload or a base64 FileConfig"""
+    if fileConfig.file_path is not None:
+        return open(fileConfig.file_path, "rb")
+    return io.BytesIO(base64.b64decode(fileConfig.content))
@@ -4,8 +4,14 @@ from fastapi.responses import FileResponse, JSONResponse
 from contextlib import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
 import asyncio
+import json
 
-from goldenverba.server.helpers import LoggerManager, BatchManager
+from goldenverba.server.helpers import (
+    LoggerManager,
+    BatchManager,
+    UploadManager,
+    purge_stale_uploads,
+)
 from weaviate.client import WeaviateAsyncClient
 
 import os
@@ -16,6 +22,13 @@ from starlette.websockets import WebSocketDisconnect
 from wasabi import msg  # type: ignore[import]
 
 from goldenverba import verba_manager
+from goldenverba.components.executor import process_pool
+from goldenverba.components.http_pool import http_pool
+from goldenverba.components.reranker import rerank_engine
+from goldenverba.components.embedding.SentenceTransformersEmbedder import (
+    engine as sentence_transformers_engine,
+    warmup_sentence_transformers,
+)
 
 from goldenverba.server.types import (
     ResetPayload,
@@ -36,6 +49,7 @@ from goldenverba.server.types import (
     GetChunkPayload,
     GetVectorPayload,
     DataBatchPayload,
+    FileUploadPayload,
     ChunksPayload,
 )
 
@@ -61,8 +75,15 @@ client_manager = verba_manager.ClientManager()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    purge_stale_uploads()
+    await http_pool.start()
+    warmup_sentence_transformers()
     yield
     await client_manager.disconnect()
+    await http_pool.close()
+    sentence_transformers_engine.shutdown()
+    rerank_engine.shutdown()
+    process_pool.shutdown()
 
 
 # FastAPI App
@@ -157,6 +178,7 @@ async def health_check():
             "gtag": tag,
             "deployments": deployments,
             "default_deployment": os.getenv("DEFAULT_DEPLOYMENT", ""),
+            "cache": manager.get_cache_stats(),
         }
     )
 
@@ -247,24 +269,46 @@ async def websocket_import_files(websocket: WebSocket):
     await websocket.accept()
     logger = LoggerManager(websocket)
     batcher = BatchManager()
+    uploader = UploadManager()
 
-    while True:
-        try:
-            data = await websocket.receive_text()
-            batch_data = DataBatchPayload.model_validate_json(data)
-            fileConfig = batcher.add_batch(batch_data)
-            if fileConfig is not None:
-                client = await client_manager.connect(batch_data.credentials)
-                await asyncio.create_task(
-                    manager.import_document(client, fileConfig, logger)
-                )
-
-        except WebSocketDisconnect:
-            msg.warn("Import WebSocket connection closed by client.")
-            break
-        except Exception as e:
-            msg.fail(f"Import WebSocket Error: {str(e)}")
-            break
+    try:
+        while True:
+            try:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+
+                upload = None
+                if message.get("bytes") is not None:
+                    # Binary frame of a spooled upload
+                    upload = uploader.add_frame(message["bytes"])
+                elif "chunk" in (data := json.loads(message["text"])):
+                    # Legacy base64 JSON batches
+                    batch_data = DataBatchPayload.model_validate(data)
+                    fileConfig = batcher.add_batch(batch_data)
+                    if fileConfig is not None:
+                        upload = (fileConfig, batch_data.credentials)
+                else:
+                    upload = uploader.start(FileUploadPayload.model_validate(data))
+
+                if upload is not None:
+                    fileConfig, credentials = upload
+                    try:
+                        client = await client_manager.connect(credentials)
+                        await asyncio.create_task(
+                            manager.import_document(client, fileConfig, logger)
+                        )
+                    finally:
+                        uploader.remove(fileConfig.fileID)
+
+            except WebSocketDisconnect:
+                msg.warn("Import WebSocket connection closed by client.")
+                break
+            except Exception as e:
+                msg.fail(f"Import WebSocket Error: {str(e)}")
+                break
+    finally:
+        uploader.close()
 
 
 ### CONFIG ENDPOINTS
@@ -431,7 +475,12 @@ async def query(payload: QueryPayload):
         client = await client_manager.connect(payload.credentials)
         documents_uuid = [document.uuid for document in payload.documentFilter]
         documents, context = await manager.retrieve_chunks(
-            client, payload.query, payload.RAG, payload.labels, documents_uuid
+            client,
+            payload.query,
+            payload.RAG,
+            payload.labels,
+            documents_uuid,
+            payload.conversation,
         )
 
         return JSONResponse(
@@ -673,7 +722,7 @@ async def delete_document(payload: GetDocumentPayload):
     try:
         client = await client_manager.connect(payload.credentials)
         msg.info(f"Deleting {payload.uuid}")
-        await manager.weaviate_manager.delete_document(client, payload.uuid)
+        await manager.delete_document(client, payload.uuid)
         return JSONResponse(status_code=200, content={})
 
     except Exception as e:
@@ -693,8 +742,10 @@ async def reset_verba(payload: ResetPayload):
         client = await client_manager.connect(payload.credentials)
         if payload.resetMode == "ALL":
             await manager.weaviate_manager.delete_all(client)
+            await manager.forget_crawled_pages()
         elif payload.resetMode == "DOCUMENTS":
             await manager.weaviate_manager.delete_all_documents(client)
+            await manager.forget_crawled_pages()
         elif payload.resetMode == "CONFIG":
             await manager.weaviate_manager.delete_all_configs(client)
         elif payload.resetMode == "SUGGESTIONS":
@@ -1,14 +1,27 @@
+import os
+import time
+import struct
+import tempfile
+
 from fastapi import WebSocket
 from goldenverba.server.types import (
     FileStatus,
     StatusReport,
     DataBatchPayload,
     FileConfig,
+    FileUploadPayload,
+    Credentials,
     CreateNewDocument,
 )
+from goldenverba.components.util import get_data_dir
 from wasabi import msg
 
 
+def get_upload_ttl() -> float:
+    """Seconds after which unfinished uploads are evicted"""
+    return float(os.getenv("VERBA_UPLOAD_TTL", 600))
+
+
 class LoggerManager:
     def __init__(self, socket: WebSocket = None):
         self.socket = socket
@@ -44,10 +57,12 @@ class LoggerManager:
 class BatchManager:
     def __init__(self):
         self.batches = {}
+        self.ttl = get_upload_ttl()
 
     def add_batch(self, payload: DataBatchPayload) -> FileConfig:
         try:
             # msg.info(f"Receiving Batch for {payload.fileID} : {payload.order} of {payload.total}")
+            self.evict_stale()
 
             if payload.fileID not in self.batches:
                 self.batches[payload.fileID] = {
@@ -57,6 +72,7 @@ class BatchManager:
                 }
 
             self.batches[payload.fileID]["chunks"][payload.order] = payload.chunk
+            self.batches[payload.fileID]["updated"] = time.monotonic()
 
             fileConfig = self.check_batch(payload.fileID)
 
@@ -73,7 +89,123 @@ class BatchManager:
         if len(self.batches[fileID]["chunks"].keys()) == self.batches[fileID]["total"]:
             msg.good(f"Collected all Batches of {fileID}")
             chunks = self.batches[fileID]["chunks"]
-            data = "".join([chunks[chunk] for chunk in chunks])
+            data = "".join([chunks[chunk] for chunk in sorted(chunks)])
             return FileConfig.model_validate_json(data)
         else:
             return None
+
+    def evict_stale(self):
+        now = time.monotonic()
+        for fileID in list(self.batches):
+            if now - self.batches[fileID].get("updated", now) > self.ttl:
+                msg.warn(f"Evicting stale upload {fileID} from BatchManager")
+                del self.batches[fileID]
+
+
+class FileUpload:
+    def __init__(self, payload: FileUploadPayload, path: str):
+        self.payload = payload
+        self.path = path
+        self.file = open(path, "wb")
+        self.received = 0
+        self.updated = time.monotonic()
+
+
+class UploadManager:
+    """
+    Spools binary file uploads to temporary files, so memory stays bounded regardless of file size.
+    An upload starts with a FileUploadPayload text frame, followed by binary frames that carry
+    a 2 byte big-endian fileID length, the fileID and the next bytes of the file.
+    Uploads that receive no data for VERBA_UPLOAD_TTL seconds are evicted.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory or get_upload_dir()
+        self.ttl = get_upload_ttl()
+        self.uploads: dict[str, FileUpload] = {}
+        self.completed: dict[str, str] = {}
+
+    def start(self, payload: FileUploadPayload):
+        self.evict_stale()
+        self.remove(payload.fileID)
+        file_descriptor, path = tempfile.mkstemp(
+            dir=self.directory, prefix="upload_", suffix=".part"
+        )
+        os.close(file_descriptor)
+        self.uploads[payload.fileID] = FileUpload(payload, path)
+        msg.info(f"Receiving {payload.fileID} ({payload.size} bytes)")
+        return self.check_upload(payload.fileID)
+
+    def add_frame(self, frame: bytes) -> tuple[FileConfig, Credentials] | None:
+        """Append a binary frame, returns the FileConfig and credentials once the file is complete"""
+        (id_length,) = struct.unpack(">H", frame[:2])
+        fileID = frame[2 : 2 + id_length].decode("utf-8")
+        if fileID not in self.uploads:
+            raise Exception(f"Received data for unknown upload {fileID}")
+
+        upload = self.uploads[fileID]
+        data = memoryview(frame)[2 + id_length :]
+        if upload.received + len(data) > upload.payload.size:
+            self.remove(fileID)
+            raise Exception(f"Received more data than announced for {fileID}")
+        upload.file.write(data)
+        upload.received += len(data)
+        upload.updated = time.monotonic()
+        return self.check_upload(fileID)
+
+    def check_upload(self, fileID: str) -> tuple[FileConfig, Credentials] | None:
+        upload = self.uploads[fileID]
+        if upload.received < upload.payload.size:
+            return None
+        upload.file.close()
+        del self.uploads[fileID]
+        self.completed[fileID] = upload.path
+        msg.good(f"Received all bytes of {fileID}")
+
+        fileConfig = upload.payload.fileConfig
+        fileConfig._file_path = upload.path
+        fileConfig.file_size = upload.payload.size
+        return fileConfig, upload.payload.credentials
+
+    def remove(self, fileID: str):
+        """Delete the spooled file of an upload"""
+        if fileID in self.uploads:
+            upload = self.uploads.pop(fileID)
+            upload.file.close()
+            remove_file(upload.path)
+        if fileID in self.completed:
+            remove_file(self.completed.pop(fileID))
+
+    def evict_stale(self):
+        now = time.monotonic()
+        for fileID in list(self.uploads):
+            if now - self.uploads[fileID].updated > self.ttl:
+                msg.warn(f"Evicting stale upload {fileID}")
+                self.remove(fileID)
+
+    def close(self):
+        for fileID in list(self.uploads) + list(self.completed):
+            self.remove(fileID)
+
+
+def get_upload_dir() -> str:
+    directory = os.path.join(get_data_dir(), "uploads")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def purge_stale_uploads():
+    """Remove spooled files left behind by a previous server process"""
+    directory = get_upload_dir()
+    ttl = get_upload_ttl()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if time.time() - os.path.getmtime(path) > ttl:
+            remove_file(path)
@@ -1,5 +1,5 @@
 from typing import Literal
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from enum import Enum
 
 
@@ -149,6 +149,19 @@ class FileConfig(BaseModel):
     status: FileStatus
     metadata: str
     status_report: dict
+    # Set by the server for spooled binary uploads, never parsed from client input
+    _file_path: str | None = PrivateAttr(default=None)
+
+    @property
+    def file_path(self) -> str | None:
+        return self._file_path
+
+
+class FileUploadPayload(BaseModel):
+    fileID: str
+    size: int
+    fileConfig: FileConfig
+    credentials: Credentials
 
 
 class ImportStreamPayload(BaseModel):
@@ -188,6 +201,7 @@ class QueryPayload(BaseModel):
     labels: list[str]
     documentFilter: list[DocumentFilter]
     credentials: Credentials
+    conversation: list[ConversationItem] = []
 
 
 class DatacountPayload(BaseModel):
@@ -1,5 +1,9 @@
 import pytest
-from goldenverba.components.document import Document, create_document
+import pickle
+from goldenverba.components import util
+from goldenverba.components.document import Document, assign_tokens, create_document
+from goldenverba.components.chunk import Chunk
+from goldenverba.components.util import get_chunk_uuid, get_document_uuid
 from goldenverba.server.types import FileConfig
 
 
@@ -97,3 +101,59 @@ def test_arabic_in_content():
     assert doc.content == content
     assert doc.spacy_doc.text == content
     assert doc.spacy_doc.sents is not None
+
+
+def test_spacy_doc_is_lazy():
+    """Test that spaCy processing only happens when spacy_doc is accessed"""
+    doc = Document(content="This is a test document. It has two sentences.")
+    assert doc._spacy_doc is None
+
+    spacy_doc = doc.spacy_doc
+    assert spacy_doc.text == doc.content
+    assert len(list(spacy_doc.sents)) == 2
+    assert doc.spacy_doc is spacy_doc
+
+
+def test_document_pickle_drops_spacy_doc():
+    """Test that documents sent to worker processes don't carry the spaCy Doc"""
+    doc = Document(title="Test Doc", content="This is a test document.")
+    doc.spacy_doc
+    restored_doc = pickle.loads(pickle.dumps(doc))
+
+    assert restored_doc.title == doc.title
+    assert restored_doc._spacy_doc is None
+    assert restored_doc.spacy_doc.text == doc.content
+
+
+def test_deterministic_uuids():
+    """Test that document and chunk UUIDs only depend on their identity and content"""
+    doc = Document(title="Test Doc", content="content", source="local")
+    same_doc = Document(title="Test Doc", content="changed", source="local")
+    other_doc = Document(title="Test Doc", content="content", source="remote")
+
+    assert get_document_uuid(doc) == get_document_uuid(same_doc)
+    assert get_document_uuid(doc) != get_document_uuid(other_doc)
+
+    doc_uuid = get_document_uuid(doc)
+    chunk = Chunk(content="chunk", chunk_id=0)
+    assert get_chunk_uuid(doc_uuid, chunk) == get_chunk_uuid(
+        doc_uuid, Chunk(content="chunk", chunk_id=0)
+    )
+    assert get_chunk_uuid(doc_uuid, chunk) != get_chunk_uuid(
+        doc_uuid, Chunk(content="chunk", chunk_id=1)
+    )
+    assert get_chunk_uuid(doc_uuid, chunk) != get_chunk_uuid(
+        doc_uuid, Chunk(content="other", chunk_id=0)
+    )
+
+
+def test_assign_tokens(monkeypatch):
+    """Test that chunk token counts are set and serialized"""
+    monkeypatch.setattr(util, "get_encoding", lambda: None)
+    document = Document(title="Tokens", content="")
+    document.chunks = [Chunk(content="a" * 40), Chunk(content="short")]
+
+    assign_tokens(document)
+
+    assert [chunk.tokens for chunk in document.chunks] == [10, 2]
+    assert document.chunks[0].to_json()["tokens"] == 10
@@ -0,0 +1,188 @@
+import asyncio
+from types import SimpleNamespace
+
+from goldenverba.components.cache import (
+    CorpusVersions,
+    LocalEmbeddingCache,
+    QueryCache,
+    RetrievalCache,
+    SemanticAnswerCache,
+    get_cache_key,
+)
+
+
+def test_cache_key_depends_on_embedder_model_and_text():
+    key = get_cache_key("OpenAI", "text-embedding-3-small", "Hello")
+    assert key == get_cache_key("OpenAI", "text-embedding-3-small", "Hello")
+    assert key != get_cache_key("OpenAI", "text-embedding-3-large", "Hello")
+    assert key != get_cache_key("Cohere", "text-embedding-3-small", "Hello")
+    assert key != get_cache_key("OpenAI", "text-embedding-3-small", "Hello ")
+
+
+def test_local_cache_roundtrip(tmp_path):
+    cache = LocalEmbeddingCache(path=str(tmp_path / "cache.sqlite"))
+    # Vectors are stored as float32, these values round-trip exactly
+    embeddings = {"a": [0.5, 0.25, 0.125], "b": [1.0, 2.0, 3.0]}
+
+    async def run():
+        await cache.set_many(None, "model", embeddings)
+        return await cache.get_many(None, "model", ["a", "b", "c"])
+
+    assert asyncio.run(run()) == embeddings
+    assert cache.connect().execute(
+        "SELECT length(vector) FROM vectors WHERE key = 'a'"
+    ).fetchone() == (12,)
+    cache.close()
+
+    reopened = LocalEmbeddingCache(path=str(tmp_path / "cache.sqlite"))
+    assert asyncio.run(reopened.get_many(None, "model", ["a"])) == {
+        "a": [0.5, 0.25, 0.125]
+    }
+    reopened.close()
+
+
+def test_local_cache_evicts_least_recently_used(tmp_path):
+    cache = LocalEmbeddingCache(path=str(tmp_path / "cache.sqlite"), max_entries=10)
+
+    async def run():
+        await cache.set_many(None, "model", {str(i): [float(i)] for i in range(10)})
+        await cache.get_many(None, "model", ["0"])
+        await cache.set_many(None, "model", {"new": [1.0]})
+        return await cache.get_many(
+            None, "model", [str(i) for i in range(10)] + ["new"]
+        )
+
+    cached = asyncio.run(run())
+    assert len(cached) == 9
+    assert "0" in cached
+    assert "new" in cached
+    cache.close()
+
+
+def test_query_cache_lru_and_ttl(monkeypatch):
+    cache = QueryCache(max_entries=2, ttl=10)
+    now = [100.0]
+    monkeypatch.setattr("goldenverba.components.cache.time.monotonic", lambda: now[0])
+    key = cache.get_key("OpenAI", "model", "What is  Verba?")
+    assert key == cache.get_key("OpenAI", "model", "what is verba?")
+
+    async def run():
+        assert await cache.lookup(key) is None
+        await cache.store(key, [0.1])
+        await cache.store("b", [0.2])
+        assert await cache.lookup(key) == [0.1]
+        await cache.store("c", [0.3])
+        assert await cache.lookup("b") is None
+        now[0] += 11
+        assert await cache.lookup(key) is None
+
+    asyncio.run(run())
+    assert cache.stats() == {"entries": 1, "hits": 1, "disk_hits": 0, "misses": 3}
+
+
+def test_query_cache_disk_tier(tmp_path):
+    """Test that a second worker finds vectors stored by the first one on disk"""
+    path = str(tmp_path / "query_cache.sqlite")
+    first = QueryCache(disk=LocalEmbeddingCache(path=path))
+    second = QueryCache(disk=LocalEmbeddingCache(path=path))
+
+    async def run():
+        await first.store("key", [0.5, 0.25])
+        return await second.lookup("key")
+
+    assert asyncio.run(run()) == [0.5, 0.25]
+    assert second.disk_hits == 1
+    assert second.get("key") == [0.5, 0.25]
+    first.disk.close()
+    second.disk.close()
+
+
+class FakeClient:
+    pass
+
+
+def test_semantic_answer_cache():
+    """Test that similar queries share documents and answers until the corpus changes"""
+    corpus = CorpusVersions()
+    cache = SemanticAnswerCache(corpus, threshold=0.95)
+    client = FakeClient()
+
+    cache.store(client, "scope", "What is Verba?", [1.0, 0.0], ["doc"], "context")
+    cache.set_answer("What is Verba?", "context", "generator", "Verba is a RAG app")
+
+    entry = cache.lookup(client, "scope", "what's verba", [0.99, 0.05])
+    assert entry.documents == ["doc"]
+    assert cache.get_answer("what's verba", "context", "generator") == (
+        "Verba is a RAG app"
+    )
+    assert cache.get_answer("what's verba", "context", "other generator") is None
+    assert cache.lookup(client, "scope", "Who wrote it?", [0.0, 1.0]) is None
+    assert cache.lookup(client, "other scope", "what's verba", [1.0, 0.0]) is None
+    assert cache.lookup(FakeClient(), "scope", "what's verba", [1.0, 0.0]) is None
+
+    corpus.bump(client)
+    assert cache.lookup(client, "scope", "what's verba", [1.0, 0.0]) is None
+    assert cache.get_answer("What is Verba?", "context", "generator") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_retrieval_cache_is_invalidated_by_corpus_changes():
+    corpus = CorpusVersions()
+    cache = RetrievalCache(corpus, max_entries=2)
+    client = FakeClient()
+
+    cache.set(client, "query", (["doc"], "context"))
+    assert cache.get(client, "query") == (["doc"], "context")
+    assert cache.get(FakeClient(), "query") is None
+
+    corpus.bump(client)
+    assert cache.get(client, "query") is None
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 2}
+
+
+def test_corpus_generation_is_shared_per_deployment(tmp_path):
+    """Test that a write through one worker's client invalidates the cache of another worker"""
+    path = str(tmp_path / "corpus_versions.sqlite")
+    writer, reader = CorpusVersions(path), CorpusVersions(path, ttl=0)
+    cache = RetrievalCache(reader)
+    client = FakeClient()
+    client._connection = SimpleNamespace(url="http://localhost:8080")
+    other = FakeClient()
+    other._connection = SimpleNamespace(url="http://localhost:8080")
+    elsewhere = FakeClient()
+    elsewhere._connection = SimpleNamespace(url="http://weaviate:8080")
+
+    cache.set(client, "query", (["doc"], "context"))
+    writer.bump(elsewhere)
+    assert cache.get(client, "query") == (["doc"], "context")
+
+    writer.bump(other)
+    assert reader.get(client) == 1
+    assert cache.get(client, "query") is None
+    writer.close()
+    reader.close()
+
+
+def test_corpus_generation_is_cached_and_written_off_the_loop(tmp_path):
+    """Test that bumps on the event loop are seen at once and written in the background"""
+    path = str(tmp_path / "corpus_versions.sqlite")
+    writer, reader = CorpusVersions(path), CorpusVersions(path, ttl=3600)
+    client = FakeClient()
+    client._connection = SimpleNamespace(url="http://localhost:8080")
+    assert reader.get(client) == 0
+
+    async def bump():
+        for _ in range(3):
+            writer.bump(client)
+        assert writer.get(client) == 3
+        while writer.pending:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(bump())
+    assert CorpusVersions(path).get(client) == 3
+    # Other workers' writes are only read again once the generation expired
+    assert reader.get(client) == 0
+    reader.cached.clear()
+    assert reader.get(client) == 3
+    writer.close()
+    reader.close()
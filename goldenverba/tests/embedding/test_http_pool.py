@@ -0,0 +1,67 @@
+import asyncio
+
+from aiohttp import web
+
+from goldenverba.components.embedding.OllamaEmbedder import OllamaEmbedder
+from goldenverba.components.http_pool import http_pool
+from goldenverba.components.types import InputConfig
+
+
+async def serve_embeddings(connections: list):
+    """Local stand-in for the Ollama embed endpoint that records client connections"""
+
+    async def handle(request: web.Request):
+        connections.append(request.transport.get_extra_info("peername"))
+        data = await request.json()
+        return web.json_response({"embeddings": [[0.1, 0.2]] * len(data["input"])})
+
+    app = web.Application()
+    app.router.add_post("/api/embed", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def embed_batches(shared: bool) -> list:
+    connections = []
+
+    async def run():
+        runner, url = await serve_embeddings(connections)
+        if shared:
+            await http_pool.start()
+        try:
+            embedder = OllamaEmbedder.__new__(OllamaEmbedder)
+            embedder.url = url
+            config = {
+                "Model": InputConfig(
+                    type="dropdown", value="model", description="", values=[]
+                )
+            }
+            for _ in range(3):
+                embeddings = await embedder.vectorize(config, ["a", "b"])
+                assert embeddings == [[0.1, 0.2], [0.1, 0.2]]
+        finally:
+            await http_pool.close()
+            await runner.cleanup()
+
+    asyncio.run(run())
+    return connections
+
+
+def test_shared_session_reuses_connections():
+    """Test that started pools keep connections alive across requests"""
+    connections = embed_batches(shared=True)
+
+    assert len(connections) == 3
+    assert len(set(connections)) == 1
+
+
+def test_session_outside_the_pool_loop():
+    """Test that components still work when the pool wasn't started on the running loop"""
+    connections = embed_batches(shared=False)
+
+    assert len(connections) == 3
+    assert len(set(connections)) == 3
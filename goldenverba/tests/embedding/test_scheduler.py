@@ -0,0 +1,55 @@
+import asyncio
+
+from goldenverba.components.scheduler import (
+    EmbeddingScheduler,
+    RateLimitError,
+    get_retry_after,
+)
+
+
+def test_scheduler_retries_only_failed_batches():
+    scheduler = EmbeddingScheduler("Fake", max_concurrency=4)
+    calls = []
+
+    async def vectorize(batch):
+        calls.append(batch[0])
+        if batch[0] == "b" and calls.count("b") == 1:
+            raise RateLimitError("Too many requests", retry_after=0.01)
+        return [[1.0] for _ in batch]
+
+    results = asyncio.run(scheduler.map(vectorize, [["a"], ["b"], ["c"]]))
+
+    assert results == [[[1.0]], [[1.0]], [[1.0]]]
+    assert calls.count("a") == 1
+    assert calls.count("b") == 2
+    assert calls.count("c") == 1
+    assert scheduler.concurrency < 4
+
+
+def test_scheduler_limits_concurrency_and_gives_up():
+    scheduler = EmbeddingScheduler("Fake", max_concurrency=2, max_retries=1)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def vectorize(batch):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if batch[0] == "broken":
+            raise RateLimitError("Too many requests", retry_after=0)
+        return [[1.0]]
+
+    batches = [["ok"] for _ in range(6)] + [["broken"]]
+    results = asyncio.run(scheduler.map(vectorize, batches))
+
+    assert max_in_flight <= 2
+    assert all(result == [[1.0]] for result in results[:6])
+    assert isinstance(results[6], Exception)
+
+
+def test_get_retry_after():
+    assert get_retry_after({"Retry-After": "3"}) == 3.0
+    assert get_retry_after({"retry-after-ms": "500"}) == 0.5
+    assert get_retry_after({}) is None
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from goldenverba.components.embedding import SentenceTransformersEmbedder as module
+from goldenverba.components.embedding.SentenceTransformersEmbedder import (
+    SentenceTransformersEmbedder,
+    SentenceTransformersEngine,
+)
+
+
+class FakeModel:
+    def __init__(self, name: str, loads: list):
+        self.name = name
+        self.threads = set()
+        loads.append(name)
+
+    def encode(self, content, batch_size=32, normalize_embeddings=False, **kwargs):
+        self.threads.add(threading.current_thread().name)
+        vectors = np.array([[3.0, 4.0]] * len(content))
+        if normalize_embeddings:
+            vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+
+def test_models_are_cached_and_encoded_off_loop(monkeypatch):
+    """Test that models load once, the least recently used is evicted and encoding runs on the pool"""
+    loads = []
+    monkeypatch.setattr(
+        module, "create_model", lambda name, backend: FakeModel(name, loads)
+    )
+    engine = SentenceTransformersEngine(max_models=2, max_workers=1)
+    monkeypatch.setattr(module, "engine", engine)
+    embedder = SentenceTransformersEmbedder()
+    config = dict(embedder.config)
+
+    async def vectorize(model_name: str, normalize: bool = False):
+        config["Model"] = config["Model"].model_copy(update={"value": model_name})
+        config["Normalize"] = config["Normalize"].model_copy(
+            update={"value": normalize}
+        )
+        return await embedder.vectorize(config, ["a", "b"])
+
+    async def run():
+        assert await vectorize("first") == [[3.0, 4.0], [3.0, 4.0]]
+        assert await vectorize("first", normalize=True) == [[0.6, 0.8], [0.6, 0.8]]
+        await vectorize("second")
+        await vectorize("third")
+        await vectorize("second")
+
+    asyncio.run(run())
+
+    assert loads == ["first", "second", "third"]
+    assert list(engine.models) == [("third", "Torch"), ("second", "Torch")]
+    assert all(
+        thread.startswith("verba-st")
+        for model in engine.models.values()
+        for thread in model.threads
+    )
+    engine.shutdown()
@@ -0,0 +1,66 @@
+import asyncio
+from types import SimpleNamespace
+
+from weaviate.collections.classes.data import DataObject
+
+from goldenverba.components.batching import AdaptiveBatcher
+
+
+class FakeCollection:
+    def __init__(self):
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.data = self
+
+    async def insert_many(self, objects):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        self.batches.append(len(objects))
+        errors = {
+            i: SimpleNamespace(message=f"invalid {obj.properties['content']}")
+            for i, obj in enumerate(objects)
+            if obj.properties["content"] == "bad"
+        }
+        return SimpleNamespace(errors=errors)
+
+
+def test_batcher_shares_batches_across_documents():
+    """Test that objects of many documents are sent in few batches with per-object errors"""
+    collection = FakeCollection()
+
+    async def run():
+        batcher = AdaptiveBatcher(collection, batch_size=10, max_in_flight=2)
+        futures = []
+        for i in range(20):
+            contents = ["bad" if i == 7 and j == 1 else f"{i}-{j}" for j in range(3)]
+            futures.append(
+                await batcher.add(
+                    [DataObject(properties={"content": c}) for c in contents]
+                )
+            )
+        await batcher.flush()
+        return [future.result() for future in futures]
+
+    results = asyncio.run(run())
+
+    assert sum(collection.batches) == 60
+    assert len(collection.batches) < 20
+    assert collection.max_in_flight <= 2
+    assert results[7] == ["invalid bad"]
+    assert all(errors == [] for i, errors in enumerate(results) if i != 7)
+
+
+def test_batcher_flushes_on_timer():
+    """Test that a partially filled batch is sent after the flush interval"""
+    collection = FakeCollection()
+
+    async def run():
+        batcher = AdaptiveBatcher(collection, batch_size=100, flush_interval=0.01)
+        future = await batcher.add([DataObject(properties={"content": "a"})])
+        return await asyncio.wait_for(future, 1)
+
+    assert asyncio.run(run()) == []
+    assert collection.batches == [1]
@@ -0,0 +1,291 @@
+import asyncio
+from types import SimpleNamespace
+
+from goldenverba.components.chunk import Chunk
+from goldenverba.components.document import Document
+from goldenverba.components.journal import ImportJournal
+from goldenverba.components.pipeline import ImportPipeline
+from goldenverba.components.util import get_int_setting
+from goldenverba.server.helpers import LoggerManager
+from goldenverba.server.types import FileConfig, FileStatus, RAGComponentClass
+
+
+class FakeImporter:
+    def __init__(self, manager):
+        self.manager = manager
+
+    async def add(self, document):
+        manager = self.manager
+        manager.in_flight += 1
+        manager.max_in_flight = max(manager.max_in_flight, manager.in_flight)
+        await asyncio.sleep(0.01)
+        manager.in_flight -= 1
+        completion = asyncio.get_running_loop().create_future()
+        if document.title in manager.failing:
+            completion.set_result(["insert failed"])
+        else:
+            manager.imported.append(document.title)
+            completion.set_result([])
+        return document.title, completion
+
+    async def flush(self):
+        pass
+
+
+class FakeWeaviateManager:
+    def __init__(self):
+        self.imported = []
+        self.rolled_back = []
+        self.failing = {"broken"}
+        self.updated = {}
+        self.stored = {}
+        self.deleted = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create_importer(self, client, embedder):
+        return FakeImporter(self)
+
+    async def delete_document(self, client, uuid):
+        self.deleted.append(uuid)
+        del self.stored[uuid]
+
+    async def rollback_document(self, client, uuid, embedder):
+        self.rolled_back.append(uuid)
+
+    async def exist_document_name(self, client, name):
+        return name if name in self.stored else None
+
+    async def get_stored_chunks(self, client, uuid, embedder):
+        return "", [
+            SimpleNamespace(
+                uuid=f"{uuid}-{i}",
+                properties={"content": content, "chunk_id": i, "pca": [i, 0, 0]},
+                vector={"default": [i, 1.0, 0.5]},
+            )
+            for i, content in enumerate(self.stored[uuid])
+        ]
+
+    async def update_document(
+        self, client, uuid, document, embedder, kept_chunks, removed_chunks
+    ):
+        self.updated[uuid] = (
+            {i: stored.uuid for i, stored in kept_chunks.items()},
+            removed_chunks,
+        )
+
+
+class FakeChunkerManager:
+    async def chunk(self, chunker, fileConfig, documents, embedder, logger):
+        for document in documents:
+            document.chunks = [
+                Chunk(content=content, chunk_id=i)
+                for i, content in enumerate(document.content.split("\n"))
+            ]
+        return documents
+
+
+class FakeEmbeddingManager:
+    def __init__(self):
+        self.embedders = {"Fake": None}
+        self.embedded = []
+
+    async def vectorize(self, embedder, fileConfig, documents, logger, client=None):
+        await asyncio.sleep(0.01)
+        for document in documents:
+            for chunk in document.chunks:
+                chunk.vector = [0.1, 0.2, 0.3]
+                self.embedded.append(chunk.content)
+        return documents
+
+
+class FakeManager:
+    def __init__(self):
+        self.weaviate_manager = FakeWeaviateManager()
+        self.chunker_manager = FakeChunkerManager()
+        self.embedder_manager = FakeEmbeddingManager()
+
+
+def create_file_config() -> FileConfig:
+    component = {
+        "name": "Fake",
+        "variables": [],
+        "library": [],
+        "description": "",
+        "config": {
+            "Model": {"type": "text", "value": "fake", "description": "", "values": []}
+        },
+        "type": "",
+        "available": True,
+    }
+    rag_component = RAGComponentClass(selected="Fake", components={"Fake": component})
+    return FileConfig(
+        fileID="test",
+        filename="test",
+        isURL=True,
+        overwrite=False,
+        extension="",
+        source="",
+        content="",
+        labels=[],
+        rag_config={"Chunker": rag_component, "Embedder": rag_component},
+        file_size=0,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+
+
+def test_pipeline_imports_all_documents():
+    """Test that every document passes through all stages with bounded queues"""
+    manager = FakeManager()
+    pipeline = ImportPipeline(manager, concurrency=2, queue_size=1)
+    documents = [Document(title=f"doc {i}", content=f"content {i}") for i in range(10)]
+
+    tasks = asyncio.run(
+        pipeline.run(None, documents, create_file_config(), LoggerManager())
+    )
+
+    assert len(tasks) == 10
+    assert all(task.error is None for task in tasks)
+    assert all(task.chunk_count == 1 for task in tasks)
+    assert sorted(manager.weaviate_manager.imported) == sorted(
+        document.title for document in documents
+    )
+    assert manager.weaviate_manager.max_in_flight <= 2
+
+
+def test_pipeline_reads_streamed_documents_lazily():
+    """Test that a document stream is only read as fast as the documents are imported"""
+    manager = FakeManager()
+    pipeline = ImportPipeline(manager, concurrency=1, queue_size=1)
+    in_pipeline = []
+    pending_completions = []
+
+    async def stream():
+        for i in range(20):
+            in_pipeline.append(i + 1 - len(manager.weaviate_manager.imported))
+            yield Document(title=f"doc {i}", content=f"content {i}")
+
+    complete = pipeline.complete
+
+    async def track_completions(run, task, doc_uuid, completion):
+        pending_completions.append(len(run.completions))
+        await complete(run, task, doc_uuid, completion)
+
+    pipeline.complete = track_completions
+    tasks = asyncio.run(
+        pipeline.run(None, stream(), create_file_config(), LoggerManager())
+    )
+
+    assert len(tasks) == 20
+    assert all(task.error is None for task in tasks)
+    # Three queues and three workers hold one document each
+    assert max(in_pipeline) <= 7
+    # Finished completions don't pile up
+    assert max(pending_completions) <= 2
+
+
+def test_pipeline_reports_failed_documents():
+    """Test that a failing document doesn't stop the other documents"""
+    manager = FakeManager()
+    pipeline = ImportPipeline(manager, concurrency=2, queue_size=2)
+    documents = [
+        Document(title="broken", content="content"),
+        Document(title="working", content="content"),
+    ]
+
+    tasks = asyncio.run(
+        pipeline.run(None, documents, create_file_config(), LoggerManager())
+    )
+    errors = {task.document.title: task.error for task in tasks}
+
+    assert errors["working"] is None
+    assert "insert failed" in str(errors["broken"])
+    assert manager.weaviate_manager.rolled_back == ["broken"]
+
+
+def test_pipeline_updates_changed_chunks_only():
+    """Test that overwriting a document only embeds new chunks and removes vanished ones"""
+    manager = FakeManager()
+    manager.weaviate_manager.stored["manual"] = ["intro", "setup", "usage"]
+    pipeline = ImportPipeline(manager)
+    pipeline.incremental = True
+    fileConfig = create_file_config()
+    fileConfig.overwrite = True
+    document = Document(title="manual", content="intro\nnew setup\nusage")
+
+    tasks = asyncio.run(pipeline.run(None, [document], fileConfig, LoggerManager()))
+
+    assert tasks[0].error is None
+    assert manager.embedder_manager.embedded == ["new setup"]
+    kept_chunks, removed_chunks = manager.weaviate_manager.updated["manual"]
+    assert kept_chunks == {0: "manual-0", 2: "manual-2"}
+    assert removed_chunks == ["manual-1"]
+    assert manager.weaviate_manager.imported == []
+
+
+def test_pipeline_resumes_interrupted_import(tmp_path):
+    """Test that documents imported by an earlier attempt are skipped"""
+    manager = FakeManager()
+    journal = ImportJournal(path=str(tmp_path / "journal.sqlite"))
+    pipeline = ImportPipeline(manager, journal=journal)
+    fileConfig = create_file_config()
+
+    def create_documents():
+        return [
+            Document(title="broken", content="content"),
+            Document(title="working", content="content"),
+        ]
+
+    tasks = asyncio.run(
+        pipeline.run(None, create_documents(), fileConfig, LoggerManager())
+    )
+    assert [task.error is None for task in tasks].count(True) == 1
+    assert manager.embedder_manager.embedded == ["content", "content"]
+
+    manager.weaviate_manager.failing = set()
+    tasks = asyncio.run(
+        pipeline.run(None, create_documents(), fileConfig, LoggerManager())
+    )
+    skipped = {task.document.title: task.skipped for task in tasks}
+
+    assert all(task.error is None for task in tasks)
+    assert skipped == {"broken": False, "working": True}
+    assert manager.embedder_manager.embedded == ["content", "content", "content"]
+    assert asyncio.run(journal.start(fileConfig)) == {}
+    journal.close()
+
+
+def test_pipeline_resume_respects_overwrite(tmp_path):
+    """Test that a retried import doesn't replace a document it never wrote"""
+    manager = FakeManager()
+    manager.weaviate_manager.stored = {"existing": ["content"]}
+    journal = ImportJournal(path=str(tmp_path / "journal.sqlite"))
+    pipeline = ImportPipeline(manager, journal=journal)
+    fileConfig = create_file_config()
+
+    for _ in range(2):
+        tasks = asyncio.run(
+            pipeline.run(
+                None,
+                [Document(title="existing", content="new content")],
+                fileConfig,
+                LoggerManager(),
+            )
+        )
+        assert "already exists" in str(tasks[0].error)
+
+    assert manager.weaviate_manager.deleted == []
+    assert manager.weaviate_manager.imported == []
+    journal.close()
+
+
+def test_get_int_setting(monkeypatch):
+    monkeypatch.setenv("VERBA_TEST_SETTING", "")
+    assert get_int_setting("VERBA_TEST_SETTING", 4) == 4
+    monkeypatch.setenv("VERBA_TEST_SETTING", "-3")
+    assert get_int_setting("VERBA_TEST_SETTING", 4) == 1
+    assert get_int_setting("VERBA_TEST_SETTING", 4, minimum=0) == 0
+    monkeypatch.setenv("VERBA_TEST_SETTING", "12")
+    assert get_int_setting("VERBA_TEST_SETTING", 4) == 12
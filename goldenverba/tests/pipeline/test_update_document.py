@@ -0,0 +1,275 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from uuid import NAMESPACE_URL, uuid5
+
+from goldenverba.components.managers import WeaviateManager
+from goldenverba.components.pipeline import ImportPipeline
+from goldenverba.components.document import Document
+from goldenverba.components.util import get_chunk_uuid
+from goldenverba.server.helpers import LoggerManager
+from goldenverba.tests.pipeline.test_pipeline import (
+    FakeChunkerManager,
+    FakeEmbeddingManager,
+    create_file_config,
+)
+
+
+class FakeCollection:
+    """Returns only the requested properties, like Weaviate does"""
+
+    def __init__(self):
+        self.objects = {}
+        self.updates = []
+        self.inserts = []
+        self.deletes = []
+        self.filters = []
+        self.query = SimpleNamespace(
+            fetch_objects=self.fetch_objects,
+            fetch_object_by_id=self.fetch_object_by_id,
+        )
+        self.data = SimpleNamespace(
+            exists=self.exists,
+            update=self.update,
+            insert_many=self.insert_many,
+            delete_many=self.delete_many,
+        )
+        self.aggregate = SimpleNamespace(over_all=self.over_all)
+
+    def view(self, stored, return_properties=None, include_vector=False):
+        return SimpleNamespace(
+            uuid=stored.uuid,
+            properties={
+                key: value
+                for key, value in stored.properties.items()
+                if return_properties is None or key in return_properties
+            },
+            vector=stored.vector if include_vector else {},
+        )
+
+    async def fetch_objects(
+        self, filters=None, limit=None, sort=None, return_properties=None, **kwargs
+    ):
+        self.filters.append(filters)
+        if "after" in kwargs:
+            assert filters is None, "The cursor can't be combined with filters"
+            objects = sorted(self.objects.values(), key=lambda stored: stored.uuid)
+            objects = [
+                stored
+                for stored in objects
+                if kwargs["after"] is None or stored.uuid > kwargs["after"]
+            ]
+        else:
+            objects = sorted(
+                self.objects.values(), key=lambda stored: stored.properties["chunk_id"]
+            )
+        if filters is not None and filters.target == "_id":
+            uuids = {str(uuid) for uuid in filters.value}
+            objects = [stored for stored in objects if stored.uuid in uuids]
+        if limit is not None:
+            offset = kwargs.get("offset") or 0
+            objects = objects[offset : offset + limit]
+        return SimpleNamespace(
+            objects=[
+                self.view(stored, return_properties, kwargs.get("include_vector"))
+                for stored in objects
+            ]
+        )
+
+    async def fetch_object_by_id(self, uuid, return_properties=None):
+        return self.view(self.objects[uuid], return_properties)
+
+    async def exists(self, uuid):
+        return uuid in self.objects
+
+    async def update(self, uuid, properties):
+        self.updates.append(uuid)
+        self.objects[uuid].properties.update(properties)
+
+    async def insert_many(self, objects):
+        self.inserts.extend(objects)
+        for inserted in objects:
+            self.objects[inserted.uuid] = SimpleNamespace(
+                uuid=inserted.uuid,
+                properties=dict(inserted.properties),
+                vector={"default": inserted.vector},
+            )
+        return SimpleNamespace(has_errors=False, errors={})
+
+    async def delete_many(self, where):
+        self.deletes.append(where)
+        if where.target == "_id":
+            for uuid in where.value:
+                self.objects.pop(str(uuid), None)
+
+    async def over_all(self, total_count=True):
+        return SimpleNamespace(total_count=len(self.objects))
+
+
+class FakeClient:
+    def __init__(self):
+        self.collections = SimpleNamespace(
+            exists=self.exists, get=self.get, create=self.create
+        )
+        self.stored = {}
+
+    async def exists(self, name):
+        return True
+
+    async def create(self, name):
+        return self.get(name)
+
+    def get(self, name):
+        return self.stored.setdefault(name, FakeCollection())
+
+
+def store_document(client: FakeClient, title: str, lines: list[str], chunk_uuid=None):
+    meta = {"Embedder": {"config": {"Model": {"value": "fake"}}}}
+    client.get("VERBA_DOCUMENTS").objects[title] = SimpleNamespace(
+        uuid=title,
+        properties={
+            "title": title,
+            "meta": json.dumps(meta),
+            "metadata": "",
+            "chunk_id": 0,
+        },
+        vector={},
+    )
+    chunks = client.get("VERBA_Embedding_fake")
+    for i, line in enumerate(lines):
+        uuid = chunk_uuid(i, line) if chunk_uuid else f"{title}-{i}"
+        chunks.objects[uuid] = SimpleNamespace(
+            uuid=uuid,
+            properties={
+                "content": line,
+                "doc_uuid": title,
+                "chunk_id": i,
+                "start_i": 0,
+                "end_i": 0,
+                "content_without_overlap": "",
+                "title": title,
+                "labels": [],
+                "page": 0,
+                "tokens": 0,
+                "pca": [float(i), 0.0, 0.0],
+            },
+            vector={"default": [float(i), 1.0, 0.5]},
+        )
+    return chunks
+
+
+def store_sources(client: FakeClient, sources: dict[str, str]):
+    """Store empty documents with the given title -> source under real UUIDs"""
+    documents = client.get("VERBA_DOCUMENTS")
+    for title, source in sources.items():
+        store_document(client, title, [])
+        document = documents.objects.pop(title)
+        document.uuid = str(uuid5(NAMESPACE_URL, title))
+        document.properties["source"] = source
+        documents.objects[document.uuid] = document
+    return documents
+
+
+def test_unchanged_reimport_issues_no_updates():
+    """Test that re-importing an unchanged document doesn't write any chunk"""
+    client = FakeClient()
+    chunks = store_document(client, "manual", ["first", "second", "third"])
+    manager = SimpleNamespace(
+        weaviate_manager=WeaviateManager(),
+        chunker_manager=FakeChunkerManager(),
+        embedder_manager=FakeEmbeddingManager(),
+    )
+    pipeline = ImportPipeline(manager)
+    pipeline.incremental = True
+    fileConfig = create_file_config().model_copy(update={"overwrite": True})
+
+    tasks = asyncio.run(
+        pipeline.run(
+            client,
+            [Document(title="manual", content="first\nsecond\nthird")],
+            fileConfig,
+            LoggerManager(),
+        )
+    )
+
+    assert tasks[0].error is None
+    assert manager.embedder_manager.embedded == []
+    assert chunks.updates == []
+    assert chunks.inserts == []
+    assert chunks.deletes == []
+
+
+def test_shifted_duplicate_chunks_are_not_overwritten():
+    """Test that a kept chunk's UUID is never reused for an inserted chunk"""
+    client = FakeClient()
+
+    def chunk_uuid(i, line):
+        return get_chunk_uuid("manual", SimpleNamespace(chunk_id=i, content=line))
+
+    chunks = store_document(client, "manual", ["B", "X"], chunk_uuid)
+    manager = SimpleNamespace(
+        weaviate_manager=WeaviateManager(),
+        chunker_manager=FakeChunkerManager(),
+        embedder_manager=FakeEmbeddingManager(),
+    )
+    pipeline = ImportPipeline(manager)
+    pipeline.incremental = True
+    fileConfig = create_file_config().model_copy(update={"overwrite": True})
+
+    tasks = asyncio.run(
+        pipeline.run(
+            client,
+            [Document(title="manual", content="X\nX")],
+            fileConfig,
+            LoggerManager(),
+        )
+    )
+
+    assert tasks[0].error is None
+    stored = sorted(
+        (stored.properties["chunk_id"], stored.properties["content"])
+        for stored in chunks.objects.values()
+    )
+    assert stored == [(0, "X"), (1, "X")]
+    assert chunks.objects[chunk_uuid(1, "X")].properties["chunk_id"] == 1
+
+
+def test_documents_by_source_are_filtered_by_prefix():
+    """Test that only documents matching the source prefix are returned, with their meta"""
+    client = FakeClient()
+    documents = store_sources(
+        client,
+        {
+            "README.md": "https://github.com/owner/repo/blob/main/README.md",
+            "docs/guide.md": "https://github.com/owner/repo/blob/main/docs/guide.md",
+            "other/README.md": "https://github.com/owner/other/blob/main/README.md",
+        },
+    )
+
+    stored = asyncio.run(
+        WeaviateManager().get_documents_by_source(
+            client, "https://github.com/owner/repo/blob/main/"
+        )
+    )
+
+    assert sorted(stored) == ["README.md", "docs/guide.md"]
+    assert stored["README.md"][0] == str(uuid5(NAMESPACE_URL, "README.md"))
+    assert stored["README.md"][1]["Embedder"]["config"]["Model"]["value"] == "fake"
+    # The meta is only fetched for the matching documents
+    assert documents.filters[-1].target == "_id"
+    assert len(documents.filters[-1].value) == 2
+
+
+def test_documents_by_source_page_with_the_cursor():
+    """Test that more documents than one page are fetched without offsets"""
+    client = FakeClient()
+    documents = store_sources(
+        client, {f"doc-{i:04}": f"https://host/doc-{i:04}" for i in range(2500)}
+    )
+
+    stored = asyncio.run(
+        WeaviateManager().get_documents_by_source(client, "https://host/")
+    )
+
+    assert len(stored) == 2500
+    assert documents.filters.count(None) == 3
@@ -0,0 +1,155 @@
+import io
+import asyncio
+
+import openpyxl
+import pytest
+
+from goldenverba.components.chunk import Chunk
+from goldenverba.components.document import assign_pages
+from goldenverba.components.executor import process_pool
+from goldenverba.components.reader import BasicReader as basic_reader
+from goldenverba.components.reader.BasicReader import (
+    BasicReader,
+    render_csv,
+    render_spreadsheet,
+)
+from goldenverba.server.types import FileConfig, FileStatus
+
+
+def create_pdf(pages: list[str]) -> bytes:
+    """Minimal PDF with one line of Helvetica text per page"""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (" ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages))), len(pages)),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        pdf += f"{offset:010d} 00000 n \n".encode("latin-1")
+    pdf += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode("latin-1")
+    return pdf
+
+
+def test_pdf_pages_are_extracted_in_order(tmp_path, monkeypatch):
+    """Test that page ranges are extracted in order and chunks get their page"""
+    monkeypatch.setattr(basic_reader, "PDF_PAGES_PER_TASK", 2)
+    monkeypatch.setattr(process_pool, "max_workers", 0)
+    path = tmp_path / "report.pdf"
+    path.write_bytes(create_pdf([f"Page number {i}" for i in range(1, 6)]))
+
+    fileConfig = FileConfig(
+        fileID="report.pdf",
+        filename="report.pdf",
+        isURL=False,
+        overwrite=False,
+        extension="pdf",
+        source="",
+        content="",
+        labels=[],
+        rag_config={},
+        file_size=0,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+    fileConfig._file_path = str(path)
+    reader = BasicReader()
+    documents = asyncio.run(reader.load(reader.config, fileConfig))
+
+    document = documents[0]
+    assert document.meta["pages"] == 5
+    assert document.content.index("Page number 3") == document.pages[2]
+
+    document.chunks = [
+        Chunk(content=text, content_without_overlap=text)
+        for text in ["Page number 1", "Page number 2\n\nPage number 3", "number 5"]
+    ]
+    assign_pages(document)
+    assert [chunk.page for chunk in document.chunks] == [1, 2, 5]
+
+
+def test_pdf_bytes_are_spooled_once(tmp_path, monkeypatch):
+    """Test that in-memory PDFs reach the workers as one temporary file instead of bytes"""
+    monkeypatch.setattr(basic_reader, "PDF_PAGES_PER_TASK", 2)
+    monkeypatch.setattr(basic_reader, "get_upload_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(process_pool, "max_workers", 2)
+    sources = []
+
+    async def run(func, source, *args):
+        sources.append(source)
+        return func(source, *args)
+
+    monkeypatch.setattr(process_pool, "run", run)
+    pdf = create_pdf([f"Page number {i}" for i in range(1, 6)])
+
+    async def extract():
+        return [page async for page in basic_reader.iter_pdf_pages(pdf)]
+
+    assert asyncio.run(extract())[4] == "Page number 5"
+    assert len(sources) == 4
+    assert len(set(sources)) == 1 and sources[0].startswith(str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_csv_rows_are_split_into_documents():
+    """Test that CSV files are rendered in chunks and split by number of rows"""
+    csv_bytes = b"name,age\nalice,30\nbob,\n\xc3\xa9mile,5\n"
+
+    assert render_csv(csv_bytes).startswith(
+        "Headers: name | age\n \n\n\nRow 1: name: alice | age: 30"
+    )
+    parts = render_spreadsheet(csv_bytes, "csv", "Rows", 2)
+    assert [name for name, _ in parts] == ["rows 1-2", "rows 3-3"]
+    assert parts[1][1].endswith("Row 3: name: émile | age: 5")
+    assert "Headers: name | age" in parts[1][1]
+
+
+def test_csv_rows_with_other_column_counts_are_kept(monkeypatch):
+    """Test that rows with missing or extra columns are rendered without and with pandas"""
+    csv_bytes = b"a,b\n1,2\n3,4,5\n6\n7,8\n"
+    expected = "Row 1: a: 1 | b: 2\n \n\n\nRow 2: 3 | 4 | 5\n \n\n\nRow 3: 6"
+
+    monkeypatch.setattr(basic_reader, "pd", None)
+    assert expected in render_csv(csv_bytes)
+
+    monkeypatch.setattr(basic_reader, "pd", pytest.importorskip("pandas"))
+    assert expected in render_csv(csv_bytes)
+    assert render_csv(b"a,b\n1,2\n7,8\n").endswith("Row 2: a: 7 | b: 8")
+
+
+def test_excel_sheets_are_split_into_documents():
+    """Test that every sheet of a workbook can become its own document"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Sales"
+    sheet.append(["region", "total"])
+    sheet.append(["north", 1])
+    sheet.append(["south", None])
+    workbook.create_sheet("Empty")
+    excel_bytes = io.BytesIO()
+    workbook.save(excel_bytes)
+
+    parts = render_spreadsheet(excel_bytes.getvalue(), "xlsx", "Sheet")
+
+    assert [name for name, _ in parts] == ["Sales", "Empty"]
+    assert "Row 1: region: north | total: 1" in parts[0][1]
+    assert "Row 2: region: south | total: " in parts[0][1]
+    assert "(Empty sheet)" in parts[1][1]
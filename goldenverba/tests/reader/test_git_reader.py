@@ -0,0 +1,163 @@
+import io
+import asyncio
+import tarfile
+
+from aiohttp import web
+
+from goldenverba.components.interfaces import SyncState
+from goldenverba.components.reader.GitReader import GitReader, get_blob_sha
+from goldenverba.components.types import InputConfig
+from goldenverba.server.types import FileConfig, FileStatus
+
+FILES = {
+    "README.md": b"# Verba",
+    "docs/guide.md": b"Guide",
+    "docs/image.png": b"\x89PNG",
+    "src/app.py": b"print('hello')",
+}
+
+
+def create_tarball() -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for path, content in FILES.items():
+            info = tarfile.TarInfo(f"owner-repo-abc123/{path}")
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+async def serve_github(requests: list[str]):
+    """Local stand-in for the GitHub API"""
+
+    async def handle(request: web.Request):
+        requests.append(request.path)
+        if request.path == "/repos/owner/repo/tarball/main":
+            return web.Response(body=create_tarball())
+        if request.path == "/repos/owner/repo/git/trees/main":
+            tree = [{"path": "docs", "type": "tree"}] + [
+                {"path": path, "type": "blob", "sha": get_sha(content)}
+                for path, content in FILES.items()
+            ]
+            return web.json_response({"tree": tree})
+        path = request.path.removeprefix("/repos/owner/repo/contents/")
+        if path in FILES and request.headers["Accept"] == "application/vnd.github.raw":
+            return web.Response(body=FILES[path])
+        return web.Response(status=404)
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def get_sha(content: bytes) -> str:
+    sha = get_blob_sha(len(content))
+    sha.update(content)
+    return sha.hexdigest()
+
+
+def create_file_config() -> FileConfig:
+    return FileConfig(
+        fileID="repo",
+        filename="repo",
+        isURL=True,
+        overwrite=False,
+        extension="",
+        source="",
+        content="",
+        labels=[],
+        rag_config={},
+        file_size=0,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+
+
+def load_repo(
+    fetch_mode: str, path: str = "", sync: SyncState | None = None
+) -> tuple[list, list[str]]:
+    requests = []
+
+    async def run():
+        runner, url = await serve_github(requests)
+        try:
+            reader = GitReader()
+            reader.github_url = url
+            config = dict(reader.config)
+            config["Owner"] = InputConfig(
+                type="text", value="owner", description="", values=[]
+            )
+            config["Name"] = InputConfig(
+                type="text", value="repo", description="", values=[]
+            )
+            config["Path"] = InputConfig(
+                type="text", value=path, description="", values=[]
+            )
+            config["Fetch Mode"] = InputConfig(
+                type="dropdown", value=fetch_mode, description="", values=[]
+            )
+            config["Git Token"] = InputConfig(
+                type="password", value="token", description="", values=[]
+            )
+            return await reader.load(config, create_file_config(), sync=sync)
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run()), requests
+
+
+def test_archive_mode_needs_one_request():
+    """Test that the archive mode downloads the branch once and extracts matching files"""
+    documents, requests = load_repo("Archive", path="docs")
+
+    assert requests == ["/repos/owner/repo/tarball/main"]
+    assert [document.title for document in documents] == ["docs/guide.md"]
+    assert documents[0].content == "Guide"
+    assert (
+        documents[0].source == "https://github.com/owner/repo/blob/main/docs/guide.md"
+    )
+
+
+def test_files_mode_downloads_raw_files():
+    """Test that the files mode lists the tree and downloads every matching file"""
+    documents, requests = load_repo("Files")
+
+    assert requests[0] == "/repos/owner/repo/git/trees/main"
+    assert len(requests) == 4
+    assert sorted(document.title for document in documents) == [
+        "README.md",
+        "docs/guide.md",
+        "src/app.py",
+    ]
+    assert {document.title: document.content for document in documents}[
+        "src/app.py"
+    ] == "print('hello')"
+
+
+def test_incremental_sync_loads_changed_files_only():
+    """Test that unchanged blobs are skipped and removed paths are reported"""
+    for fetch_mode in ["Archive", "Files"]:
+        sync = SyncState(
+            {
+                "README.md": ("uuid-readme", {"git_sha": get_sha(FILES["README.md"])}),
+                "src/app.py": ("uuid-app", {"git_sha": "outdated"}),
+                "old.md": ("uuid-old", {"git_sha": "removed"}),
+            }
+        )
+        documents, requests = load_repo(fetch_mode, sync=sync)
+
+        assert sorted(document.title for document in documents) == [
+            "docs/guide.md",
+            "src/app.py",
+        ]
+        assert all(document.meta["git_sha"] for document in documents)
+        assert sync.removed() == ["uuid-old"]
+        assert sync.unchanged == 1
+        if fetch_mode == "Files":
+            assert "/repos/owner/repo/contents/README.md" not in requests
@@ -0,0 +1,196 @@
+import asyncio
+
+from aiohttp import web
+
+from goldenverba.components.crawler import CrawlState, PageCache, normalize_url
+from goldenverba.components.reader.HTMLReader import HTMLReader
+from goldenverba.components.types import InputConfig
+from goldenverba.server.types import FileConfig, FileStatus
+
+PAGES = {
+    "/": '<a href="/a">A</a> <a href="/b?y=2&x=1">B</a> <a href="/a#top">A</a> <a href="mailto:me@example.com">Mail</a>',
+    "/a": '<a href="/">Home</a> <a href="/c">C</a>',
+    "/b": '<a href="/b?x=1&y=2">B</a> <a href="http://other.host/">Other</a>',
+    "/c": "<p>Leaf</p>",
+}
+
+
+async def serve_site(requests: list[tuple[str, int]]):
+    """Local website whose pages answer conditional requests"""
+
+    async def handle(request: web.Request):
+        html = PAGES.get(request.path)
+        if html is None:
+            return web.Response(status=404)
+        etag = f'"{request.path}"'
+        if request.headers.get("If-None-Match") == etag:
+            requests.append((request.path, 304))
+            return web.Response(status=304)
+        requests.append((request.path, 200))
+        return web.Response(text=html, content_type="text/html", headers={"ETag": etag})
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def create_file_config() -> FileConfig:
+    return FileConfig(
+        fileID="site",
+        filename="site",
+        isURL=True,
+        overwrite=False,
+        extension="",
+        source="",
+        content="",
+        labels=[],
+        rag_config={},
+        file_size=0,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+
+
+def crawl(
+    reader: HTMLReader,
+    max_pages: int = 100,
+    rounds: int = 1,
+    between=None,
+    scopes: list[str] | None = None,
+    imported=lambda documents: documents,
+) -> list:
+    """Crawl the local website, returns (documents, requests, url) per round.
+    between is awaited with the site URL before every round after the first.
+    The pages of the documents returned by imported count as imported, in the scope of the round.
+    """
+
+    async def run():
+        requests = []
+        runner, url = await serve_site(requests)
+        try:
+            config = dict(reader.config)
+            config["URLs"] = InputConfig(
+                type="multi", value="", description="", values=[url + "/"]
+            )
+            config["Recursive"] = InputConfig(
+                type="bool", value=True, description="", values=[]
+            )
+            config["Max Pages"] = InputConfig(
+                type="number", value=max_pages, description="", values=[]
+            )
+            config["Politeness Delay"] = InputConfig(
+                type="number", value=0, description="", values=[]
+            )
+            results = []
+            for i in range(rounds):
+                if i > 0 and between is not None:
+                    await between(url)
+                state = CrawlState(
+                    reader.get_page_cache(), scopes[i] if scopes else "scope"
+                )
+                documents = await reader.load(config, create_file_config(), state)
+                await state.imported(
+                    [document.source for document in imported(documents)]
+                )
+                results.append((documents, list(requests), url))
+                requests.clear()
+            return results
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_normalize_url():
+    """Test that equivalent URLs normalize to the same string"""
+    assert normalize_url("HTTP://Example.com:80/a?b=2&a=1#part") == (
+        "http://example.com/a?a=1&b=2"
+    )
+    assert normalize_url("https://example.com") == "https://example.com/"
+    assert normalize_url("https://example.com:8443/") == "https://example.com:8443/"
+    assert normalize_url("mailto:me@example.com") is None
+
+
+def test_crawler_visits_every_page_once(tmp_path):
+    """Test that duplicate links are fetched once and other hosts are ignored"""
+    reader = HTMLReader()
+    reader.page_cache = PageCache(path=str(tmp_path / "crawl.sqlite"))
+    [(documents, requests, url)] = crawl(reader)
+
+    assert sorted(requests) == [("/", 200), ("/a", 200), ("/b", 200), ("/c", 200)]
+    assert sorted(document.title for document in documents) == [
+        url + "/",
+        url + "/a",
+        url + "/b?x=1&y=2",
+        url + "/c",
+    ]
+    reader.page_cache.close()
+
+
+def test_crawler_respects_max_pages(tmp_path):
+    """Test that no more pages than the budget are requested"""
+    reader = HTMLReader()
+    reader.page_cache = PageCache(path=str(tmp_path / "crawl.sqlite"))
+    [(documents, requests, _)] = crawl(reader, max_pages=2)
+
+    assert len(requests) == 2
+    assert len(documents) == 2
+    reader.page_cache.close()
+
+
+def test_recrawl_skips_unchanged_pages(tmp_path):
+    """Test that a re-crawl sends conditional requests and still follows cached links"""
+    reader = HTMLReader()
+    reader.page_cache = PageCache(path=str(tmp_path / "crawl.sqlite"))
+    _, (documents, requests, _) = crawl(reader, rounds=2)
+
+    assert documents == []
+    assert sorted(requests) == [("/", 304), ("/a", 304), ("/b", 304), ("/c", 304)]
+    reader.page_cache.close()
+
+
+def test_forgotten_pages_are_fetched_again(tmp_path):
+    """Test that a page whose document was deleted is imported again by the next crawl"""
+    reader = HTMLReader()
+    reader.page_cache = PageCache(path=str(tmp_path / "crawl.sqlite"))
+
+    async def delete_c(url: str):
+        await reader.get_page_cache().forget([url + "/c"])
+
+    _, (documents, requests, url) = crawl(reader, rounds=2, between=delete_c)
+
+    assert [document.title for document in documents] == [url + "/c"]
+    assert ("/c", 200) in requests and ("/a", 304) in requests
+    reader.page_cache.close()
+
+
+def test_failed_imports_are_fetched_again(tmp_path):
+    """Test that pages are only skipped once their documents were imported"""
+    reader = HTMLReader()
+    reader.page_cache = PageCache(path=str(tmp_path / "crawl.sqlite"))
+
+    def without_c(documents):
+        return [document for document in documents if document.source[-2:] != "/c"]
+
+    _, (documents, requests, url) = crawl(reader, rounds=2, imported=without_c)
+
+    assert [document.title for document in documents] == [url + "/c"]
+    assert ("/c", 200) in requests and ("/a", 304) in requests
+    reader.page_cache.close()
+
+
+def test_validators_are_scoped(tmp_path):
+    """Test that pages imported in one scope are fetched again in another"""
+    reader = HTMLReader()
+    reader.page_cache = PageCache(path=str(tmp_path / "crawl.sqlite"))
+    _, (documents, requests, _) = crawl(reader, rounds=2, scopes=["one", "two"])
+
+    assert len(documents) == 4
+    assert sorted(requests) == [("/", 200), ("/a", 200), ("/b", 200), ("/c", 200)]
+    reader.page_cache.close()
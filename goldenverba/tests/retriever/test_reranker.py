@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+
+from goldenverba.components import reranker as module
+from goldenverba.components.reranker import RerankEngine
+from goldenverba.components.retriever import WindowRetriever as retriever_module
+from goldenverba.components.retriever.WindowRetriever import WindowRetriever
+from goldenverba.tests.retriever.test_window_retriever import (
+    FakeWeaviateManager,
+    create_chunk,
+)
+
+
+class FakeCrossEncoder:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.pairs = []
+        self.threads = set()
+
+    def predict(self, pairs, batch_size=32, **kwargs):
+        time.sleep(self.delay)
+        self.threads.add(threading.current_thread().name)
+        self.pairs.extend(pairs)
+        # Later chunks of the fake results are the relevant ones
+        return [float(content.split()[-1]) - 3 for _, content in pairs]
+
+
+def test_rerank_engine_caches_scores(monkeypatch):
+    """Test that only uncached pairs are predicted on the rerank threads"""
+    model = FakeCrossEncoder()
+    monkeypatch.setattr(module, "create_cross_encoder", lambda name, backend: model)
+    engine = RerankEngine(max_models=1, max_workers=1, cache_size=10)
+
+    async def rerank(contents):
+        return await engine.rerank("model", "Torch", "query", contents, budget=5)
+
+    first = asyncio.run(rerank(["a chunk 1", "a chunk 5"]))
+    second = asyncio.run(rerank(["a chunk 5", "b chunk 3"]))
+
+    assert first[0] < 0.5 < first[1]
+    assert second[0] == first[1]
+    assert second[1] == 0.5
+    assert [content for _, content in model.pairs] == [
+        "a chunk 1",
+        "a chunk 5",
+        "b chunk 3",
+    ]
+    assert all(thread.startswith("verba-rerank") for thread in model.threads)
+    assert engine.stats() == {"size": 3, "hits": 1, "misses": 3, "timeouts": 0}
+    engine.shutdown()
+
+
+def test_window_retriever_rerank_and_budget(monkeypatch):
+    """Test that reranking reorders and cuts the hits, and the search order is kept when over budget"""
+    model = FakeCrossEncoder()
+    monkeypatch.setattr(module, "create_cross_encoder", lambda name, backend: model)
+    engine = RerankEngine(max_models=1, max_workers=1)
+    monkeypatch.setattr(retriever_module, "rerank_engine", engine)
+
+    retriever = WindowRetriever()
+    config = dict(retriever.config)
+    config["Rerank"] = config["Rerank"].model_copy(update={"value": True})
+    config["Rerank Top K"] = config["Rerank Top K"].model_copy(update={"value": 2})
+    chunks = [create_chunk("a", 1, 1.0), create_chunk("b", 6, 0.5)]
+    chunks.append(create_chunk("a", 5, 0.2))
+
+    reranked = asyncio.run(retriever.rerank_chunks(config, "query", list(chunks)))
+    assert [chunk.uuid for chunk in reranked] == ["b-6", "a-5"]
+
+    model.delay = 0.2
+    config["Rerank Budget"] = config["Rerank Budget"].model_copy(update={"value": 10})
+    chunks = [create_chunk("a", 1, 1.0), create_chunk("c", 6, 0.5)]
+    chunks.append(create_chunk("a", 2, 0.2))
+    fallback = asyncio.run(retriever.rerank_chunks(config, "query", chunks))
+    assert [chunk.uuid for chunk in fallback] == ["a-1", "c-6"]
+    assert engine.timeouts == 1
+
+    manager = FakeWeaviateManager()
+    config["Threshold"] = config["Threshold"].model_copy(update={"value": 100})
+    asyncio.run(
+        retriever.retrieve(None, "query", [0.1], config, manager, "model", [], [])
+    )
+    assert manager.calls[0][0] == "hybrid"
+    engine.shutdown()
@@ -0,0 +1,247 @@
+import asyncio
+from types import SimpleNamespace
+
+from goldenverba.components import util
+from goldenverba.components.managers import GeneratorManager, merge_ranges
+from goldenverba.components.retriever.WindowRetriever import (
+    WindowRetriever,
+    reciprocal_rank_fusion,
+)
+from goldenverba.server.types import ConversationItem
+
+
+def create_chunk(doc_uuid: str, chunk_id: int, score: float = 0.0):
+    return SimpleNamespace(
+        uuid=f"{doc_uuid}-{chunk_id}",
+        metadata=SimpleNamespace(score=score),
+        properties={
+            "doc_uuid": doc_uuid,
+            "chunk_id": chunk_id,
+            "content": f"{doc_uuid} chunk {chunk_id}",
+            "page": 0,
+        },
+    )
+
+
+class FakeWeaviateManager:
+    def __init__(self):
+        self.calls = []
+
+    async def hybrid_chunks(self, client, embedder, query, vector, *args, **kwargs):
+        self.calls.append(("hybrid", kwargs))
+        return self.get_chunks()
+
+    async def bm25_chunks(self, client, embedder, query, *args):
+        self.calls.append(("bm25", query))
+        return self.get_chunks()
+
+    def get_chunks(self):
+        return [
+            create_chunk("a", 5, 1.0),
+            create_chunk("b", 0, 0.9),
+            create_chunk("a", 6, 0.8),
+            create_chunk("missing", 1, 0.5),
+            create_chunk("missing", 2, 0.1),
+        ]
+
+    async def get_documents_by_ids(self, client, uuids, properties):
+        self.calls.append(("documents", uuids))
+        return {
+            uuid: {"title": uuid.upper(), "metadata": ""}
+            for uuid in uuids
+            if uuid != "missing"
+        }
+
+    async def get_chunks_by_ranges(self, client, embedder, ranges):
+        self.calls.append(("ranges", ranges))
+        return [
+            create_chunk(doc_uuid, chunk_id)
+            for doc_uuid, doc_ranges in ranges.items()
+            for start, end in merge_ranges(doc_ranges)
+            for chunk_id in range(start, end + 1)
+        ]
+
+
+def test_merge_ranges():
+    assert merge_ranges([(4, 6), (0, 1), (5, 7), (2, 2), (10, 12)]) == [
+        (0, 2),
+        (4, 7),
+        (10, 12),
+    ]
+
+
+def test_window_retriever_batches_lookups():
+    """Test that documents and windows of all hits are fetched with one call each"""
+    retriever = WindowRetriever()
+    manager = FakeWeaviateManager()
+    config = dict(retriever.config)
+    config["Threshold"] = config["Threshold"].model_copy(update={"value": 0})
+
+    documents, context = asyncio.run(
+        retriever.retrieve(None, "query", [0.1], config, manager, "model", [], [])
+    )
+
+    assert manager.calls == [
+        ("hybrid", {"alpha": 0.5, "fusion_type": "Relative Score"}),
+        ("documents", ["a", "b", "missing"]),
+        ("ranges", {"a": [(4, 6), (5, 7)], "b": [(0, 1)]}),
+    ]
+    assert [document["uuid"] for document in documents] == ["a", "b"]
+    assert [chunk["chunk_id"] for chunk in documents[0]["chunks"]] == [4, 5, 6, 7]
+    assert [chunk["chunk_id"] for chunk in documents[1]["chunks"]] == [0, 1]
+    assert "a chunk 7" in context
+
+
+def test_window_retriever_keyword_search():
+    """Test that Keyword (BM25) runs without a query vector"""
+    retriever = WindowRetriever()
+    manager = FakeWeaviateManager()
+    config = dict(retriever.config)
+    config["Search Mode"] = config["Search Mode"].model_copy(
+        update={"value": "Keyword (BM25)"}
+    )
+    del config["Alpha"]
+
+    assert not retriever.requires_vector(config)
+    assert retriever.requires_vector(retriever.config)
+
+    documents, _ = asyncio.run(
+        retriever.retrieve(None, "query", None, config, manager, "model", [], [])
+    )
+
+    assert manager.calls[0] == ("bm25", "query")
+    assert [document["uuid"] for document in documents] == ["a", "b"]
+
+
+class FanoutWeaviateManager(FakeWeaviateManager):
+    async def hybrid_chunks(self, client, embedder, query, vector, *args, **kwargs):
+        self.calls.append(("hybrid", embedder, vector))
+        if embedder == "slow":
+            await asyncio.sleep(1)
+        if embedder == "other":
+            return [create_chunk("b", 0), create_chunk("c", 3)]
+        return [create_chunk("a", 5), create_chunk("b", 0)]
+
+
+def test_reciprocal_rank_fusion():
+    first = [create_chunk("a", 1), create_chunk("b", 2)]
+    second = [create_chunk("b", 2), create_chunk("c", 3)]
+
+    fused = reciprocal_rank_fusion([first, second], k=1)
+
+    assert [chunk.uuid for chunk in fused] == ["b-2", "a-1", "c-3"]
+    assert fused[0].metadata.score == 1 / 3 + 1 / 2
+
+
+def test_window_retriever_fanout():
+    """Test that all collections are searched, merged and windowed in their own collection, and slow ones are skipped"""
+    retriever = WindowRetriever()
+    manager = FanoutWeaviateManager()
+    config = dict(retriever.config)
+    config["Collections"] = config["Collections"].model_copy(
+        update={"value": "All Embedders"}
+    )
+    config["Collection Timeout"] = config["Collection Timeout"].model_copy(
+        update={"value": 50}
+    )
+    config["Threshold"] = config["Threshold"].model_copy(update={"value": 0})
+    assert retriever.get_fanout_timeout(config) == 0.05
+
+    documents, _ = asyncio.run(
+        retriever.retrieve(
+            None,
+            "query",
+            [0.1],
+            config,
+            manager,
+            "model",
+            [],
+            [],
+            vectors={"other": [0.2], "slow": [0.3]},
+        )
+    )
+
+    assert manager.calls[:3] == [
+        ("hybrid", "model", [0.1]),
+        ("hybrid", "other", [0.2]),
+        ("hybrid", "slow", [0.3]),
+    ]
+    assert manager.calls[3] == ("documents", ["b", "a", "c"])
+    assert manager.calls[4:] == [
+        ("ranges", {"b": [(0, 1)], "a": [(4, 6)]}),
+        ("ranges", {"c": [(2, 4)]}),
+    ]
+    assert [document["uuid"] for document in documents] == ["b", "a", "c"]
+    assert {chunk["embedder"] for chunk in documents[2]["chunks"]} == {"other"}
+
+
+def test_combine_context_packs_by_score():
+    """Test that the best chunks are packed within the budget and rendered in document order"""
+    retriever = WindowRetriever()
+
+    def context_chunk(chunk_id: int, score: float, tokens: int):
+        return {
+            "uuid": f"{chunk_id}",
+            "chunk_id": chunk_id,
+            "score": score,
+            "content": f"content {chunk_id}",
+            "tokens": tokens,
+        }
+
+    documents = [
+        {
+            "uuid": "a",
+            "title": "A",
+            "metadata": "",
+            "chunks": [
+                context_chunk(0, 0, 100),
+                context_chunk(1, 0.9, 100),
+                context_chunk(2, 0, 20),
+            ],
+        },
+        {
+            "uuid": "b",
+            "title": "B",
+            "metadata": "",
+            "chunks": [context_chunk(7, 0.5, 50)],
+        },
+    ]
+
+    full = retriever.combine_context(documents)
+    packed = retriever.combine_context(documents, max_tokens=240)
+
+    assert all(f"content {i}" in full for i in [0, 1, 2, 7])
+    assert "content 0" not in packed
+    assert packed.index("content 1") < packed.index("content 2")
+    assert packed.index("content 2") < packed.index("content 7")
+    assert retriever.combine_context(documents, max_tokens=10) == ""
+
+
+def test_context_budget_leaves_room_for_prompt_and_answer(monkeypatch):
+    """Test that the system message, conversation, query and answer are taken off the context window"""
+    monkeypatch.setattr(util, "get_encoding", lambda: None)
+    monkeypatch.setenv("VERBA_ANSWER_TOKENS", "100")
+    manager = GeneratorManager()
+    generator = manager.generators["Ollama"]
+    config = dict(generator.config)
+    config["System Message"] = config["System Message"].model_copy(
+        update={"value": "s" * 400}
+    )
+    rag_config = {
+        "Generator": SimpleNamespace(
+            selected="Ollama",
+            components={"Ollama": SimpleNamespace(config=config)},
+        )
+    }
+    conversation = [ConversationItem(type="user", content="c" * 800)]
+
+    # 100 system, 200 conversation and 10 query tokens, 16 per message and 100 for the answer
+    budget = manager.get_context_budget(rag_config, "q" * 40, conversation)
+    assert budget == generator.context_window - 100 - 200 - 10 - 3 * 16 - 100
+    assert manager.get_context_budget(rag_config, "q" * 40) == budget + 200 + 16
+
+    generator.context_window, window = 300, generator.context_window
+    try:
+        assert manager.get_context_budget(rag_config, "q" * 40, conversation) == 0
+    finally:
+        generator.context_window = window
@@ -0,0 +1,90 @@
+import os
+import struct
+
+import pytest
+
+from goldenverba.components.util import get_file_source, open_file
+from goldenverba.server.helpers import UploadManager
+from goldenverba.server.types import (
+    Credentials,
+    FileConfig,
+    FileStatus,
+    FileUploadPayload,
+)
+
+
+def create_payload(fileID: str, size: int) -> FileUploadPayload:
+    fileConfig = FileConfig(
+        fileID=fileID,
+        filename=fileID,
+        isURL=False,
+        overwrite=False,
+        extension="pdf",
+        source="",
+        content="",
+        labels=[],
+        rag_config={},
+        file_size=0,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+    return FileUploadPayload(
+        fileID=fileID,
+        size=size,
+        fileConfig=fileConfig,
+        credentials=Credentials(deployment="Local", url="", key=""),
+    )
+
+
+def create_frame(fileID: str, data: bytes) -> bytes:
+    encoded = fileID.encode("utf-8")
+    return struct.pack(">H", len(encoded)) + encoded + data
+
+
+def test_upload_spools_frames_to_disk(tmp_path):
+    """Test that binary frames are written to a file that readers can open"""
+    uploader = UploadManager(str(tmp_path))
+    data = os.urandom(3000)
+
+    assert uploader.start(create_payload("report.pdf", len(data))) is None
+    assert uploader.add_frame(create_frame("report.pdf", data[:1000])) is None
+    fileConfig, credentials = uploader.add_frame(
+        create_frame("report.pdf", data[1000:])
+    )
+
+    assert fileConfig.file_size == 3000
+    assert get_file_source(fileConfig) == fileConfig.file_path
+    with open_file(fileConfig) as file:
+        assert file.read() == data
+
+    uploader.remove("report.pdf")
+    assert os.listdir(tmp_path) == []
+
+
+def test_upload_rejects_client_file_path_and_extra_data(tmp_path):
+    """Test that the file path can't be set by clients and uploads can't exceed their size"""
+    payload = create_payload("a.pdf", 2).model_dump()
+    payload["fileConfig"]["_file_path"] = "/etc/passwd"
+    assert FileUploadPayload.model_validate(payload).fileConfig.file_path is None
+
+    uploader = UploadManager(str(tmp_path))
+    uploader.start(create_payload("a.pdf", 2))
+    with pytest.raises(Exception):
+        uploader.add_frame(create_frame("a.pdf", b"abc"))
+    assert os.listdir(tmp_path) == []
+
+
+def test_upload_evicts_stale_uploads(tmp_path):
+    """Test that unfinished uploads are removed after the TTL"""
+    uploader = UploadManager(str(tmp_path))
+    uploader.ttl = 0
+    uploader.start(create_payload("stale.pdf", 10))
+    uploader.add_frame(create_frame("stale.pdf", b"12345"))
+
+    uploader.start(create_payload("new.pdf", 10))
+
+    assert "stale.pdf" not in uploader.uploads
+    assert len(os.listdir(tmp_path)) == 1
+    uploader.close()
+    assert os.listdir(tmp_path) == []
@@ -1,6 +1,7 @@
 import os
 import importlib
 import math
+import re
 import json
 from datetime import datetime
 
@@ -8,7 +9,6 @@ from dotenv import load_dotenv
 from wasabi import msg
 import asyncio
 
-from copy import deepcopy
 import hashlib
 
 from goldenverba.server.helpers import LoggerManager
@@ -30,6 +30,20 @@ from goldenverba.components.managers import (
     GeneratorManager,
     WeaviateManager,
 )
+from goldenverba.components.cache import (
+    create_answer_cache,
+    create_embedding_cache,
+    create_query_cache,
+    create_retrieval_cache,
+    get_deployment,
+    get_scope_key,
+    normalize_query,
+)
+from goldenverba.components.journal import create_import_journal
+from goldenverba.components.reranker import rerank_engine
+from goldenverba.components.pipeline import ImportPipeline
+from goldenverba.components.interfaces import SyncState
+from goldenverba.components.crawler import CrawlState, normalize_url
 
 load_dotenv()
 
@@ -40,10 +54,15 @@ class VerbaManager:
     def __init__(self) -> None:
         self.reader_manager = ReaderManager()
         self.chunker_manager = ChunkerManager()
-        self.embedder_manager = EmbeddingManager()
+        self.weaviate_manager = WeaviateManager()
+        self.embedder_manager = EmbeddingManager(
+            create_embedding_cache(self.weaviate_manager), create_query_cache()
+        )
         self.retriever_manager = RetrieverManager()
         self.generator_manager = GeneratorManager()
-        self.weaviate_manager = WeaviateManager()
+        self.answer_cache = create_answer_cache(self.weaviate_manager.corpus)
+        self.retrieval_cache = create_retrieval_cache(self.weaviate_manager.corpus)
+        self.import_pipeline = ImportPipeline(self, journal=create_import_journal())
         self.rag_config_uuid = "e0adcc12-9bad-4588-8a1e-bab0af6ed485"
         self.theme_config_uuid = "baab38a7-cb51-4108-acd8-6edeca222820"
         self.user_config_uuid = "f53f7738-08be-4d5a-b003-13eb4bf03ac7"
@@ -107,7 +126,9 @@ class VerbaManager:
             if duplicate_uuid is not None and not fileConfig.overwrite:
                 raise Exception(f"{fileConfig.filename} already exists in Verba")
             elif duplicate_uuid is not None and fileConfig.overwrite:
-                await self.weaviate_manager.delete_document(client, duplicate_uuid)
+                # The pipeline updates the existing document chunk by chunk
+                if not self.import_pipeline.incremental:
+                    await self.weaviate_manager.delete_document(client, duplicate_uuid)
                 await logger.send_report(
                     fileConfig.fileID,
                     status=FileStatus.STARTING,
@@ -122,46 +143,68 @@ class VerbaManager:
                     took=0,
                 )
 
-            documents = await self.reader_manager.load(
-                fileConfig.rag_config["Reader"].selected, fileConfig, logger
-            )
+            sync = await self.get_sync_state(client, fileConfig)
+            if sync is not None:
+                # Changed documents of a synced source replace their stored version
+                fileConfig = fileConfig.model_copy(update={"overwrite": True})
 
-            tasks = [
-                self.process_single_document(client, doc, fileConfig, logger)
-                for doc in documents
-            ]
+            crawl = self.get_crawl_state(client, fileConfig)
+
+            documents = self.reader_manager.stream(
+                fileConfig.rag_config["Reader"].selected,
+                fileConfig,
+                logger,
+                sync,
+                crawl,
+            )
 
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            successful_tasks = sum(
-                1 for result in results if not isinstance(result, Exception)
+            tasks = await self.import_pipeline.run(
+                client, documents, fileConfig, logger
             )
+            successful_tasks = [task for task in tasks if task.error is None]
+
+            if crawl is not None:
+                await crawl.imported(
+                    [task.document.source for task in successful_tasks]
+                )
 
-            if successful_tasks > 1:
+            if sync is not None:
+                removed = sync.removed()
+                for uuid in removed:
+                    await self.weaviate_manager.delete_document(client, uuid)
                 await logger.send_report(
                     fileConfig.fileID,
                     status=FileStatus.INGESTING,
-                    message=f"Imported {fileConfig.filename} and it's {successful_tasks} documents into Weaviate",
+                    message=f"Synced {fileConfig.filename}: {len(sync.seen) - sync.unchanged} added or modified, {len(removed)} removed and {sync.unchanged} unchanged files",
                     took=round(loop.time() - start_time, 2),
                 )
-            elif successful_tasks == 1:
+
+            if len(successful_tasks) > 1:
                 await logger.send_report(
                     fileConfig.fileID,
                     status=FileStatus.INGESTING,
-                    message=f"Imported {fileConfig.filename} and {len(documents[0].chunks)} chunks into Weaviate",
+                    message=f"Imported {fileConfig.filename} and it's {len(successful_tasks)} documents into Weaviate",
                     took=round(loop.time() - start_time, 2),
                 )
-            elif (
-                successful_tasks == 0
-                and len(results) == 1
-                and isinstance(results[0], Exception)
+            elif len(successful_tasks) == 1:
+                await logger.send_report(
+                    fileConfig.fileID,
+                    status=FileStatus.INGESTING,
+                    message=f"Imported {fileConfig.filename} and {successful_tasks[0].chunk_count} chunks into Weaviate",
+                    took=round(loop.time() - start_time, 2),
+                )
+            elif len(tasks) == 0 and (
+                sync is not None or (crawl is not None and crawl.unchanged > 0)
             ):
+                msg.info(f"{fileConfig.filename} is up to date")
+            elif len(tasks) == 1:
                 msg.fail(
-                    f"No documents imported {successful_tasks} of {len(results)} succesful tasks"
+                    f"No documents imported {len(successful_tasks)} of {len(tasks)} succesful tasks"
                 )
-                raise results[0]
+                raise tasks[0].error
             else:
                 raise Exception(
-                    f"No documents imported {successful_tasks} of {len(results)} succesful tasks"
+                    f"No documents imported {len(successful_tasks)} of {len(tasks)} succesful tasks"
                 )
 
             await logger.send_report(
@@ -180,6 +223,57 @@ class VerbaManager:
             )
             return
 
+    async def delete_document(self, client, uuid: str):
+        """Delete a document, if it was a crawled page the next crawl fetches it again"""
+        document = await self.weaviate_manager.get_document(
+            client, uuid, properties=["source"]
+        )
+        await self.weaviate_manager.delete_document(client, uuid)
+        url = normalize_url(document.get("source") or "") if document else None
+        if url is not None:
+            await self.forget_crawled_pages([url])
+
+    async def forget_crawled_pages(self, urls: list[str] | None = None):
+        """Drop the crawl validators of the URLs (of every URL with None)"""
+        reader = self.reader_manager.readers.get("HTML")
+        if reader is not None:
+            await reader.get_page_cache().forget(urls)
+
+    def get_crawl_state(self, client, fileConfig: FileConfig) -> CrawlState | None:
+        """Crawl validators of the deployment and RAG config if the selected reader sends conditional requests"""
+        selected = fileConfig.rag_config["Reader"].selected
+        reader = self.reader_manager.readers.get(selected)
+        if reader is None:
+            return None
+        cache = reader.get_page_cache(
+            fileConfig.rag_config["Reader"].components[selected].config
+        )
+        if cache is None:
+            return None
+        rag_config = {
+            key: fileConfig.rag_config[key].model_dump()
+            for key in ["Reader", "Chunker", "Embedder"]
+            if key in fileConfig.rag_config
+        }
+        # Start URLs don't change how a page is imported
+        rag_config["Reader"]["components"][selected]["config"].pop("URLs", None)
+        return CrawlState(cache, get_scope_key(get_deployment(client), rag_config))
+
+    async def get_sync_state(self, client, fileConfig: FileConfig) -> SyncState | None:
+        """Stored documents of the source if the selected reader syncs incrementally"""
+        selected = fileConfig.rag_config["Reader"].selected
+        reader = self.reader_manager.readers.get(selected)
+        if reader is None:
+            return None
+        prefix = reader.get_sync_prefix(
+            fileConfig.rag_config["Reader"].components[selected].config
+        )
+        if prefix is None:
+            return None
+        stored = await self.weaviate_manager.get_documents_by_source(client, prefix)
+        msg.info(f"Syncing {fileConfig.filename}, {len(stored)} documents stored")
+        return SyncState(stored)
+
     async def process_single_document(
         self,
         client,
@@ -187,88 +281,9 @@ class VerbaManager:
         fileConfig: FileConfig,
         logger: LoggerManager,
     ):
-        loop = asyncio.get_running_loop()
-        start_time = loop.time()
-
-        if fileConfig.isURL:
-            currentFileConfig = deepcopy(fileConfig)
-            currentFileConfig.fileID = fileConfig.fileID + document.title
-            currentFileConfig.isURL = False
-            currentFileConfig.filename = document.title
-            await logger.create_new_document(
-                fileConfig.fileID + document.title,
-                document.title,
-                fileConfig.fileID,
-            )
-        else:
-            currentFileConfig = fileConfig
-
-        try:
-            duplicate_uuid = await self.weaviate_manager.exist_document_name(
-                client, document.title
-            )
-            if duplicate_uuid is not None and not currentFileConfig.overwrite:
-                raise Exception(f"{document.title} already exists in Verba")
-            elif duplicate_uuid is not None and currentFileConfig.overwrite:
-                await self.weaviate_manager.delete_document(client, duplicate_uuid)
-
-            chunk_task = asyncio.create_task(
-                self.chunker_manager.chunk(
-                    currentFileConfig.rag_config["Chunker"].selected,
-                    currentFileConfig,
-                    [document],
-                    self.embedder_manager.embedders[
-                        currentFileConfig.rag_config["Embedder"].selected
-                    ],
-                    logger,
-                )
-            )
-            chunked_documents = await chunk_task
-
-            embedding_task = asyncio.create_task(
-                self.embedder_manager.vectorize(
-                    currentFileConfig.rag_config["Embedder"].selected,
-                    currentFileConfig,
-                    chunked_documents,
-                    logger,
-                )
-            )
-            vectorized_documents = await embedding_task
-
-            for document in vectorized_documents:
-                ingesting_task = asyncio.create_task(
-                    self.weaviate_manager.import_document(
-                        client,
-                        document,
-                        currentFileConfig.rag_config["Embedder"]
-                        .components[fileConfig.rag_config["Embedder"].selected]
-                        .config["Model"]
-                        .value,
-                    )
-                )
-                await ingesting_task
-
-            await logger.send_report(
-                currentFileConfig.fileID,
-                status=FileStatus.INGESTING,
-                message=f"Imported {currentFileConfig.filename} into Weaviate",
-                took=round(loop.time() - start_time, 2),
-            )
-
-            await logger.send_report(
-                currentFileConfig.fileID,
-                status=FileStatus.DONE,
-                message=f"Import for {currentFileConfig.filename} completed successfully",
-                took=round(loop.time() - start_time, 2),
-            )
-        except Exception as e:
-            await logger.send_report(
-                currentFileConfig.fileID,
-                status=FileStatus.ERROR,
-                message=f"Import for {fileConfig.filename} failed: {str(e)}",
-                took=round(loop.time() - start_time, 2),
-            )
-            raise Exception(f"Import for {fileConfig.filename} failed: {str(e)}")
+        tasks = await self.import_pipeline.run(client, [document], fileConfig, logger)
+        if tasks[0].error is not None:
+            raise tasks[0].error
 
     # Configuration
 
@@ -472,6 +487,19 @@ class VerbaManager:
         msg.info("Resetting User Configuration")
         await self.weaviate_manager.reset_config(client, self.user_config_uuid)
 
+    def get_cache_stats(self) -> dict:
+        """Hit and miss counters of the query-time caches"""
+        stats = {}
+        if self.embedder_manager.query_cache is not None:
+            stats["query_vectors"] = self.embedder_manager.query_cache.stats()
+        if self.retrieval_cache is not None:
+            stats["retrieval"] = self.retrieval_cache.stats()
+        if self.answer_cache is not None:
+            stats["answers"] = self.answer_cache.stats()
+        if rerank_engine.hits or rerank_engine.misses:
+            stats["rerank"] = rerank_engine.stats()
+        return stats
+
     # Environment and Libraries
 
     def verify_installed_libraries(self) -> None:
@@ -668,22 +696,30 @@ class VerbaManager:
             )
             config = json.loads(document["meta"])
             embedder = config["Embedder"]["config"]["Model"]["value"]
-            request_chunk_ids = [
-                i
-                for i in range(
-                    chunks_per_page * (page + 1) - chunks_per_page,
-                    chunks_per_page * (page + 1),
+
+            if config.get("pages", 0) > 0:
+                # Paged documents (PDF) are shown page by page
+                total_batches = config["pages"]
+                chunks = await self.weaviate_manager.get_chunks_by_pages(
+                    client, embedder, uuid, [min(page, total_batches - 1) + 1]
                 )
-            ]
+            else:
+                request_chunk_ids = [
+                    i
+                    for i in range(
+                        chunks_per_page * (page + 1) - chunks_per_page,
+                        chunks_per_page * (page + 1),
+                    )
+                ]
 
-            chunks = await self.weaviate_manager.get_chunk_by_ids(
-                client, embedder, uuid, request_chunk_ids
-            )
+                chunks = await self.weaviate_manager.get_chunk_by_ids(
+                    client, embedder, uuid, request_chunk_ids
+                )
 
-            total_chunks = await self.weaviate_manager.get_chunk_count(
-                client, embedder, uuid
-            )
-            total_batches = int(math.ceil(total_chunks / chunks_per_page))
+                total_chunks = await self.weaviate_manager.get_chunk_count(
+                    client, embedder, uuid
+                )
+                total_batches = int(math.ceil(total_chunks / chunks_per_page))
 
             content = "".join(
                 [chunk.properties["content_without_overlap"] for chunk in chunks]
@@ -709,15 +745,78 @@ class VerbaManager:
         rag_config: dict,
         labels: list[str] = [],
         document_uuids: list[str] = [],
+        conversation: list = [],
     ):
         retriever = rag_config["Retriever"].selected
         embedder = rag_config["Embedder"].selected
 
         await self.weaviate_manager.add_suggestion(client, query)
 
-        vector = await self.embedder_manager.vectorize_query(
-            embedder, query, rag_config
+        fanout_timeout = self.retriever_manager.get_fanout_timeout(
+            retriever, rag_config
+        )
+        fanout = {}
+        if fanout_timeout is not None:
+            fanout = get_fanout_embedders(rag_config)
+        context_budget = self.generator_manager.get_context_budget(
+            rag_config, query, conversation
+        )
+        # The query is part of the key already, similar queries share answer cache entries
+        prompt_budget = self.generator_manager.get_context_budget(
+            rag_config, "", conversation
         )
+
+        # Everything besides the query that the retrieved chunks depend on
+        scope = get_scope_key(
+            get_component_settings(rag_config, "Embedder"),
+            get_component_settings(rag_config, "Retriever"),
+            sorted(labels),
+            sorted(document_uuids),
+            sorted(fanout.values()),
+            prompt_budget,
+        )
+        key = get_scope_key(scope, normalize_query(query))
+        if self.retrieval_cache is not None:
+            cached = self.retrieval_cache.get(client, key)
+            if cached is not None:
+                return cached
+
+        if fanout:
+            # Only collections that hold chunks are worth a query embedding
+            populated = await self.weaviate_manager.get_populated_embeddings(
+                client, list(fanout.values())
+            )
+            fanout = {
+                _embedder: model
+                for _embedder, model in fanout.items()
+                if model in populated
+            }
+
+        # Keyword search doesn't need the embedding round trip
+        vector = None
+        vectors = {model: None for model in fanout.values()}
+        if self.retriever_manager.requires_vector(retriever, rag_config):
+            vector, fanout_vectors = await asyncio.gather(
+                self.embedder_manager.vectorize_query(embedder, query, rag_config),
+                self.embedder_manager.vectorize_queries(
+                    list(fanout), query, rag_config, fanout_timeout or 0
+                ),
+            )
+            vectors = {
+                fanout[_embedder]: _vector
+                for _embedder, _vector in fanout_vectors.items()
+            }
+
+        if self.answer_cache is not None and vector is not None:
+            entry = self.answer_cache.lookup(client, scope, query, vector)
+            if entry is not None:
+                msg.info(f"Serving cached documents for: {query}")
+                if self.retrieval_cache is not None:
+                    self.retrieval_cache.set(
+                        client, key, (entry.documents, entry.context)
+                    )
+                return (entry.documents, entry.context)
+
         documents, context = await self.retriever_manager.retrieve(
             client,
             retriever,
@@ -727,8 +826,15 @@ class VerbaManager:
             self.weaviate_manager,
             labels,
             document_uuids,
+            vectors=vectors,
+            max_tokens=context_budget,
         )
 
+        if self.answer_cache is not None and vector is not None:
+            self.answer_cache.store(client, scope, query, vector, documents, context)
+        if self.retrieval_cache is not None:
+            self.retrieval_cache.set(client, key, (documents, context))
+
         return (documents, context)
 
     async def generate_stream_answer(
@@ -738,6 +844,18 @@ class VerbaManager:
         context: str,
         conversation: list[dict],
     ):
+        # Answers that build on earlier turns of the conversation aren't cached
+        cacheable = self.answer_cache is not None and not any(
+            item.type == "system" for item in conversation
+        )
+        if cacheable:
+            generator = get_scope_key(get_component_settings(rag_config, "Generator"))
+            answer = self.answer_cache.get_answer(query, context, generator)
+            if answer is not None:
+                msg.info(f"Replaying cached answer for: {query}")
+                for result in replay_answer(answer):
+                    yield result
+                return
 
         full_text = ""
         async for result in self.generator_manager.generate_stream(
@@ -745,6 +863,39 @@ class VerbaManager:
         ):
             full_text += result["message"]
             yield result
+            if cacheable and result.get("finish_reason") == "stop":
+                self.answer_cache.set_answer(query, context, generator, full_text)
+
+
+def get_component_settings(rag_config: dict, component: str) -> list:
+    """Selected component of a RAG config and its settings"""
+    selected = rag_config[component].selected
+    config = rag_config[component].components[selected].config
+    return [selected, {key: setting.value for key, setting in config.items()}]
+
+
+def get_fanout_embedders(rag_config: dict) -> dict[str, str]:
+    """Available embedders besides the selected one and their models, one per model"""
+    selected = rag_config["Embedder"].selected
+    config = rag_config["Embedder"].components[selected].config
+    models = {config["Model"].value if "Model" in config else selected}
+    fanout = {}
+    for name, component in rag_config["Embedder"].components.items():
+        if not component.available or "Model" not in component.config:
+            continue
+        model = component.config["Model"].value
+        if model not in models:
+            models.add(model)
+            fanout[name] = model
+    return fanout
+
+
+def replay_answer(answer: str, words: int = 8):
+    """Stream a cached answer in the format of Generator.generate_stream"""
+    pieces = re.findall(r"\s*\S+", answer)
+    for i in range(0, len(pieces), words):
+        yield {"message": "".join(pieces[i : i + words]), "finish_reason": ""}
+    yield {"message": "", "finish_reason": "stop", "cached": True}
 
 
 class ClientManager:
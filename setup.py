@@ -55,7 +55,10 @@ setup(
             "vertexai==1.46.0",
         ],
         "huggingface": [
-            "sentence-transformers==3.0.1",
+            "sentence-transformers==4.1.0",
+        ],
+        "onnx": [
+            "sentence-transformers[onnx]==4.1.0",
         ],
     },
 )